@@ -15,16 +15,63 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
 #
-"""Python Client Library for the LCCS Web Service."""
-from .lccs import LCCS
-from .classification_system import ClassificationSystem
-from . import cli
-from .classes import ClassificationSystemClass
-from .mappings import Mapping, MappingGroup
-from .utils import Utils
-from .style_utils import SldGenerator
-from .version import __version__
-from .lccs import LCCS
+"""Python Client Library for the LCCS Web Service.
+
+The public names are imported on first access (PEP 562), so ``import lccs``
+does not load the dependencies of the parts of the package that are not used.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+_LAZY_ATTRIBUTES = {
+    'LCCS': '.lccs',
+    'AsyncLCCS': '.async_lccs',
+    'ClassificationSystem': '.classification_system',
+    'ClassesGroup': '.classes',
+    'ClassificationSystemClass': '.classes',
+    'ClassHierarchy': '.hierarchy',
+    'MappingGraph': '.mapping_graph',
+    'Mapping': '.mappings',
+    'MappingGroup': '.mappings',
+    'Utils': '.utils',
+    'SldGenerator': '.style_utils',
+    '__version__': '.version',
+}
+"""Module of each lazily imported public name."""
+
+_LAZY_MODULES = ('cli',)
+"""Submodules loaded on first access as attributes of the package."""
+
+if TYPE_CHECKING:
+    from . import cli
+    from .async_lccs import AsyncLCCS
+    from .classes import ClassesGroup, ClassificationSystemClass
+    from .classification_system import ClassificationSystem
+    from .hierarchy import ClassHierarchy
+    from .lccs import LCCS
+    from .mapping_graph import MappingGraph
+    from .mappings import Mapping, MappingGroup
+    from .style_utils import SldGenerator
+    from .utils import Utils
+    from .version import __version__
+
+
+def __getattr__(name: str):
+    """Import a public name of the package on first access."""
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    elif name in _LAZY_MODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Return the names of the package, including the ones not imported yet."""
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_MODULES))
+
 
 __all__ = ('__version__',
            'lccs', )
@@ -0,0 +1,655 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python asyncio API client wrapper for LCCS-WS."""
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+
+from .batch import DEFAULT_BATCH_SIZE, BatchReport, ClassUpload, load_classes
+from .cache import (DEFAULT_CACHE_SIZE, CacheInfo, ResultCache, invalidate_classes,
+                    invalidate_mapping, invalidate_style_format, invalidate_styles,
+                    invalidate_system)
+from .classes import ClassificationSystemClass
+from .classification_system import AsyncClassificationSystem
+from .http_cache import ResponseCache
+from .mappings import MappingGroup
+from .retry import TransportPolicy
+from .style_formats import StyleFormats
+from .utils import DEFAULT_TIMEOUT, Utils
+
+
+class AsyncLCCS:
+    """This class implements a Python asyncio API client wrapper for LCCS-WS.
+
+    It mirrors the :class:`lccs.LCCS` API with coroutines, so it can be awaited
+    from an asyncio application::
+
+        async with AsyncLCCS(url) as service:
+            system = await service.classification_system("prodes-1.0")
+            classes = await system.classes()
+
+    The service document is not retrieved on construction. The supported
+    languages and the classification systems are fetched on first use.
+
+    :param url: The LCCS-WS server URL.
+    :type url: str
+    :param max_concurrency: Maximum number of simultaneous requests. Extra requests wait for a free connection.
+    :type max_concurrency: int
+    :param timeout: Timeout in seconds or a ``httpx.Timeout`` with connect, read, write and pool timeouts.
+    :type timeout: float | httpx.Timeout
+    :param client: An existing asynchronous HTTP client to use instead of creating a new one.
+        It is not closed by :meth:`aclose`.
+    :type client: httpx.AsyncClient
+    :param cache: A persistent response cache, or the path of its database, shared by processes and sessions.
+        Not used with ``client``.
+    :type cache: str | ResponseCache
+    :param policy: The retry, backoff, rate and adaptive concurrency policy of the requests. Not used with ``client``.
+    :type policy: TransportPolicy
+    :param memory_cache_size: Maximum approximate size in bytes of the results kept in memory by this instance.
+    :type memory_cache_size: int
+    :param memory_cache_ttl: Time in seconds the results are kept in memory. Default is None, they do not expire.
+    :type memory_cache_ttl: float
+    """
+
+    _url: str
+    _validate: bool
+    _access_token: str
+    _language: str | None
+    _client: httpx.AsyncClient
+    _owns_client: bool
+    _results: ResultCache
+
+    def __init__(
+        self,
+        url: str,
+        validate=False,
+        access_token=None,
+        language=None,
+        max_concurrency: int = 32,
+        timeout: float | httpx.Timeout | None = None,
+        client: httpx.AsyncClient | None = None,
+        cache: str | os.PathLike | ResponseCache | None = None,
+        policy: TransportPolicy | None = None,
+        memory_cache_size: int = DEFAULT_CACHE_SIZE,
+        memory_cache_ttl: float | None = None,
+    ):
+        """Create an asynchronous LCCS-WS client attached to the given host address (an URL)."""
+        self._url = url.rstrip("/")
+        self._validate = validate
+        self._access_token = access_token if access_token else ""
+        self._language = language
+        self._language_checked = language is None
+        self._supported_language = None
+        self._classification_systems = None
+        self._results = ResultCache(maxsize=memory_cache_size, ttl=memory_cache_ttl)
+        self._owns_client = client is None
+
+        if client is None:
+            if timeout is None or not isinstance(timeout, httpx.Timeout):
+                # Requests over the concurrency limit wait for a free connection without timing out.
+                timeout = httpx.Timeout(
+                    timeout if timeout is not None else DEFAULT_TIMEOUT.read, pool=None
+                )
+            client = Utils.create_async_client(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=max_concurrency,
+                    max_keepalive_connections=max_concurrency,
+                ),
+                access_token=self._access_token,
+                cache=cache,
+                policy=policy,
+            )
+        self._client = client
+
+    async def _get(self, url: str, params=None):
+        """Perform a GET request with the client of the service."""
+        return await Utils._aget(
+            url, access_token=self._access_token, params=params, client=self._client
+        )
+
+    async def _language_params(self) -> dict | None:
+        """Return the language query parameter, validating the language on first use."""
+        if not self._language_checked:
+            allowed = await self.allowed_language()
+            if self._language not in allowed:
+                s = ", ".join(allowed)
+                raise KeyError(f"Language not supported! Use: {s}")
+            self._language_checked = True
+        return {"language": self._language} if self._language else None
+
+    async def _cached(self, key: tuple, factory):
+        """Return the cached value of ``key`` or await ``factory`` and store its result."""
+        return await self._results.aget_or_set(key, factory)
+
+    def cache_info(self) -> CacheInfo:
+        """Return the statistics of the results kept in memory by this instance."""
+        return self._results.cache_info()
+
+    def cache_clear(self):
+        """Remove the results kept in memory by this instance."""
+        self._results.cache_clear()
+
+    async def allowed_language(self) -> list[str]:
+        """Retrieve a list of languages allowed by the service."""
+        if self._supported_language is None:
+            data = await self._get(f"{self._url}/")
+            self._supported_language = [
+                i["language"] for i in data["supported_language"]
+            ]
+        return self._supported_language
+
+    async def classification_systems(self) -> list[dict[str, str]]:
+        """Retrieve the list of names of all available classification systems in the service.
+
+        :returns: list of Classification Systems.
+        :rtype: list
+        """
+        if self._classification_systems is None:
+            data = await self._get(
+                f"{self._url}/classification_systems",
+                params=await self._language_params(),
+            )
+            self._classification_systems = [
+                dict(identifier=i["identifier"], title=i["title"], version=i["version"])
+                for i in data
+            ]
+        return self._classification_systems
+
+    async def classification_system(self, system: str) -> AsyncClassificationSystem:
+        """Return information about the given classification system.
+
+        :param system: A str with name-version for a given classification_system.
+        :type system: str
+
+        :returns: A ClassificationSystem whose ``classes`` method is a coroutine.
+        :rtype: AsyncClassificationSystem
+        """
+
+        async def fetch():
+            url = f"{self._url}/classification_systems/{system}"
+            try:
+                data = await self._get(url, params=await self._language_params())
+            except Exception as exc:
+                raise KeyError(
+                    f"Could not retrieve information for classification_system: {system}"
+                ) from exc
+            return AsyncClassificationSystem(data, self._validate, self._client, results=self._results)
+
+        return await self._cached(("classification_system", system), fetch)
+
+    async def available_mappings(self, system_source: str) -> list:
+        """Return the available mappings of classification system.
+
+        :param system_source: The name or identifier of classification system.
+        :type system_source: str
+
+        :returns: Available Classification Systems Mappings.
+        :rtype: list
+        """
+
+        async def fetch():
+            url = f"{self._url}/mappings/{system_source}"
+            try:
+                data = await self._get(url, params=await self._language_params())
+            except Exception:
+                raise KeyError(
+                    f"Could not retrieve any available mapping for {system_source}"
+                )
+
+            return list(
+                await asyncio.gather(
+                    *(
+                        self.classification_system(
+                            i["href"].split("/")[-1].split("?")[0]
+                        )
+                        for i in data
+                        if i["rel"] == "child"
+                    )
+                )
+            )
+
+        return await self._cached(("available_mappings", system_source), fetch)
+
+    async def mappings(self, system_source: str, system_target: str) -> MappingGroup:
+        """Return the mappings between two classification systems.
+
+        The classes of the source and target classification systems are retrieved
+        once, concurrently, and shared by all mappings of the group.
+
+        :param system_source: The name or identifier of classification system.
+        :type system_source: str
+        :param system_target: The name or identifier of classification system.
+        :type system_target: str
+
+        :returns: Mappings of classification Systems.
+        :rtype: MappingGroup
+        """
+
+        async def fetch():
+            url = f"{self._url}/mappings/{system_source}/{system_target}"
+            try:
+                data = await self._get(url)
+            except Exception:
+                raise KeyError(
+                    f"Could not retrieve mappings for {system_source} and {system_target}"
+                )
+
+            source_classes, target_classes = await asyncio.gather(
+                self._classes_index(system_source, data, "Link to source class", "source_class_id"),
+                self._classes_index(system_target, data, "Link to target class", "target_class_id"),
+            )
+            return MappingGroup(
+                {"mappings": data},
+                self._validate,
+                source_classes=source_classes,
+                target_classes=target_classes,
+            )
+
+        return await self._cached(("mappings", system_source, system_target), fetch)
+
+    async def _classes_index(
+        self, system: str, mappings: list, title: str, id_key: str
+    ) -> dict[Any, ClassificationSystemClass]:
+        """Return the classes referenced by ``mappings`` indexed by class id.
+
+        The classes come from the cached class group of ``system``. Classes missing
+        from that group are fetched individually through the mapping links.
+        """
+        try:
+            group = await (await self.classification_system(system)).classes_group()
+            index = {c.id: c for c in group.classes}
+        except (KeyError, ValueError, RuntimeError):
+            index = {}
+
+        missing = {}
+        for mapping in mappings:
+            if mapping.get(id_key) in index:
+                continue
+            for link in mapping.get("links", []):
+                if link.get("rel") == "item" and link.get("title") == title:
+                    missing[mapping.get(id_key)] = link["href"]
+
+        data = await asyncio.gather(*(self._get(href) for href in missing.values()))
+        index.update(
+            (class_id, ClassificationSystemClass(class_data, self._validate))
+            for class_id, class_data in zip(missing, data)
+        )
+
+        return index
+
+    async def available_style_formats(self) -> list:
+        """Fetch the available style formats.
+
+        :returns: Available style formats.
+        :rtype: list
+        """
+        try:
+            data = await self._get(f"{self._url}/style_formats")
+        except Exception:
+            raise KeyError("Could not retrieve any style format")
+
+        hrefs = [
+            links["href"]
+            for i in data
+            for links in i["links"]
+            if links["rel"] == "items"
+        ]
+        result = await asyncio.gather(*(self._get(href) for href in hrefs))
+
+        return [StyleFormats(style_data) for style_data in result]
+
+    async def style_formats(self, system) -> list[StyleFormats]:
+        """Fetch styles of the a giving classification system.
+
+        :param system: The id or identifier of a classification system.
+        :type system: str
+
+        :returns: Available Classification Systems Styles.
+        :rtype: list
+        """
+
+        async def fetch():
+            try:
+                data = await self._get(
+                    f"{self._url}/classification_systems/{system}/style_formats"
+                )
+            except Exception:
+                raise KeyError(f"Could not retrieve any style format for {system}")
+
+            result = await asyncio.gather(
+                *(
+                    self._get(f"{self._url}/style_formats/{i['href'].split('/')[-1]}")
+                    for i in data
+                    if i["rel"] == "style"
+                )
+            )
+            return [StyleFormats(style_data) for style_data in result]
+
+        return await self._cached(("style_formats", system), fetch)
+
+    async def get_style(self, system, style_format, path=None, size=None, checksum=None):
+        """Fetch styles of a giving classification system.
+
+        The style is streamed to disk in chunks, written in a ``.part`` file renamed
+        once complete and verified, see :func:`lccs.download.download_file`.
+
+        :param system: The id or identifier of a classification system.
+        :type system: str
+
+        :param style_format: The id or name of style format.
+        :type style_format: str
+
+        :param path: Directory path to save the file
+        :type path: str
+
+        :param size: The expected size of the style file in bytes.
+        :type size: int
+
+        :param checksum: The expected checksum of the style file, as ``algorithm:hexdigest``.
+        :type checksum: str
+
+        :returns: The number of bytes written.
+        :rtype: int
+        """
+        from .download import adownload_file
+
+        headers = {"x-api-key": self._access_token} if self._access_token else {}
+        try:
+            file = await adownload_file(
+                f"{self._url}/classification_systems/{system}/styles/{style_format}",
+                path if path is not None else ".",
+                client=self._client,
+                size=size,
+                checksum=checksum,
+                headers=headers,
+            )
+        except httpx.HTTPError as exc:
+            raise KeyError(f"Could not retrieve any style for {system}") from exc
+
+        return file.stat().st_size
+
+    async def add_classification_system(self, system_path: str | dict) -> list[dict]:
+        """Add new classification system."""
+        url = f"{self._url}/classification_systems"
+
+        if isinstance(system_path, str):
+            with open(system_path, encoding="utf-8") as file:
+                system_path = json.load(file)
+        if self._validate:
+            Utils.validate(system_path, "new_classification_system")
+        try:
+            retval = await Utils._apost(
+                url, access_token=self._access_token, json=system_path, client=self._client
+            )
+        except httpx.HTTPError:
+            raise ValueError("Could not insert classes!")
+
+        self._classification_systems = None
+        self._results.invalidate(lambda key, _: key[0] == "mapping_graph")
+
+        return retval
+
+    async def update_class(self, system: str, class_id: int, class_info: dict) -> list[dict]:
+        """Update class to a classification system."""
+        url = f"{self._url}/classification_systems/{system}/classes/{class_id}"
+
+        try:
+            retval = await Utils._aput(
+                url, access_token=self._access_token, json=class_info, client=self._client
+            )
+        except httpx.HTTPError:
+            raise ValueError("Could not update class!")
+
+        invalidate_classes(self._results, system)
+
+        return retval
+
+    async def add_classes(
+        self,
+        system: str,
+        classes: str | list[dict[str, Any]],
+        chunk_size: int = DEFAULT_BATCH_SIZE,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> BatchReport:
+        """Add new classes to an classification system, in chunks sent concurrently.
+
+        See :meth:`lccs.LCCS.add_classes`.
+
+        :param system: The id or identifier of a classification system.
+        :type system: str
+        :param classes: A JSON file or a list of classes.
+        :type classes: str | list[dict]
+        :param chunk_size: The maximum number of classes per request.
+        :type chunk_size: int
+        :param progress: Called with the number of classes processed and the total after each chunk.
+        :type progress: Callable[[int, int], None]
+
+        :returns: The created classes, the number of chunks and the errors.
+        :rtype: BatchReport
+        """
+        url = f"{self._url}/classification_systems/{system}/classes"
+
+        classes = load_classes(classes)
+
+        if self._validate:
+            # The whole upload is checked before the first chunk is sent.
+            Utils.validate(classes, "class", many=True)
+
+        async def system_ids() -> dict:
+            invalidate_classes(self._results, system)
+            return {c.name: c.id for c in await (await self.classification_system(system)).classes()}
+
+        upload = ClassUpload(classes, chunk_size, progress)
+        upload.plan(await system_ids() if upload.needs_ids else {})
+
+        async def post(chunk):
+            try:
+                return await Utils._apost(
+                    url, access_token=self._access_token, json=upload.payload(chunk), client=self._client
+                ), None
+            except (ValueError, httpx.HTTPError) as exc:
+                return None, exc
+            finally:
+                upload.step(chunk)
+
+        for depth in range(len(upload.levels)):
+            if upload.missing_parents(depth):
+                # The service did not return the ids of the created parents.
+                upload.ids.update(await system_ids())
+            level_chunks = upload.level_chunks(depth)
+            results = await asyncio.gather(*(post(chunk) for chunk in level_chunks))
+            for chunk, (retval, exc) in zip(level_chunks, results):
+                upload.record(chunk, retval, exc)
+
+        invalidate_classes(self._results, system)
+
+        return upload.report()
+
+    async def add_style(
+        self,
+        system: str,
+        style_format: str,
+        style_path: str = None,
+        style_tex: str = None,
+        style_name: str = None,
+        style_extension: str = None,
+    ) -> list[dict]:
+        """Add a new style to a system."""
+        url = f"{self._url}/classification_systems/{system}/styles"
+
+        if style_path:
+            style = {"style": (Path(style_path).name, Path(style_path).read_bytes())}
+        elif style_tex:
+            style = {"style": (f"{style_name}.{style_extension}", f"{style_tex}")}
+        else:
+            raise ValueError("You must provide a file path or a string with the style!")
+
+        data = dict(style_format=style_format)
+
+        try:
+            retval = await Utils._apost(
+                url,
+                access_token=self._access_token,
+                data=data,
+                files=style,
+                client=self._client,
+            )
+        except httpx.HTTPError:
+            raise ValueError("Could not insert style!")
+
+        invalidate_styles(self._results, system)
+
+        return retval
+
+    async def add_mapping(self, system_source: str, system_target: str, mappings) -> list:
+        """Add new classification system mapping."""
+        url = f"{self._url}/mappings/{system_source}/{system_target}"
+
+        if isinstance(mappings, str):
+            with open(mappings, encoding="utf-8") as file:
+                mappings = json.load(file)
+        if self._validate:
+            Utils.validate(mappings, "mapping", many=isinstance(mappings, list))
+        try:
+            retval = await Utils._apost(
+                url, access_token=self._access_token, json=mappings, client=self._client
+            )
+        except httpx.HTTPError:
+            raise ValueError("Could not insert mappings!")
+
+        invalidate_mapping(self._results, system_source, system_target)
+
+        return retval
+
+    async def add_style_format(self, name: str) -> dict:
+        """Add a new style format."""
+        url = f"{self._url}/style_formats"
+
+        try:
+            return await Utils._apost(
+                url, access_token=self._access_token, json={"name": name}, client=self._client
+            )
+        except httpx.HTTPError:
+            raise ValueError(f"Could not insert style format {name}!")
+
+    async def _delete(self, url: str, message: str) -> int:
+        """Perform a DELETE request and return the status code."""
+        try:
+            retval = await Utils._adelete(
+                url, access_token=self._access_token, client=self._client
+            )
+        except httpx.HTTPError:
+            raise ValueError(message)
+
+        return retval.status_code
+
+    async def delete_classification_system(self, system: str) -> int:
+        """Delete a specific classification system."""
+        status_code = await self._delete(
+            f"{self._url}/classification_systems/{system}",
+            f"Could not remove classification system {system}!",
+        )
+        invalidate_system(self._results, system)
+        self._classification_systems = None
+        return status_code
+
+    async def delete_class(self, system: str, class_name_or_id: str) -> int:
+        """Delete a specific class."""
+        status_code = await self._delete(
+            f"{self._url}/classification_systems/{system}/classes/{class_name_or_id}",
+            f"Could not remove class {class_name_or_id} of classification system {system}!",
+        )
+        invalidate_classes(self._results, system)
+        return status_code
+
+    async def delete_style_format(self, style_format: str) -> int:
+        """Delete a specific style format."""
+        status_code = await self._delete(
+            f"{self._url}/style_formats/{style_format}",
+            f"Could not remove style format {style_format} !",
+        )
+        invalidate_style_format(self._results, style_format)
+        return status_code
+
+    async def delete_style(self, system: str, style_format: str) -> int:
+        """Delete the style of a classification system."""
+        status_code = await self._delete(
+            f"{self._url}/classification_systems/{system}/styles/{style_format}",
+            f"Could not remove style {style_format} of classification system {system}!",
+        )
+        invalidate_styles(self._results, system)
+        return status_code
+
+    async def delete_mapping(self, system_source: str, system_target: str) -> int:
+        """Delete the mapping."""
+        status_code = await self._delete(
+            f"{self._url}/mappings/{system_source}/{system_target}",
+            f"Could not remove mapping of {system_source} and {system_target}!",
+        )
+        invalidate_mapping(self._results, system_source, system_target)
+        return status_code
+
+    async def create_style(self, system: str, style_format: str, options: dict, rules: list):
+        """Create style sld."""
+        from .style_utils import SldGenerator
+
+        sld = SldGenerator.create_sld(options=options, rules=rules, layer_name=system)
+
+        await self.add_style(
+            system=system,
+            style_format=style_format,
+            style_tex=sld.decode("utf-8"),
+            style_name="lccs-style",
+            style_extension="sld",
+        )
+
+    @property
+    def url(self):
+        """Return the LCSS server instance URL."""
+        return self._url
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the HTTP client shared by the requests of this service."""
+        return self._client
+
+    async def aclose(self):
+        """Close the HTTP connections held by the service."""
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def __aenter__(self):
+        """Enter the runtime context of the service."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the service when leaving the runtime context."""
+        await self.aclose()
+
+    def __repr__(self):
+        """Return the string representation of a lccs object."""
+        return f'AsyncLCCS("{self.url}")'
+
+    def __str__(self):
+        """Return the string representation of a lccs object."""
+        return f"<AsyncLCCS [{self.url}]>"
@@ -0,0 +1,226 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+DEFAULT_BATCH_SIZE = 500
+"""Default number of classes sent per request by ``add_classes``."""
+
+
+class BatchReport(NamedTuple):
+    """Summary of an ``add_classes`` call.
+
+    Before version 1.1.0, ``add_classes`` returned the response of the service;
+    the classes it returns are now in :attr:`classes`.
+    """
+
+    classes: list
+    """Classes returned by the service for the accepted chunks."""
+    chunks: int
+    """Number of chunks sent."""
+    errors: dict
+    """Exceptions keyed by the names of the classes not created."""
+    created: int
+    """Number of classes created."""
+
+
+def class_levels(classes: List[dict], ids: Dict[str, Any]) -> Tuple[List[List[dict]], Dict[Tuple[str, ...], Exception]]:
+    """
+    Group classes by depth, so the parents given by name are created before their children.
+
+    A class is at level 0 when its ``class_parent_id`` is empty, an id, or the name of a
+    class in ``ids``. Otherwise its parent is given by the name of another uploaded class
+    and it is one level under it.
+
+    :param classes: The classes to upload.
+    :param ids: The ids of the classes already in the classification system, by name.
+    :return: The classes of each level and the errors of the classes whose parent is unknown.
+    """
+    by_name = {c["name"]: c for c in classes if "name" in c}
+    depth: Dict[int, Optional[int]] = {}
+
+    for cls in classes:
+        chain, seen, node = [], set(), cls
+        while id(node) not in depth:
+            if id(node) in seen:
+                raise ValueError(f"Cycle in the class hierarchy: {', '.join(sorted(c.get('name', '') for c in chain))}")
+            seen.add(id(node))
+            chain.append(node)
+            parent = node.get("class_parent_id")
+            if isinstance(parent, str) and parent in by_name:
+                node = by_name[parent]
+                continue
+            base = None if isinstance(parent, str) and parent not in ids else -1
+            break
+        else:
+            base = depth[id(node)]
+        for node in reversed(chain):
+            base = None if base is None else base + 1
+            depth[id(node)] = base
+
+    levels: List[List[dict]] = []
+    errors: Dict[Tuple[str, ...], Exception] = {}
+    for cls in classes:
+        level = depth[id(cls)]
+        if level is None:
+            errors[(cls.get("name"),)] = KeyError(f"Parent class {cls['class_parent_id']} not found")
+            continue
+        levels.extend([] for _ in range(level + 1 - len(levels)))
+        levels[level].append(cls)
+    return levels, errors
+
+
+def chunks(items: List[dict], size: int) -> Iterator[List[dict]]:
+    """Split a list in chunks of at most ``size`` items."""
+    if size < 1:
+        raise ValueError(f"Invalid chunk size {size}")
+    return (items[i:i + size] for i in range(0, len(items), size))
+
+
+def resolve_parents(chunk: List[dict], ids: Dict[str, Any]) -> List[dict]:
+    """Return copies of the classes with the parents given by name replaced by their ids.
+
+    :raises KeyError: If a parent is not in ``ids``.
+    """
+    result = []
+    for cls in chunk:
+        parent = cls.get("class_parent_id")
+        if isinstance(parent, str):
+            if parent not in ids:
+                raise KeyError(f"Parent class {parent} not found")
+            cls = dict(cls, class_parent_id=ids[parent])
+        result.append(cls)
+    return result
+
+
+def created_ids(response: Any) -> Dict[str, Any]:
+    """Return the ids by name of the classes returned by the service, if any."""
+    items = response if isinstance(response, list) else [response]
+    return {i["name"]: i["id"] for i in items if isinstance(i, dict) and "name" in i and "id" in i}
+
+
+def load_classes(classes: Union[str, List[dict]]) -> List[dict]:
+    """
+    Return the classes to upload, given as a list or as a JSON file.
+
+    :raises ValueError: If the file does not exist or is not valid JSON.
+    """
+    if not isinstance(classes, str):
+        return classes
+
+    classes_path = Path(classes)
+    if not classes_path.exists():
+        raise ValueError(f"File not found: {classes_path}")
+    try:
+        with classes_path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Invalid JSON file: {classes_path}") from exc
+
+
+class ClassUpload:
+    """Plan and state of an ``add_classes`` call, shared by the synchronous and asynchronous clients.
+
+    The client gives the ids of the classes of the system to :meth:`plan` (only needed
+    when :attr:`needs_ids`), then sends the :meth:`level_chunks` of each level
+    concurrently with the :meth:`payload` of each chunk, calling :meth:`step` when a
+    request ends and :meth:`record` with its result once the level is done.
+
+    :param classes: The classes to upload.
+    :param chunk_size: The maximum number of classes per request. Default is :data:`DEFAULT_BATCH_SIZE`.
+    :param progress: (Optional) Called with the number of classes processed and the total after each chunk.
+    """
+
+    def __init__(self, classes: List[dict], chunk_size: int = DEFAULT_BATCH_SIZE,
+                 progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """Create the upload of the given classes."""
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size {chunk_size}")
+        self.classes = classes
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.ids: Dict[str, Any] = {}
+        self.levels: List[List[dict]] = []
+        self.errors: Dict[Tuple[str, ...], Exception] = {}
+        self.created: list = []
+        self.chunks = 0
+        self._done = 0
+        self._lock = threading.Lock()
+
+    @property
+    def needs_ids(self) -> bool:
+        """Return True if a parent is given by name, so the ids of the classes of the system are needed."""
+        return any(isinstance(c.get("class_parent_id"), str) for c in self.classes)
+
+    def plan(self, ids: Dict[str, Any]) -> None:
+        """Group the classes in levels, given the ids of the classes of the system by name."""
+        self.ids = dict(ids)
+        self.levels, self.errors = class_levels(self.classes, self.ids)
+        self._done = len(self.classes) - sum(len(level) for level in self.levels)
+
+    def missing_parents(self, depth: int) -> bool:
+        """Return True if the ids of parents of a level are unknown, as the service did not return them."""
+        return depth > 0 and any(
+            isinstance(c.get("class_parent_id"), str) and c["class_parent_id"] not in self.ids
+            for c in self.levels[depth]
+        )
+
+    def level_chunks(self, depth: int) -> List[List[dict]]:
+        """Return the chunks of a level, counting them as sent.
+
+        The classes whose parent is still unknown, as its chunk failed, are not sent: each
+        one is reported in :attr:`errors` and counted as processed.
+        """
+        ready, orphans = [], []
+        for cls in self.levels[depth]:
+            parent = cls.get("class_parent_id")
+            (orphans if isinstance(parent, str) and parent not in self.ids else ready).append(cls)
+        for cls in orphans:
+            self.errors[(cls.get("name"),)] = KeyError(f"Parent class {cls['class_parent_id']} not found")
+        if orphans:
+            self.step(orphans)
+        level_chunks = list(chunks(ready, self.chunk_size))
+        self.chunks += len(level_chunks)
+        return level_chunks
+
+    def payload(self, chunk: List[dict]) -> List[dict]:
+        """Return the classes of a chunk of :meth:`level_chunks` as sent, with their parents given by id."""
+        return resolve_parents(chunk, self.ids)
+
+    def step(self, chunk: List[dict]) -> None:
+        """Count the classes of a chunk as processed, reporting the progress."""
+        with self._lock:
+            self._done += len(chunk)
+            if self.progress is not None:
+                self.progress(self._done, len(self.classes))
+
+    def record(self, chunk: List[dict], response: Any = None, error: Optional[Exception] = None) -> None:
+        """Keep the created classes of a chunk, and their ids, or the error of the chunk."""
+        if error is not None:
+            self.errors[tuple(c.get("name") for c in chunk)] = error
+            return
+        self.created.extend(response if isinstance(response, list) else [response])
+        self.ids.update(created_ids(response))
+
+    def report(self) -> BatchReport:
+        """Return the summary of the upload."""
+        failed = sum(len(names) for names in self.errors)
+        return BatchReport(self.created, self.chunks, self.errors, len(self.classes) - failed)
@@ -0,0 +1,355 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import asyncio
+import functools
+import inspect
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterator, NamedTuple, Optional, Set, Tuple
+
+from cachetools import Cache, LRUCache, TTLCache
+
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+"""Default size in bytes of the cached results of a service."""
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a :class:`ResultCache`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    entries: int
+    coalesced: int = 0
+
+
+def approximate_size(value: Any) -> int:
+    """Return the approximate size in bytes of a value and of the containers and strings it holds."""
+    size = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
+
+class GrowingResult:
+    """Base of the results that keep data built after they are cached, such as indexes and lookup tables.
+
+    Their ``__sizeof__`` includes that data, and they call :meth:`_grown` when it
+    is built, so the :class:`ResultCache` storing them measures their size again.
+    """
+
+    __slots__ = ()
+
+    _on_grow: Optional[Callable[[], None]] = None
+
+    def _grown(self) -> None:
+        """Notify the cache storing the result that its size changed."""
+        on_grow = getattr(self, '_on_grow', None)
+        if on_grow is not None:
+            on_grow()
+
+
+class ResultCache:
+    """Cache of the results of a service, bounded by their approximate size in bytes.
+
+    Each service instance has its own cache, so the cached results are released
+    with the instance. The least recently used results are evicted first, and
+    results expire after ``ttl`` seconds when it is given. Results larger than
+    the cache are not stored.
+
+    The cache may be used from several threads. Concurrent misses of the same key
+    are coalesced: the first caller computes the result while the others wait for
+    it, and an exception is raised in all of them. A result computed while the
+    cache is invalidated is returned to its callers but not stored. The size of a
+    :class:`GrowingResult` is measured again each time it grows. Callers from a
+    bounded thread pool (``pooled``) only wait for computations started in such a
+    pool, since any other computation may itself wait for a free thread of the pool.
+
+    :param maxsize: Maximum size of the cached results, in bytes. Default is :data:`DEFAULT_CACHE_SIZE`.
+    :param ttl: (Optional) Time in seconds a result is kept. Default is None, results do not expire.
+    :param getsizeof: Function returning the size of a result. Default is :func:`approximate_size`.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: Optional[float] = None,
+                 getsizeof: Callable[[Any], int] = approximate_size) -> None:
+        """Create an empty cache."""
+        if ttl is None:
+            self._cache = LRUCache(maxsize, getsizeof=getsizeof)
+        else:
+            self._cache = TTLCache(maxsize, ttl, timer=time.monotonic, getsizeof=getsizeof)
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._generation = 0
+        self._flights: Dict[Hashable, Tuple[Any, int, bool]] = {}
+        self._lock = threading.RLock()
+
+    def _lookup(self, key: Hashable, new_future: Callable[[], Any], pooled: bool = False) -> Tuple[bool, Any, bool]:
+        """Return the cached result of ``key``, or the future of its computation.
+
+        :return: Whether the result is cached, the result or its future, and whether
+            the caller computes the result. A computing caller must resolve the future,
+            unless it is None: the caller then computes the result without storing it.
+        """
+        with self._lock:
+            try:
+                value = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                self._hits += 1
+                return True, value, False
+
+            flight = self._flights.get(key)
+            if flight is not None and (flight[2] or not pooled):
+                self._coalesced += 1
+                return False, flight[0], False
+            self._misses += 1
+            if flight is not None:
+                # Waiting could block the thread the computation needs, so compute it again.
+                return False, None, True
+            future = new_future()
+            self._flights[key] = (future, self._generation, pooled)
+            return False, future, True
+
+    def _land(self, key: Hashable, future, value: Any = None, stored: bool = True) -> None:
+        """End the flight of ``key``, storing its result unless the cache was invalidated meanwhile."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None or flight[0] is not future:
+                return
+            del self._flights[key]
+            if stored and flight[1] == self._generation:
+                try:
+                    self._cache[key] = value
+                except ValueError:
+                    return
+                if isinstance(value, GrowingResult):
+                    value._on_grow = functools.partial(self._resize, key, value)
+
+    def _resize(self, key: Hashable, value: Any) -> None:
+        """Measure the size of a stored result again, evicting other results when it grew."""
+        with self._lock:
+            if key not in self._cache or Cache.__getitem__(self._cache, key) is not value:
+                return
+            try:
+                self._cache[key] = value
+            except ValueError:
+                # The result is now larger than the cache.
+                del self._cache[key]
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], pooled: bool = False) -> Any:
+        """Return the cached result of ``key`` or store and return the result of ``factory``.
+
+        Concurrent calls with the same key wait for a single call of ``factory``.
+
+        :param key: The key of the result.
+        :param factory: The function computing the result.
+        :param pooled: Whether the caller is a thread of a bounded pool that ``factory``
+            may also use. Such a caller does not wait for a computation started outside
+            the pool, it calls ``factory`` itself. Default is False.
+        """
+        cached, future, leader = self._lookup(key, Future, pooled)
+        if cached:
+            return future
+        if not leader:
+            return future.result()
+        if future is None:
+            return factory()
+        try:
+            value = factory()
+        except BaseException as exc:
+            self._land(key, future, stored=False)
+            future.set_exception(exc)
+            raise
+        self._land(key, future, value)
+        future.set_result(value)
+        return value
+
+    async def aget_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached result of ``key`` or store and return the result of the coroutine ``factory``.
+
+        Concurrent calls with the same key, in the same event loop, wait for a single call of ``factory``.
+        """
+        cached, future, leader = self._lookup(key, asyncio.get_running_loop().create_future)
+        if cached:
+            return future
+        if not leader:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            # The computing call was cancelled, so this one takes over.
+            return await self.aget_or_set(key, factory)
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            self._land(key, future, stored=False)
+            future.cancel()
+            raise
+        except BaseException as exc:
+            self._land(key, future, stored=False)
+            future.set_exception(exc)
+            # Retrieve the exception, so it is not reported as never retrieved when nobody waits.
+            future.exception()
+            raise
+        self._land(key, future, value)
+        future.set_result(value)
+        return value
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Iterate over the cached keys and results, without counting hits or refreshing them."""
+        with self._lock:
+            # Read the entries without moving them in the eviction order.
+            entries = [(key, Cache.__getitem__(self._cache, key)) for key in list(self._cache)]
+        yield from entries
+
+    def invalidate(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Remove the results for which ``predicate(key, result)`` is true.
+
+        :param predicate: A function of the key and result of an entry.
+        :return: The number of removed results.
+        """
+        keys = [key for key, value in self.items() if predicate(key, value)]
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._cache.pop(key, None)
+        return len(keys)
+
+    def cache_info(self) -> CacheInfo:
+        """Return the hits, misses, maximum size, current size, number of results and coalesced calls of the cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._cache.maxsize, self._cache.currsize, len(self._cache),
+                             self._coalesced)
+
+    def cache_clear(self) -> None:
+        """Remove all results and reset the statistics."""
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+            self._hits = self._misses = self._coalesced = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return True if a result of ``key`` is cached."""
+        return key in self._cache
+
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return len(self._cache)
+
+    def __repr__(self) -> str:
+        """Return the string representation of the cache."""
+        return f"ResultCache({self.cache_info()})"
+
+
+def cached_method(method: Callable) -> Callable:
+    """Cache the results of a method in the :class:`ResultCache` of its instance, ``self._results``.
+
+    The results are keyed by the method name and the values of all its parameters, defaults
+    included, so positional and keyword calls share their results. Calls from the thread
+    pool of the instance (``self._local.worker``) are ``pooled``, see :meth:`ResultCache.get_or_set`.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__,) + tuple(bound.arguments.values())[1:]
+        return self._results.get_or_set(
+            key, lambda: method(self, *args, **kwargs), pooled=getattr(self._local, "worker", False)
+        )
+
+    return wrapper
+
+
+# The results of a service are keyed by the name of the cached method followed by its arguments,
+# so the functions below drop exactly the results that depend on the modified resources.
+
+def system_names(results: ResultCache, system) -> Set[str]:
+    """Return the names a classification system is cached with: the given one, its id and its identifier."""
+    names = {str(system)}
+    for key, value in results.items():
+        if key[0] == 'classification_system':
+            aliases = {str(key[1]), str(value.id), str(value.identifier)}
+            if names & aliases:
+                names |= aliases
+    return names
+
+
+def invalidate_classes(results: ResultCache, system) -> int:
+    """Remove the results that depend on the classes of a classification system, including the system."""
+    names = system_names(results, system)
+    return results.invalidate(
+        lambda key, _: key[0] == 'mapping_graph'
+        or (key[0] in ('classification_system', 'classes', 'mappings') and bool(names & {str(k) for k in key[1:]}))
+    )
+
+
+def invalidate_mapping(results: ResultCache, system_source, system_target) -> int:
+    """Remove the results that depend on the mappings between two classification systems."""
+    sources, targets = system_names(results, system_source), system_names(results, system_target)
+    return results.invalidate(
+        lambda key, _: key[0] == 'mapping_graph'
+        or (key[0] == 'available_mappings' and str(key[1]) in sources)
+        or (key[0] == 'mappings' and str(key[1]) in sources and str(key[2]) in targets)
+    )
+
+
+def invalidate_styles(results: ResultCache, system) -> int:
+    """Remove the results that depend on the styles of a classification system."""
+    names = system_names(results, system)
+    return results.invalidate(lambda key, _: key[0] == 'style_formats' and str(key[1]) in names)
+
+
+def invalidate_style_format(results: ResultCache, style_format) -> int:
+    """Remove the style format lists that contain a style format, given its id or name."""
+    return results.invalidate(
+        lambda key, value: key[0] == 'style_formats'
+        and any(str(style_format) in (str(f.id), str(f.name)) for f in value)
+    )
+
+
+def invalidate_system(results: ResultCache, system) -> int:
+    """Remove the results that depend on a classification system, including the mappings to it."""
+    names = system_names(results, system)
+
+    def depends(key, value) -> bool:
+        if key[0] == 'mapping_graph' or names & {str(k) for k in key[1:]}:
+            return True
+        return key[0] == 'available_mappings' and any(names & {str(s.id), str(s.identifier)} for s in value)
+
+    return results.invalidate(depends)
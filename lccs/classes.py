@@ -16,31 +16,136 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
 #
 """Python Client Library for the LCCS Web Service."""
-from typing import List, Optional
+import asyncio
+from typing import Dict, List, Optional
+
+import httpx
+
+from .cache import GrowingResult, approximate_size
 from .utils import Utils
 
+_NOT_LOADED = object()
+"""Marker of a relation that was not loaded yet."""
 
-class ClassesGroup(dict):
+
+class ClassesGroup(dict, GrowingResult):
     """Group of classification system classes."""
 
-    def __init__(self, data: dict, validate: bool = False) -> None:
+    def __init__(self, data: dict, validate: bool = False, client: Optional[httpx.Client] = None) -> None:
         """
         Initialize instance with dictionary data.
 
         :param data: Dictionary containing classification group data.
         :param validate: Whether to validate the data using jsonschema. Default is False.
+        :param client: (Optional) The HTTP client shared with the LCCS service.
         """
         super().__init__(data or {})
+        if validate:
+            Utils.validate(self.get('classes', []), 'class', many=True)
         self._validate = validate
+        self._client = client
         self._classes: List[ClassificationSystemClass] = [
-            ClassificationSystemClass(i, self._validate) for i in self.get('classes', [])
+            self._create_class(i) for i in self.get('classes', [])
         ]
+        self._classes_by_id: Optional[Dict[int, ClassificationSystemClass]] = None
+        self._hierarchy = None
+
+    def _create_class(self, data: dict) -> 'ClassificationSystemClass':
+        """Create the class object of an item of the group."""
+        return ClassificationSystemClass(data, self._validate, self._client, group=self)
+
+    def _class_by_id(self, class_id) -> Optional['ClassificationSystemClass']:
+        """Return the class of the group with the given id, indexing the classes on first use."""
+        if self._classes_by_id is None:
+            self._classes_by_id = {cls.id: cls for cls in self._classes}
+            self._grown()
+        return self._classes_by_id.get(class_id)
 
     @property
     def classes(self) -> List['ClassificationSystemClass']:
         """Return the list of classification system classes."""
         return self._classes
 
+    def hierarchy(self) -> 'ClassHierarchy':
+        """Return the hierarchy of the classes of the group, built on first use."""
+        if self._hierarchy is None:
+            from .hierarchy import ClassHierarchy
+            self._hierarchy = ClassHierarchy(self)
+            self._grown()
+        return self._hierarchy
+
+    def compact(self) -> 'CompactClassesGroup':
+        """Return a copy of the group stored in columns. See :class:`lccs.compact.CompactClassesGroup`."""
+        from .compact import CompactClassesGroup
+        return CompactClassesGroup(self, self._validate, self._client)
+
+    def _export_columns(self) -> Dict[str, list]:
+        """Return the exported columns of the classes, read from the data of the group."""
+        from .export import CLASS_COLUMNS, item_columns
+        return item_columns(self.get('classes', []), CLASS_COLUMNS)
+
+    def to_numpy(self):
+        """
+        Return the classes as a NumPy structured array, one field per column. See :func:`lccs.export.to_numpy`.
+
+        Requires numpy.
+        """
+        from .export import to_numpy
+        return to_numpy(self._export_columns())
+
+    def to_pandas(self):
+        """
+        Return the classes as a pandas DataFrame. See :func:`lccs.export.to_pandas`.
+
+        Requires pandas.
+        """
+        from .export import to_pandas
+        return to_pandas(self._export_columns())
+
+    def to_arrow(self):
+        """
+        Return the classes as an Arrow table. See :func:`lccs.export.to_arrow`.
+
+        Requires pyarrow.
+        """
+        from .export import to_arrow
+        return to_arrow(self._export_columns())
+
+    def prefetch_related(self, *relations: str) -> 'ClassesGroup':
+        """
+        Load the parent class of all classes at once.
+
+        Parents not found among the classes of the group are fetched once per distinct parent.
+
+        :param relations: Names of the relations to load. Only ``class_parent`` is available. Default is all.
+        :return: The group itself.
+        """
+        for relation in relations:
+            if relation != 'class_parent':
+                raise ValueError(f"Unknown relation {relation}. Use: class_parent")
+
+        fetched = {}
+        for cls in self._classes:
+            if cls._parent is not _NOT_LOADED:
+                continue
+            parent = self._class_by_id(cls.class_parent_id)
+            if parent is None:
+                if cls.class_parent_id not in fetched:
+                    try:
+                        fetched[cls.class_parent_id] = cls._load_parent()
+                    except Exception:
+                        # Not stored, so the parent is fetched again on the next access.
+                        fetched[cls.class_parent_id] = _NOT_LOADED
+                parent = fetched[cls.class_parent_id]
+            cls._parent = parent
+
+        return self
+
+    def __sizeof__(self) -> int:
+        """Return the approximate size in bytes of the group, including its classes and indexes."""
+        hierarchy = vars(self._hierarchy) if self._hierarchy is not None else None
+        return super().__sizeof__() + approximate_size((self._classes, self._classes_by_id, hierarchy))
+
     def _repr_html_(self) -> str:
         """Render HTML representation."""
         return Utils.render_html('mapping.html', mappings=self)
@@ -57,15 +162,29 @@ class ClassesGroup(dict):
 class ClassificationSystemClass(dict):
     """Class representing a classification system."""
 
-    def __init__(self, data: dict, validate: bool = False) -> None:
+    def __init__(
+        self,
+        data: dict,
+        validate: bool = False,
+        client: Optional[httpx.Client] = None,
+        group: Optional[ClassesGroup] = None,
+    ) -> None:
         """
         Initialize instance with dictionary data.
 
         :param data: Dictionary containing class metadata.
         :param validate: Whether to validate the data using jsonschema. Default is False.
+        :param client: (Optional) The HTTP client shared with the LCCS service.
+        :param group: (Optional) The group of classes of the same classification system,
+            used to resolve the parent class without requests.
         """
         super().__init__(data or {})
+        if validate and group is None:
+            Utils.validate(self, 'class')
         self._validate = validate
+        self._client = client
+        self._group = group
+        self._parent = _NOT_LOADED
 
     @property
     def id(self) -> str:
@@ -107,6 +226,19 @@ class ClassificationSystemClass(dict):
         """Return the parent class ID."""
         return self.get('class_parent_id')
 
+    @property
+    def class_parent(self) -> Optional['ClassificationSystemClass']:
+        """Return the parent class, loading it on first access.
+
+        The parent is taken from the group of the class when it is there, otherwise it is fetched.
+        """
+        if self._parent is _NOT_LOADED:
+            try:
+                self._parent = self._load_parent()
+            except Exception:
+                return None
+        return self._parent
+
     @property
     def class_parent_name(self) -> Optional[str]:
         """Return the parent class name."""
@@ -114,20 +246,116 @@ class ClassificationSystemClass(dict):
 
     def _get_parent_name(self) -> Optional[str]:
         """Resolve and return the parent class name, if available."""
+        parent = self.class_parent
+        return parent.name if parent is not None else None
+
+    def _parent_url(self) -> Optional[str]:
+        """Return the URL of the parent class, if available."""
         if self.class_parent_id:
             parent_link = next((link for link in self.links if link.get('rel') == 'parent'), None)
             if parent_link:
-                try:
-                    parent_url = self._build_parent_url(parent_link['href'])
-                    parent_data = Utils._get(parent_url)
-                    return ClassificationSystemClass(parent_data).name
-                except Exception as e:
-                    return None
+                return self._build_parent_url(parent_link['href'])
         return None
 
+    def _sibling_parent(self) -> Optional['ClassificationSystemClass']:
+        """Return the parent class from the group of the class, if it is there."""
+        if self._group is None or not self.class_parent_id:
+            return None
+        return self._group._class_by_id(self.class_parent_id)
+
+    def _load_parent(self) -> Optional['ClassificationSystemClass']:
+        """Return the parent class from the group of the class or fetch it, if available."""
+        parent = self._sibling_parent()
+        if parent is not None:
+            return parent
+        parent_url = self._parent_url()
+        if parent_url is None:
+            return None
+        parent_data = Utils._get(parent_url, client=self._client)
+        return ClassificationSystemClass(parent_data, self._validate, self._client)
+
     def _build_parent_url(self, href: str) -> str:
         """Build the full URL for the parent class."""
         system = href.rsplit('/', maxsplit=1)[1].split('?')[0]
         token = href.split('?')[-1] if '?' in href else ""
         base_url = href.rsplit('/', maxsplit=1)[0]
         return f"{base_url}/{system}/classes/{self['class_parent_id']}?{token}" if token else f"{base_url}/{system}/classes/{self['class_parent_id']}"
+
+
+class AsyncClassificationSystemClass(ClassificationSystemClass):
+    """Class of a classification system bound to an asynchronous HTTP client.
+
+    Reading :attr:`class_parent` or :attr:`class_parent_name` only resolves
+    the parent from the group of the class; to fetch a parent that is not
+    there, await :meth:`load_parent` first.
+    """
+
+    @property
+    def class_parent(self) -> Optional[ClassificationSystemClass]:
+        """Return the parent class from the group of the class or loaded by :meth:`load_parent`."""
+        if self._parent is _NOT_LOADED:
+            parent = self._sibling_parent()
+            if parent is not None:
+                self._parent = parent
+            return parent
+        return self._parent
+
+    async def load_parent(self) -> Optional[ClassificationSystemClass]:
+        """Fetch, store and return the parent class, if available."""
+        if self._parent is _NOT_LOADED:
+            parent = self._sibling_parent()
+            parent_url = self._parent_url() if parent is None else None
+            if parent_url is not None:
+                parent_data = await Utils._aget(parent_url, client=self._client)
+                parent = AsyncClassificationSystemClass(parent_data, self._validate, self._client)
+            self._parent = parent
+        return self._parent
+
+    async def load_parent_name(self) -> Optional[str]:
+        """Fetch, store and return the parent class name, if available."""
+        try:
+            parent = await self.load_parent()
+        except Exception:
+            return None
+        return parent.name if parent is not None else None
+
+
+class AsyncClassesGroup(ClassesGroup):
+    """Group of classification system classes bound to an asynchronous HTTP client."""
+
+    def _create_class(self, data: dict) -> AsyncClassificationSystemClass:
+        """Create the class object of an item of the group."""
+        return AsyncClassificationSystemClass(data, self._validate, self._client, group=self)
+
+    async def prefetch_related(self, *relations: str) -> 'AsyncClassesGroup':
+        """
+        Load the parent class of all classes at once. See :meth:`ClassesGroup.prefetch_related`.
+
+        :param relations: Names of the relations to load. Only ``class_parent`` is available. Default is all.
+        :return: The group itself.
+        """
+        for relation in relations:
+            if relation != 'class_parent':
+                raise ValueError(f"Unknown relation {relation}. Use: class_parent")
+
+        missing = {}
+        for cls in self._classes:
+            if cls._parent is not _NOT_LOADED:
+                continue
+            parent = self._class_by_id(cls.class_parent_id)
+            if parent is not None:
+                cls._parent = parent
+            else:
+                missing.setdefault(cls.class_parent_id, []).append(cls)
+
+        parents = await asyncio.gather(
+            *(classes[0].load_parent() for classes in missing.values()), return_exceptions=True
+        )
+        for classes, parent in zip(missing.values(), parents):
+            if isinstance(parent, BaseException):
+                # Not stored, so the parent is fetched again by the next load_parent.
+                continue
+            for cls in classes:
+                cls._parent = parent
+
+        return self
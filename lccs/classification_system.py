@@ -16,9 +16,13 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
 #
 """Python Client Library for the LCCS Web Service."""
-from typing import Any, List, Optional, Union
+from typing import List, Optional, Union
 
-from .classes import ClassesGroup, ClassificationSystemClass
+import httpx
+
+from .cache import ResultCache
+from .classes import (AsyncClassesGroup, AsyncClassificationSystemClass,
+                      ClassesGroup, ClassificationSystemClass)
 from .link import Link
 from .utils import Utils
 
@@ -26,15 +30,26 @@ from .utils import Utils
 class ClassificationSystem(dict):
     """Representation of a Classification System."""
 
-    def __init__(self, data: dict, validate: bool = False) -> None:
+    def __init__(self, data: dict, validate: bool = False, client: Optional[httpx.Client] = None,
+                 compact: bool = False, results: Optional[ResultCache] = None) -> None:
         """
         Initialize a classification system with metadata.
 
         :param data: Dictionary containing classification system metadata.
         :param validate: Whether to validate the data using jsonschema. Default is False.
+            The classes retrieved are validated too.
+        :param client: (Optional) The HTTP client shared with the LCCS service.
+        :param compact: Whether the classes are kept in a :class:`lccs.compact.CompactClassesGroup`. Default is False.
+        :param results: (Optional) The cache of the LCCS service, where the classes are kept.
+            Default is a cache of the classification system.
         """
         super().__init__(data or {})
+        if validate:
+            Utils.validate(self, "classification_systems")
         self._validate = validate
+        self._client = client
+        self._compact = compact
+        self._results = results if results is not None else ResultCache()
 
     @property
     def id(self) -> int:
@@ -80,37 +95,71 @@ class ClassificationSystem(dict):
         self,
         class_name_or_id: Optional[str] = None,
         style_format_name_or_id: Optional[str] = None
-    ) -> Union[ClassesGroup, ClassificationSystemClass]:
+    ) -> Union[List[ClassificationSystemClass], ClassificationSystemClass]:
         """
         Return the classes of the classification system.
 
         :param class_name_or_id: Name or ID of a specific class. Default is None.
         :param style_format_name_or_id: Style format ID for filtering classes. Default is None.
-        :return: A group of classes or a specific classification system class.
+        :return: A list of classes or a specific classification system class.
         """
-        try:
-            classes_url = next(
-                link['href'] for link in self.get('links', []) if link.get('rel') == 'classes'
-            )
+        if class_name_or_id:
+            params = self._classes_params(style_format_name_or_id)
+            specific_class_url = f"{self._classes_url()}/{class_name_or_id}"
+            try:
+                specific_class_data = Utils._get(specific_class_url, params=params, client=self._client)
+            except Exception as e:
+                raise RuntimeError(f"An error occurred while retrieving classes: {e}")
+            return ClassificationSystemClass(specific_class_data, self._validate, self._client)
+
+        return self.classes_group(style_format_name_or_id).classes
+
+    def classes_group(self, style_format_name_or_id: Optional[str] = None) -> ClassesGroup:
+        """
+        Return the classes of the classification system as a group.
+
+        The classes are retrieved once per style format and kept in the cache of the service,
+        under ``('classes', system id, style format, classes URL)``. Threads asking the
+        classes at once wait for a single request.
+
+        :param style_format_name_or_id: Style format ID for filtering classes. Default is None.
+        :return: A group of classes.
+        """
+        classes_url = self._classes_url()
 
-            params = {}
-            if style_format_name_or_id:
-                params["style_format_id"] = style_format_name_or_id
+        def fetch() -> ClassesGroup:
+            params = self._classes_params(style_format_name_or_id)
 
-            classes_data = Utils._get(classes_url, params=params)
+            try:
+                classes_data = Utils._get(classes_url, params=params, client=self._client)
+            except Exception as e:
+                raise RuntimeError(f"An error occurred while retrieving classes: {e}")
 
-            if class_name_or_id:
-                specific_class_url = f"{classes_url}/{class_name_or_id}"
-                specific_class_data = Utils._get(specific_class_url, params=params)
-                return ClassificationSystemClass(specific_class_data, self._validate)
+            if self._compact:
+                from .compact import CompactClassesGroup
+                group_type = CompactClassesGroup
+            else:
+                group_type = ClassesGroup
+            return group_type({"classes": classes_data}, self._validate, self._client)
 
-            all_classes = ClassesGroup({"classes": classes_data})
-            return all_classes.classes
+        return self._results.get_or_set(("classes", self.id, style_format_name_or_id, classes_url), fetch)
 
+    def _classes_url(self) -> str:
+        """Return the URL of the classes of the classification system."""
+        try:
+            return next(
+                link['href'] for link in self.get('links', []) if link.get('rel') == 'classes'
+            )
         except StopIteration:
             raise ValueError("No 'classes' link found in the classification system.")
-        except Exception as e:
-            raise RuntimeError(f"An error occurred while retrieving classes: {e}")
+
+    @staticmethod
+    def _classes_params(style_format_name_or_id: Optional[str] = None) -> dict:
+        """Return the query parameters used to retrieve classes."""
+        params = {}
+        if style_format_name_or_id:
+            params["style_format_id"] = style_format_name_or_id
+        return params
 
     def _repr_html_(self) -> str:
         """Render an HTML representation of the classification system."""
@@ -123,3 +172,55 @@ class ClassificationSystem(dict):
     def __str__(self) -> str:
         """Return a human-readable string representation of the classification system."""
         return f'<Classification System [{self.id}:{self.name}-{self.version} - Title: {self.title}]>'
+
+
+class AsyncClassificationSystem(ClassificationSystem):
+    """Representation of a Classification System bound to an asynchronous HTTP client."""
+
+    async def classes(
+        self,
+        class_name_or_id: Optional[str] = None,
+        style_format_name_or_id: Optional[str] = None
+    ) -> Union[List[AsyncClassificationSystemClass], AsyncClassificationSystemClass]:
+        """
+        Return the classes of the classification system.
+
+        :param class_name_or_id: Name or ID of a specific class. Default is None.
+        :param style_format_name_or_id: Style format ID for filtering classes. Default is None.
+        :return: A list of classes or a specific classification system class.
+        """
+        if class_name_or_id:
+            params = self._classes_params(style_format_name_or_id)
+            specific_class_url = f"{self._classes_url()}/{class_name_or_id}"
+            try:
+                specific_class_data = await Utils._aget(specific_class_url, params=params, client=self._client)
+            except Exception as e:
+                raise RuntimeError(f"An error occurred while retrieving classes: {e}")
+            return AsyncClassificationSystemClass(specific_class_data, self._validate, self._client)
+
+        return (await self.classes_group(style_format_name_or_id)).classes
+
+    async def classes_group(self, style_format_name_or_id: Optional[str] = None) -> AsyncClassesGroup:
+        """
+        Return the classes of the classification system as a group.
+
+        The classes are retrieved once per style format and kept in the cache of the service,
+        like :meth:`ClassificationSystem.classes_group`. Tasks asking the classes at once wait
+        for a single request.
+
+        :param style_format_name_or_id: Style format ID for filtering classes. Default is None.
+        :return: A group of classes.
+        """
+        classes_url = self._classes_url()
+
+        async def fetch() -> AsyncClassesGroup:
+            params = self._classes_params(style_format_name_or_id)
+
+            try:
+                classes_data = await Utils._aget(classes_url, params=params, client=self._client)
+            except Exception as e:
+                raise RuntimeError(f"An error occurred while retrieving classes: {e}")
+
+            return AsyncClassesGroup({"classes": classes_data}, self._validate, self._client)
+
+        return await self._results.aget_or_set(("classes", self.id, style_format_name_or_id, classes_url), fetch)
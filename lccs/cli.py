@@ -21,6 +21,7 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
+from .batch import DEFAULT_BATCH_SIZE
 from .lccs import LCCS
 
 
@@ -48,12 +49,19 @@ console = Console()
     "--access-token", default=None, help="Personal Access Token of the BDC KeyCloak"
 )
 @click.option("--language", default="pt-br", help="The language of the response.")
+@click.option(
+    "--cache",
+    default=None,
+    envvar="LCCS_CACHE",
+    type=click.Path(dir_okay=False),
+    help="File of a persistent response cache, revalidated with the server.",
+)
 @click.version_option()
 @pass_config
-def cli(config, url, access_token=None, language=None):
+def cli(config, url, access_token=None, language=None, cache=None):
     """LCCS-WS Client on command line."""
     config.url = url
-    config.service = LCCS(url=url, access_token=access_token, language=language)
+    config.service = LCCS(url=url, access_token=access_token, language=language, cache=cache)
 
 
 @cli.command()
@@ -342,6 +350,58 @@ def style_file(config: Config, system, style_format, output, verbose):
         click.secho(f"Style file save", bold=True, fg="green")
 
 
+@cli.command()
+@click.option(
+    "--system",
+    type=click.STRING,
+    multiple=True,
+    help="The classification system (Identifier by name-version or ID). Default is all systems.",
+)
+@click.option(
+    "--format",
+    "style_format",
+    type=click.STRING,
+    multiple=True,
+    help="The style format name or id. Default is all formats.",
+)
+@click.option(
+    "-o",
+    "--output",
+    help="Output directory, or a .zip, .tar or .tar.gz archive",
+    type=click.Path(dir_okay=True),
+    required=True,
+)
+@click.option("-v", "--verbose", is_flag=True, default=False)
+@pass_config
+def download_styles(config: Config, system, style_format, output, verbose):
+    """Save the styles of the classification systems in a directory or an archive."""
+    if verbose:
+        click.secho(f"Server: {config.url}", bold=True, fg="black")
+        click.secho(
+            "\tRetrieving the styles... ",
+            bold=False,
+            fg="black",
+        )
+
+    report = config.service.download_styles(
+        systems=system or None, formats=style_format or None, dest=output
+    )
+
+    if verbose:
+        for file in report.files:
+            click.secho(f"- {file}", bold=False, fg="green")
+        for file in report.skipped:
+            click.secho(f"- {file} (unchanged)", bold=False, fg="black")
+    for (system_name, format_name), error in report.errors.items():
+        click.secho(f"{system_name} {format_name or ''}: {error}", bold=False, fg="red")
+
+    click.secho(
+        f"{len(report.files)} style files saved in {output}, {len(report.skipped)} unchanged",
+        bold=True,
+        fg="green",
+    )
+
+
 @cli.command()
 @click.option(
     "--system_source",
@@ -506,17 +566,35 @@ def delete_classification_system(config: Config, system, verbose):
     required=True,
     help="Json file with classes",
 )
+@click.option(
+    "--chunk_size",
+    type=click.INT,
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Maximum number of classes per request.",
+)
 @click.option("-v", "--verbose", is_flag=True, default=False)
 @pass_config
-def add_classes(config: Config, system, classes_path, verbose):
+def add_classes(config: Config, system, classes_path, chunk_size, verbose):
     """Add a new class into classification systems."""
     if verbose:
         click.secho(f"Server: {config.url}", bold=True, fg="black")
-        click.secho("\tAdding new mapping ... ", bold=False, fg="black")
+        click.secho("\tAdding new classes ... ", bold=False, fg="black")
+
+    def progress(done, total):
+        click.secho(f"\t{done}/{total} classes", bold=False, fg="black")
+
+    report = config.service.add_classes(
+        system=system, classes=classes_path, chunk_size=chunk_size, progress=progress if verbose else None
+    )
+
+    for names, error in report.errors.items():
+        click.secho(f"Could not insert {len(names)} classes ({names[0]}...): {error}", bold=False, fg="red")
 
-    config.service.add_classes(system=system, classes=classes_path)
+    click.secho(f"Added {report.created} classes for {system} in {report.chunks} requests", bold=True, fg="green")
 
-    click.secho(f"Added classes for {system}", bold=True, fg="green")
+    if report.errors:
+        raise click.ClickException(f"{sum(len(names) for names in report.errors)} classes were not added.")
 
     if verbose:
         click.secho("\tFinished!", bold=False, fg="black")
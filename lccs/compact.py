@@ -0,0 +1,602 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import httpx
+
+from .cache import GrowingResult, approximate_size
+from .classes import ClassesGroup, ClassificationSystemClass
+from .mappings import RELATIONS, ClassesIndex, Mapping, MappingGroup
+from .utils import Utils
+
+_MISSING = object()
+"""Marker of a key absent from an item."""
+
+
+def _intern(value: Any) -> Any:
+    """Return the interned copy of a string, so repeated values share one object."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class CompactLink:
+    """Link object stored in slots, with interned strings.
+
+    It provides the properties of :class:`lccs.link.Link` and the ``get`` and
+    ``[]`` access of its dictionary.
+    """
+
+    __slots__ = ('rel', 'href', 'type', 'title')
+
+    def __init__(self, rel: Optional[str] = None, href: Optional[str] = None, type: Optional[str] = None,
+                 title: Optional[str] = None) -> None:
+        """Create a link."""
+        self.rel = _intern(rel)
+        self.href = _intern(href)
+        self.type = _intern(type)
+        self.title = _intern(title)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CompactLink':
+        """Create a link from its dictionary."""
+        return cls(data.get('rel'), data.get('href'), data.get('type'), data.get('title'))
+
+    def _key(self) -> Tuple[Optional[str], ...]:
+        """Return the values of the link."""
+        return self.rel, self.href, self.type, self.title
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a value of the link, or ``default``."""
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a value of the link."""
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self) -> dict:
+        """Return the link as a dictionary."""
+        return {key: value for key, value in zip(self.__slots__, self._key()) if value is not None}
+
+    def __eq__(self, other) -> bool:
+        """Return True if the other link has the same values."""
+        return isinstance(other, CompactLink) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        """Return the hash of the values of the link."""
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        """Return the string representation of the link."""
+        return repr(self.to_dict())
+
+
+class _Columns:
+    """Columnar store of the items of a group: one list per field, plus links and other keys.
+
+    Strings are interned and identical links are stored once.
+    """
+
+    __slots__ = ('values', 'links', 'extra')
+
+    def __init__(self, fields: Tuple[str, ...], items: Iterable[dict]) -> None:
+        """Store the items."""
+        self.values: Dict[str, list] = {field: [] for field in fields}
+        self.links: List[Tuple[CompactLink, ...]] = []
+        self.extra: Dict[int, dict] = {}
+        table: Dict[Tuple, CompactLink] = {}
+
+        for row, item in enumerate(items):
+            for field, column in self.values.items():
+                column.append(_intern(item.get(field, _MISSING)))
+            links = []
+            for link in item.get('links') or ():
+                key = (link.get('rel'), link.get('href'), link.get('type'), link.get('title'))
+                if key not in table:
+                    table[key] = CompactLink(*key)
+                links.append(table[key])
+            self.links.append(tuple(links))
+            other = {key: value for key, value in item.items() if key not in self.values and key != 'links'}
+            if other:
+                self.extra[row] = other
+
+    def get(self, row: int, key: str, default: Any = None) -> Any:
+        """Return a value of an item, or ``default``."""
+        column = self.values.get(key)
+        if column is not None:
+            value = column[row]
+        elif key == 'links':
+            return list(self.links[row])
+        else:
+            value = self.extra.get(row, {}).get(key, _MISSING)
+        return default if value is _MISSING else value
+
+    def column(self, field: str) -> list:
+        """Return the values of a field, None when missing."""
+        return [None if value is _MISSING else value for value in self.values[field]]
+
+    def to_dict(self, row: int) -> dict:
+        """Return an item as a dictionary."""
+        item = {field: column[row] for field, column in self.values.items() if column[row] is not _MISSING}
+        item['links'] = [link.to_dict() for link in self.links[row]]
+        item.update(self.extra.get(row, {}))
+        return item
+
+    def __len__(self) -> int:
+        """Return the number of items."""
+        return len(self.links)
+
+    def __sizeof__(self) -> int:
+        """Return the approximate size in bytes of the columns, shared strings counted once."""
+        seen, size = set(), object.__sizeof__(self)
+        columns = list(self.values.values()) + [self.links, list(self.extra.values())]
+        for column in columns:
+            size += sys.getsizeof(column)
+            for value in column:
+                values = value if isinstance(value, tuple) else (value,)
+                for item in values:
+                    if id(item) not in seen:
+                        seen.add(id(item))
+                        size += sys.getsizeof(item)
+        return size
+
+
+class _Row:
+    """View of an item of a compact group, with the dictionary read access of the models."""
+
+    __slots__ = ('_group', '_row')
+
+    def __init__(self, group, row: int) -> None:
+        """Create the view of the item ``row`` of ``group``."""
+        self._group = group
+        self._row = row
+
+    @property
+    def _client(self) -> Optional[httpx.Client]:
+        """Return the HTTP client of the group."""
+        return self._group._client
+
+    @property
+    def _validate(self) -> bool:
+        """Return whether the data of the group is validated."""
+        return self._group._validate
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a value of the item, or ``default``."""
+        return self._group._columns.get(self._row, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a value of the item."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if the item has a value for ``key``."""
+        return self.get(key, _MISSING) is not _MISSING
+
+    def to_dict(self) -> dict:
+        """Return the item as a dictionary, as sent by the service."""
+        return self._group._columns.to_dict(self._row)
+
+    def __eq__(self, other) -> bool:
+        """Return True if the other view is of the same item."""
+        return type(other) is type(self) and other._group is self._group and other._row == self._row
+
+    def __hash__(self) -> int:
+        """Return the hash of the item."""
+        return hash((id(self._group), self._row))
+
+
+class CompactClass(_Row):
+    """Class of a :class:`CompactClassesGroup`, with the properties of :class:`lccs.classes.ClassificationSystemClass`."""
+
+    __slots__ = ()
+
+    @property
+    def id(self) -> Any:
+        """Return the class ID."""
+        return self.get('id')
+
+    @property
+    def name(self) -> str:
+        """Return the class name."""
+        return self.get('name')
+
+    @property
+    def title(self) -> str:
+        """Return the class title."""
+        return self.get('title')
+
+    @property
+    def description(self) -> Optional[str]:
+        """Return the class description."""
+        return self.get('description')
+
+    @property
+    def color(self) -> Optional[str]:
+        """Return the class color."""
+        return self.get('color')
+
+    @property
+    def code(self) -> str:
+        """Return the class code."""
+        return self.get('code')
+
+    @property
+    def links(self) -> List[CompactLink]:
+        """Return the class links."""
+        return self.get('links', [])
+
+    @property
+    def class_parent_id(self) -> Optional[Any]:
+        """Return the parent class ID."""
+        return self.get('class_parent_id')
+
+    @property
+    def class_parent(self) -> Union['CompactClass', ClassificationSystemClass, None]:
+        """Return the parent class from the group, or fetch it once for the group."""
+        return self._group._parent(self)
+
+    @property
+    def class_parent_name(self) -> Optional[str]:
+        """Return the parent class name."""
+        parent = self.class_parent
+        return parent.name if parent is not None else None
+
+    _parent_url = ClassificationSystemClass._parent_url
+    _build_parent_url = ClassificationSystemClass._build_parent_url
+
+    def __repr__(self) -> str:
+        """Return the string representation of the class."""
+        return repr(self.to_dict())
+
+
+class CompactClassesGroup(GrowingResult):
+    """Group of classification system classes stored in columns.
+
+    The classes are kept in one list per field, with interned strings and
+    shared links, instead of one dictionary per class. The classes are
+    :class:`CompactClass` views created on access. The group provides the
+    API of :class:`lccs.classes.ClassesGroup`.
+
+    :param data: Dictionary containing the ``classes`` of the group. It is not kept.
+    :param validate: Whether to validate the data using jsonschema. Default is False.
+    :param client: (Optional) The HTTP client shared with the LCCS service.
+    """
+
+    FIELDS = ('id', 'name', 'title', 'description', 'color', 'code', 'class_parent_id')
+    """Fields of the classes stored in columns."""
+
+    __slots__ = ('_columns', '_validate', '_client', '_by_id', '_parents', '_hierarchy', '_on_grow', '__weakref__')
+
+    def __init__(self, data: dict, validate: bool = False, client: Optional[httpx.Client] = None) -> None:
+        """Store the classes of the group in columns."""
+        items = (data or {}).get('classes', [])
+        if validate:
+            Utils.validate(items, 'class', many=True)
+        self._columns = _Columns(self.FIELDS, items)
+        self._validate = validate
+        self._client = client
+        self._by_id: Optional[Dict[Any, int]] = None
+        self._parents: Dict[Any, Optional[ClassificationSystemClass]] = {}
+        self._hierarchy = None
+
+    @property
+    def classes(self) -> List[CompactClass]:
+        """Return the list of classification system classes."""
+        return [CompactClass(self, row) for row in range(len(self._columns))]
+
+    def _class_by_id(self, class_id) -> Optional[CompactClass]:
+        """Return the class of the group with the given id, indexing the classes on first use."""
+        if self._by_id is None:
+            self._by_id = {class_id: row for row, class_id in enumerate(self._columns.values['id'])}
+            self._grown()
+        row = self._by_id.get(class_id)
+        return CompactClass(self, row) if row is not None else None
+
+    def index(self) -> '_ClassIndex':
+        """Return the classes of the group indexed by class id, without creating them."""
+        return _ClassIndex(self)
+
+    def _parent(self, cls: CompactClass) -> Union[CompactClass, ClassificationSystemClass, None]:
+        """Return the parent of a class from the group, or fetch it once."""
+        parent_id = cls.class_parent_id
+        if not parent_id:
+            return None
+        parent = self._class_by_id(parent_id)
+        if parent is None:
+            if parent_id not in self._parents:
+                try:
+                    url = cls._parent_url()
+                    self._parents[parent_id] = (
+                        ClassificationSystemClass(Utils._get(url, client=self._client), self._validate, self._client)
+                        if url is not None else None
+                    )
+                except Exception:
+                    return None
+            parent = self._parents[parent_id]
+        return parent
+
+    def hierarchy(self) -> 'ClassHierarchy':
+        """Return the hierarchy of the classes of the group, built on first use."""
+        if self._hierarchy is None:
+            from .hierarchy import ClassHierarchy
+            self._hierarchy = ClassHierarchy(self.classes)
+            self._grown()
+        return self._hierarchy
+
+    def prefetch_related(self, *relations: str) -> 'CompactClassesGroup':
+        """
+        Load the parent class of all classes at once.
+
+        :param relations: Names of the relations to load. Only ``class_parent`` is available. Default is all.
+        :return: The group itself.
+        """
+        for relation in relations:
+            if relation != 'class_parent':
+                raise ValueError(f"Unknown relation {relation}. Use: class_parent")
+        for cls in self:
+            self._parent(cls)
+        return self
+
+    def _export_columns(self) -> Dict[str, list]:
+        """Return the exported columns of the classes, read from the columns of the group."""
+        from .export import CLASS_COLUMNS
+        return {name: self._columns.column(name) for name in CLASS_COLUMNS}
+
+    to_numpy = ClassesGroup.to_numpy
+    to_pandas = ClassesGroup.to_pandas
+    to_arrow = ClassesGroup.to_arrow
+
+    def to_dict(self) -> dict:
+        """Return the group as a dictionary, as sent by the service."""
+        return {'classes': [self._columns.to_dict(row) for row in range(len(self._columns))]}
+
+    def __getitem__(self, row: int) -> CompactClass:
+        """Return the class at position ``row``."""
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return CompactClass(self, row % len(self))
+
+    def __iter__(self) -> Iterator[CompactClass]:
+        """Iterate over the classes."""
+        return iter(self.classes)
+
+    def __len__(self) -> int:
+        """Return the number of classes."""
+        return len(self._columns)
+
+    def __sizeof__(self) -> int:
+        """Return the approximate size in bytes of the group, including its indexes."""
+        hierarchy = vars(self._hierarchy) if self._hierarchy is not None else None
+        return (object.__sizeof__(self) + self._columns.__sizeof__()
+                + approximate_size((self._by_id, self._parents, hierarchy)))
+
+    def __repr__(self) -> str:
+        """Return the string representation of the group."""
+        return "\n".join(str(cls) for cls in self)
+
+    def __str__(self) -> str:
+        """Return the string representation of the group (readable)."""
+        return self.__repr__()
+
+
+class _ClassIndex:
+    """Classes of a :class:`CompactClassesGroup` by class id, created on lookup."""
+
+    __slots__ = ('_group',)
+
+    def __init__(self, group: CompactClassesGroup) -> None:
+        """Create the index of a group."""
+        self._group = group
+
+    def get(self, class_id, default=None) -> Optional[CompactClass]:
+        """Return the class with the given id, or ``default``."""
+        cls = self._group._class_by_id(class_id)
+        return default if cls is None else cls
+
+    def __getitem__(self, class_id) -> CompactClass:
+        """Return the class with the given id."""
+        cls = self._group._class_by_id(class_id)
+        if cls is None:
+            raise KeyError(class_id)
+        return cls
+
+    def __contains__(self, class_id) -> bool:
+        """Return True if a class has the given id."""
+        return self._group._class_by_id(class_id) is not None
+
+    def __len__(self) -> int:
+        """Return the number of classes."""
+        return len(self._group)
+
+
+class CompactMapping(_Row):
+    """Mapping of a :class:`CompactMappingGroup`, with the properties of :class:`lccs.mappings.Mapping`."""
+
+    __slots__ = ()
+
+    @property
+    def degree_of_similarity(self) -> Optional[float]:
+        """Return the degree of similarity."""
+        return self.get('degree_of_similarity')
+
+    @property
+    def description(self) -> Optional[str]:
+        """Return the description of the mapping."""
+        return self.get('description')
+
+    @property
+    def link(self) -> List[CompactLink]:
+        """Return the links associated with the mapping."""
+        return self.get('links', [])
+
+    @property
+    def source_class_id(self) -> Optional[int]:
+        """Return the ID of the source class."""
+        return self.get('source_class_id')
+
+    @property
+    def target_class_id(self) -> Optional[int]:
+        """Return the ID of the target class."""
+        return self.get('target_class_id')
+
+    @property
+    def source_class(self):
+        """Return the source class."""
+        return self._get_related('source_class')
+
+    @property
+    def target_class(self):
+        """Return the target class."""
+        return self._get_related('target_class')
+
+    def _get_related(self, relation: str):
+        """Return a related class, loading it on first access."""
+        return self._group._related_class(self, relation)
+
+    _related_href = Mapping._related_href
+    _fetch_related = Mapping._fetch_related
+    __repr__ = Mapping.__repr__
+    __str__ = Mapping.__str__
+
+
+class CompactMappingGroup(GrowingResult):
+    """Group of class mappings stored in columns.
+
+    The mappings are kept in one list per field and are :class:`CompactMapping`
+    views created on access. The group provides the API of
+    :class:`lccs.mappings.MappingGroup`, including the lookup tables.
+
+    :param data: Dictionary containing the ``mappings`` of the group. It is not kept.
+    :param validate: Whether to validate the data using jsonschema. Default is False.
+    :param client: (Optional) The HTTP client shared with the LCCS service.
+    :param source_classes: (Optional) Source classes indexed by class id, or a function returning them.
+    :param target_classes: (Optional) Target classes indexed by class id, or a function returning them.
+    """
+
+    FIELDS = ('source_class_id', 'target_class_id', 'degree_of_similarity', 'description')
+    """Fields of the mappings stored in columns."""
+
+    __slots__ = ('_columns', '_validate', '_client', '_indexes', '_related', '_luts', '_on_grow', '__weakref__')
+
+    def __init__(
+        self,
+        data: dict,
+        validate: bool = False,
+        client: Optional[httpx.Client] = None,
+        source_classes: Union[ClassesIndex, Callable[[], Optional[ClassesIndex]], None] = None,
+        target_classes: Union[ClassesIndex, Callable[[], Optional[ClassesIndex]], None] = None,
+    ) -> None:
+        """Store the mappings of the group in columns."""
+        items = (data or {}).get('mappings', [])
+        if validate:
+            Utils.validate(items, 'mapping', many=True)
+        self._columns = _Columns(self.FIELDS, items)
+        self._validate = validate
+        self._client = client
+        self._indexes = {'source_class': source_classes, 'target_class': target_classes}
+        self._related: Dict[Tuple[str, int], Any] = {}
+        self._luts = {}
+
+    @property
+    def mappings(self) -> List[CompactMapping]:
+        """Return the list of mappings."""
+        return [CompactMapping(self, row) for row in range(len(self._columns))]
+
+    def _related_class(self, mapping: CompactMapping, relation: str):
+        """Return a related class of a mapping from the class indexes, or fetch it once."""
+        key = (relation, mapping._row)
+        if key not in self._related:
+            related = self._index_lookup(relation, mapping.get(RELATIONS[relation][1]))
+            self._related[key] = related if related is not None else mapping._fetch_related(relation)
+        return self._related[key]
+
+    def prefetch_related(self, *relations: str) -> 'CompactMappingGroup':
+        """
+        Load the related classes of all mappings at once. See :meth:`lccs.mappings.MappingGroup.prefetch_related`.
+
+        :param relations: Names of the relations to load, ``source_class`` and/or ``target_class``.
+            Default is both.
+        :return: The mapping group itself.
+        """
+        for relation in relations or tuple(RELATIONS):
+            if relation not in RELATIONS:
+                raise ValueError(f"Unknown relation {relation}. Use: {', '.join(RELATIONS)}")
+
+            fetched = {}
+            for mapping in self.mappings:
+                key = (relation, mapping._row)
+                if key in self._related:
+                    continue
+                related = self._index_lookup(relation, mapping.get(RELATIONS[relation][1]))
+                if related is None:
+                    href = mapping._related_href(relation)
+                    if href not in fetched:
+                        fetched[href] = mapping._fetch_related(relation)
+                    related = fetched[href]
+                self._related[key] = related
+
+        self._grown()
+        return self
+
+    _class_value = MappingGroup._class_value
+    to_lut = MappingGroup.to_lut
+    reclassify = MappingGroup.reclassify
+    reclassify_file = MappingGroup.reclassify_file
+    _index = MappingGroup._index
+    _index_lookup = MappingGroup._index_lookup
+
+    def _export_columns(self) -> Dict[str, list]:
+        """Return the exported columns of the mappings, read from the columns of the group."""
+        from .export import MAPPING_COLUMNS
+        return {name: self._columns.column(name) for name in MAPPING_COLUMNS}
+
+    to_numpy = MappingGroup.to_numpy
+    to_pandas = MappingGroup.to_pandas
+    to_arrow = MappingGroup.to_arrow
+
+    def to_dict(self) -> dict:
+        """Return the group as a dictionary, as sent by the service."""
+        return {'mappings': [self._columns.to_dict(row) for row in range(len(self._columns))]}
+
+    def __iter__(self) -> Iterator[CompactMapping]:
+        """Iterate over the mappings."""
+        return iter(self.mappings)
+
+    def __len__(self) -> int:
+        """Return the number of mappings."""
+        return len(self._columns)
+
+    def __sizeof__(self) -> int:
+        """Return the approximate size in bytes of the group and its lookup tables, without the class indexes."""
+        return object.__sizeof__(self) + self._columns.__sizeof__() + approximate_size((self._related, self._luts))
+
+    def __repr__(self) -> str:
+        """Return a string representation of the mapping group."""
+        return "\n\t".join(map(str, self.mappings))
+
+    def __str__(self) -> str:
+        """Return a human-readable string representation of the mapping group."""
+        return self.__repr__()
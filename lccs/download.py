@@ -0,0 +1,350 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import hashlib
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+import httpx
+
+from .utils import Utils
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+"""Default size in bytes of the chunks written while downloading."""
+
+PathLike = Union[str, os.PathLike]
+
+SPOOL_SIZE = 1 << 20
+"""Size in bytes above which a file fetched for an archive is buffered on disk."""
+
+ARCHIVE_FORMATS = {'.zip': 'zip', '.tar': 'tar', '.tar.gz': 'tar.gz', '.tgz': 'tar.gz'}
+"""Archive formats by file suffix."""
+
+
+def _parse_checksum(checksum: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Return the algorithm and digest of a checksum given as ``algorithm:digest`` or a SHA-256 digest."""
+    if checksum is None:
+        return None, None
+    algorithm, _, digest = checksum.rpartition(':')
+    algorithm = algorithm.lower() or 'sha256'
+    if algorithm not in hashlib.algorithms_available:
+        raise ValueError(f"Unknown checksum algorithm {algorithm}")
+    return algorithm, digest.lower()
+
+
+class _FileDownload:
+    """State of a download into a file, shared by the synchronous and asynchronous downloads.
+
+    The content is written in ``<file>.part`` and renamed to the file once complete
+    and verified. A partial file left by an interrupted download is resumed.
+    """
+
+    def __init__(self, dest: PathLike, file_name: Optional[str], size: Optional[int], checksum: Optional[str],
+                 resume: bool, skip_unchanged: bool = False) -> None:
+        dest = Path(dest)
+        if dest.is_dir():
+            self.directory, self.path = dest, dest / Path(file_name).name if file_name else None
+        else:
+            self.directory, self.path = dest.parent, dest
+        self.size = size
+        self.algorithm, self.digest = _parse_checksum(checksum)
+        self.offset = self.part.stat().st_size if resume and self.path and self.part.exists() else 0
+        self.conditional = skip_unchanged and self.path is not None and self.path.exists()
+        self.skipped = False
+        self.last_modified: Optional[float] = None
+        self.written = 0
+        self.expected: Optional[int] = None
+        self.hash = None
+        self.file: Optional[BinaryIO] = None
+
+    @property
+    def part(self) -> Path:
+        """Return the path of the partial file."""
+        return self.path.with_name(self.path.name + '.part')
+
+    def headers(self) -> dict:
+        """Return the headers of the request, asking only the missing content of a partial file.
+
+        When an existing file is kept unless changed, the request is conditional on its modification time.
+        """
+        headers = {'Range': f'bytes={self.offset}-'} if self.offset else {}
+        if self.conditional:
+            headers['If-Modified-Since'] = formatdate(self.path.stat().st_mtime, usegmt=True)
+        return headers
+
+    def start(self, response: httpx.Response) -> None:
+        """Open the partial file given the response headers."""
+        if self.path is None:
+            self.path = self.directory / Path(Utils._file_name(response)).name
+
+        if response.status_code != 206:
+            # The server sent the whole content.
+            self.offset = 0
+        self.hash = hashlib.new(self.algorithm) if self.algorithm else None
+        if self.offset and self.hash is not None:
+            with self.part.open('rb') as existing:
+                for chunk in iter(lambda: existing.read(DEFAULT_CHUNK_SIZE), b''):
+                    self.hash.update(chunk)
+
+        try:
+            self.last_modified = parsedate_to_datetime(response.headers['last-modified']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            self.last_modified = None
+
+        self.expected = self.size
+        if self.expected is None and 'content-encoding' not in response.headers:
+            content_range = response.headers.get('content-range', '')
+            if response.status_code == 206 and '/' in content_range and not content_range.endswith('*'):
+                self.expected = int(content_range.rsplit('/', 1)[1])
+            elif 'content-length' in response.headers:
+                self.expected = self.offset + int(response.headers['content-length'])
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = self.part.open('ab' if self.offset else 'wb')
+
+    def write(self, chunk: bytes) -> None:
+        """Write a chunk of content."""
+        self.file.write(chunk)
+        if self.hash is not None:
+            self.hash.update(chunk)
+        self.written += len(chunk)
+
+    def close(self) -> None:
+        """Close the partial file, which is kept to resume the download."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def discard(self) -> None:
+        """Remove the partial file."""
+        self.close()
+        if self.path is not None and self.part.exists():
+            self.part.unlink()
+        self.offset = 0
+
+    def finish(self) -> Path:
+        """Verify the partial file and move it to the file atomically."""
+        self.close()
+        size = self.offset + self.written
+        if self.expected is not None and size != self.expected:
+            self.discard()
+            raise ValueError(f"Downloaded {size} bytes of {self.path.name}, {self.expected} expected")
+        if self.hash is not None and self.hash.hexdigest() != self.digest:
+            self.discard()
+            raise ValueError(f"The {self.algorithm} checksum of {self.path.name} does not match")
+        if self.last_modified is not None:
+            # Later conditional requests compare the file with the server modification time.
+            os.utime(self.part, (time.time(), self.last_modified))
+        os.replace(self.part, self.path)
+        return self.path
+
+
+def download_file(
+    url: str,
+    dest: PathLike,
+    client: Optional[httpx.Client] = None,
+    file_name: Optional[str] = None,
+    size: Optional[int] = None,
+    checksum: Optional[str] = None,
+    resume: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_unchanged: bool = False,
+    **kwargs
+) -> Path:
+    """
+    Download a file in chunks, without keeping its content in memory.
+
+    The content is written in a ``.part`` file next to the destination, which is
+    renamed once the download is complete and verified. When a ``.part`` file of
+    an interrupted download exists, only the missing content is requested with a
+    ``Range`` header.
+
+    :param url: The URL of the file.
+    :param dest: The destination file, or a directory where the file is saved with the name sent by the server.
+    :param client: (Optional) The HTTP client used in the request.
+    :param file_name: (Optional) The file name used in a destination directory. Required to resume
+        downloads into a directory.
+    :param size: (Optional) The expected size in bytes. Default is the size announced by the server.
+    :param checksum: (Optional) The expected checksum, as ``algorithm:hexdigest`` or a SHA-256 hexdigest.
+    :param resume: Whether a partial download is resumed. Default is True.
+    :param chunk_size: Size in bytes of the written chunks. Default is :data:`DEFAULT_CHUNK_SIZE`.
+    :param skip_unchanged: Whether an existing destination file is kept when the server reports it was not
+        modified since. The modification time of downloaded files is set from ``Last-Modified``. Default is False.
+    :param kwargs: (Optional) Extra arguments for ``httpx.Client.stream``, such as ``params`` and ``headers``.
+    :return: The path of the downloaded file.
+    :raises ValueError: If the size or the checksum of the file does not match.
+    """
+    return _download_file(url, dest, client, file_name, size, checksum, resume, chunk_size, skip_unchanged,
+                          **kwargs).path
+
+
+def _download_file(url: str, dest: PathLike, client: Optional[httpx.Client], file_name: Optional[str],
+                   size: Optional[int], checksum: Optional[str], resume: bool, chunk_size: int,
+                   skip_unchanged: bool, **kwargs) -> _FileDownload:
+    """Download a file as :func:`download_file` does, returning the finished download.
+
+    Its ``skipped`` attribute tells whether the existing file was kept, as the server answered ``304``.
+    """
+    state = _FileDownload(dest, file_name, size, checksum, resume, skip_unchanged)
+    request_headers = kwargs.pop('headers', None) or {}
+    headers = {**request_headers, **state.headers()}
+    try:
+        with Utils._stream('GET', url, client=client, headers=headers, **kwargs) as response:
+            state.start(response)
+            try:
+                for chunk in response.iter_bytes(chunk_size):
+                    state.write(chunk)
+            finally:
+                state.close()
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 304 and state.conditional:
+            state.skipped = True
+            return state
+        if exc.response.status_code == 416 and state.offset:
+            # The partial file does not match the file anymore.
+            state.discard()
+            return _download_file(url, dest, client, file_name, size, checksum, False, chunk_size, skip_unchanged,
+                                  headers=request_headers, **kwargs)
+        raise
+    state.finish()
+    return state
+
+
+async def adownload_file(
+    url: str,
+    dest: PathLike,
+    client: Optional[httpx.AsyncClient] = None,
+    file_name: Optional[str] = None,
+    size: Optional[int] = None,
+    checksum: Optional[str] = None,
+    resume: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_unchanged: bool = False,
+    **kwargs
+) -> Path:
+    """
+    Download a file in chunks with an asynchronous client. See :func:`download_file`.
+
+    :return: The path of the downloaded file.
+    """
+    state = _FileDownload(dest, file_name, size, checksum, resume, skip_unchanged)
+    request_headers = kwargs.pop('headers', None) or {}
+    headers = {**request_headers, **state.headers()}
+    try:
+        async with Utils._astream('GET', url, client=client, headers=headers, **kwargs) as response:
+            state.start(response)
+            try:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    state.write(chunk)
+            finally:
+                state.close()
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 304 and state.conditional:
+            return state.path
+        if exc.response.status_code == 416 and state.offset:
+            state.discard()
+            return await adownload_file(url, dest, client, file_name, size, checksum, False, chunk_size,
+                                        skip_unchanged, headers=request_headers, **kwargs)
+        raise
+    return state.finish()
+
+
+def stream_file(
+    url: str,
+    fileobj: BinaryIO,
+    client: Optional[httpx.Client] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **kwargs
+) -> Tuple[Optional[str], int]:
+    """
+    Write the content of a file to a file-like object, chunk by chunk.
+
+    :param url: The URL of the file.
+    :param fileobj: A binary file-like object with a ``write`` method.
+    :param client: (Optional) The HTTP client used in the request.
+    :param chunk_size: Size in bytes of the written chunks. Default is :data:`DEFAULT_CHUNK_SIZE`.
+    :param kwargs: (Optional) Extra arguments for ``httpx.Client.stream``, such as ``params`` and ``headers``.
+    :return: The file name sent by the server, if any, and the number of bytes written.
+    """
+    written = 0
+    with Utils._stream('GET', url, client=client, **kwargs) as response:
+        try:
+            file_name = Utils._file_name(response)
+        except ValueError:
+            file_name = None
+        for chunk in response.iter_bytes(chunk_size):
+            fileobj.write(chunk)
+            written += len(chunk)
+    return file_name, written
+
+
+def archive_format(dest) -> Optional[str]:
+    """Return the archive format of a destination given its suffix, or None for a directory."""
+    name = str(dest).lower() if isinstance(dest, (str, os.PathLike)) else ''
+    return next((fmt for suffix, fmt in ARCHIVE_FORMATS.items() if name.endswith(suffix)), None)
+
+
+class ArchiveWriter:
+    """Write files into a zip or tar archive, given as a path or a writable binary stream.
+
+    :param dest: The archive file or a writable binary file-like object. Streams are written sequentially.
+    :param archive: The archive format, ``zip``, ``tar`` or ``tar.gz``. Default is the format of the ``dest`` suffix.
+    """
+
+    def __init__(self, dest, archive: Optional[str] = None) -> None:
+        """Open the archive for writing."""
+        archive = archive or archive_format(dest)
+        if archive not in ARCHIVE_FORMATS.values():
+            raise ValueError(f"Unknown archive format {archive}. Use: zip, tar, tar.gz")
+        self.archive = archive
+        is_path = isinstance(dest, (str, os.PathLike))
+        if archive == 'zip':
+            self._file = zipfile.ZipFile(dest, 'w', compression=zipfile.ZIP_DEFLATED)
+        else:
+            compression = 'gz' if archive == 'tar.gz' else ''
+            self._file = (tarfile.open(dest, f'w:{compression}') if is_path
+                          else tarfile.open(fileobj=dest, mode=f'w|{compression}'))
+
+    def add(self, name: str, fileobj: BinaryIO, size: int) -> None:
+        """Add a file read from the start of a binary file-like object."""
+        fileobj.seek(0)
+        if self.archive == 'zip':
+            with self._file.open(name, 'w') as member:
+                shutil.copyfileobj(fileobj, member)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size, info.mtime = size, int(time.time())
+            self._file.addfile(info, fileobj)
+
+    def close(self) -> None:
+        """Finish the archive."""
+        self._file.close()
+
+    def __enter__(self):
+        """Enter the runtime context of the archive."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Finish the archive."""
+        self.close()
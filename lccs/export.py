@@ -0,0 +1,124 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+from typing import Dict, List, Sequence
+
+from .utils import Utils
+
+CLASS_COLUMNS = ('id', 'name', 'code', 'title', 'color', 'class_parent_id')
+"""Columns exported from the classes of a group."""
+
+MAPPING_COLUMNS = ('source_class_id', 'target_class_id', 'degree_of_similarity')
+"""Columns exported from the mappings of a group."""
+
+INTEGER_COLUMNS = frozenset(('id', 'class_parent_id', 'source_class_id', 'target_class_id'))
+"""Columns of integer ids. Missing ids are -1 in NumPy arrays and null in pandas and Arrow."""
+
+FLOAT_COLUMNS = frozenset(('degree_of_similarity',))
+"""Columns of floats. Missing values are NaN in NumPy arrays and null in pandas and Arrow."""
+
+Columns = Dict[str, List]
+"""Values of each column, in the order of the items."""
+
+
+def item_columns(items: Sequence[dict], names: Sequence[str]) -> Columns:
+    """Return the values of the given keys of the items, one list per key, without creating model objects."""
+    return {name: [item.get(name) for item in items] for name in names}
+
+
+def _is_integer(values: List) -> bool:
+    """Return True if all values are integers or missing."""
+    return all(value is None or (isinstance(value, int) and not isinstance(value, bool)) for value in values)
+
+
+def to_numpy(columns: Columns):
+    """
+    Return the columns as a NumPy structured array.
+
+    Integer id columns are ``int64``, with -1 for missing ids, the degree of
+    similarity is ``float64``, with NaN for missing values, and the other
+    columns are fixed-width unicode strings, empty when missing.
+
+    :param columns: The values of each column.
+    :return: A ``numpy.ndarray`` with one field per column.
+    """
+    np = Utils._import_optional('numpy', 'raster')
+
+    arrays = {}
+    for name, values in columns.items():
+        if name in INTEGER_COLUMNS and _is_integer(values):
+            arrays[name] = np.fromiter((-1 if v is None else v for v in values), dtype=np.int64, count=len(values))
+        elif name in FLOAT_COLUMNS:
+            arrays[name] = np.fromiter(
+                (np.nan if v is None else v for v in values), dtype=np.float64, count=len(values)
+            )
+        else:
+            arrays[name] = np.array(['' if v is None else str(v) for v in values], dtype=str)
+            if not len(values):
+                arrays[name] = arrays[name].astype('U1')
+
+    size = len(next(iter(columns.values()), []))
+    result = np.empty(size, dtype=[(name, array.dtype) for name, array in arrays.items()])
+    for name, array in arrays.items():
+        result[name] = array
+    return result
+
+
+def to_pandas(columns: Columns):
+    """
+    Return the columns as a pandas DataFrame.
+
+    Integer id columns use the nullable ``Int64`` type and the degree of similarity is ``float64``.
+
+    :param columns: The values of each column.
+    :return: A ``pandas.DataFrame`` with one column per key.
+    """
+    pd = Utils._import_optional('pandas', 'pandas')
+
+    data = {}
+    for name, values in columns.items():
+        if name in INTEGER_COLUMNS and _is_integer(values):
+            data[name] = pd.array(values, dtype='Int64')
+        elif name in FLOAT_COLUMNS:
+            data[name] = pd.array([float('nan') if v is None else v for v in values], dtype='float64')
+        else:
+            data[name] = pd.array(values, dtype=object)
+    return pd.DataFrame(data)
+
+
+def to_arrow(columns: Columns):
+    """
+    Return the columns as an Arrow table.
+
+    Integer id columns are ``int64``, the degree of similarity is ``float64``
+    and the other columns are strings; missing values are null.
+
+    :param columns: The values of each column.
+    :return: A ``pyarrow.Table`` with one column per key.
+    """
+    pa = Utils._import_optional('pyarrow', 'arrow')
+
+    arrays = {}
+    for name, values in columns.items():
+        if name in INTEGER_COLUMNS and _is_integer(values):
+            arrays[name] = pa.array(values, type=pa.int64())
+        elif name in FLOAT_COLUMNS:
+            arrays[name] = pa.array(values, type=pa.float64())
+        else:
+            arrays[name] = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    return pa.table(arrays)
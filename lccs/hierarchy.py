@@ -0,0 +1,173 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from .classes import ClassesGroup, ClassificationSystemClass
+
+
+def _class_id(class_or_id) -> Any:
+    """Return the id of a class, or the given value when it is already an id.
+
+    Any object with the class properties is a class, so compact classes are accepted too.
+    """
+    return class_or_id.id if hasattr(class_or_id, 'class_parent_id') else class_or_id
+
+
+class ClassHierarchy:
+    """Tree of the classes of a classification system, built from ``class_parent_id``.
+
+    All indexes are computed once, on construction. The classes are numbered in
+    depth-first order, so the descendants of a class form a contiguous interval
+    of that order and "is X under Y" is answered in constant time.
+
+    Classes whose parent is not among the given classes are roots.
+
+    :param classes: A group or an iterable of classes of the same classification system,
+        including :class:`lccs.compact.CompactClass` objects.
+    """
+
+    def __init__(self, classes: Union[ClassesGroup, Iterable[ClassificationSystemClass]]) -> None:
+        """Build the hierarchy of the given classes."""
+        if isinstance(classes, ClassesGroup):
+            classes = classes.classes
+        classes = list(classes)
+
+        self._by_id: Dict[Any, ClassificationSystemClass] = {c.id: c for c in classes}
+        self._by_name: Dict[str, ClassificationSystemClass] = {c.name: c for c in classes}
+        self._by_code: Dict[str, ClassificationSystemClass] = {c.code: c for c in classes}
+
+        self._children: Dict[Any, List[ClassificationSystemClass]] = {c.id: [] for c in classes}
+        self._roots: List[ClassificationSystemClass] = []
+        for c in classes:
+            if c.class_parent_id in self._by_id and c.class_parent_id != c.id:
+                self._children[c.class_parent_id].append(c)
+            else:
+                self._roots.append(c)
+
+        self._order: List[ClassificationSystemClass] = []
+        self._start: Dict[Any, int] = {}
+        self._end: Dict[Any, int] = {}
+        self._depth: Dict[Any, int] = {}
+        self._levels: List[List[ClassificationSystemClass]] = []
+
+        for root in self._roots:
+            stack = [(root, 0, False)]
+            while stack:
+                node, depth, visited = stack.pop()
+                if visited:
+                    self._end[node.id] = len(self._order)
+                    continue
+                self._start[node.id] = len(self._order)
+                self._depth[node.id] = depth
+                self._order.append(node)
+                if depth == len(self._levels):
+                    self._levels.append([])
+                self._levels[depth].append(node)
+                stack.append((node, depth, True))
+                stack.extend((child, depth + 1, False) for child in reversed(self._children[node.id]))
+
+        if len(self._order) != len(self._by_id):
+            cycle = sorted(str(i) for i in self._by_id if i not in self._start)
+            raise ValueError(f"Cycle in the class hierarchy: {', '.join(cycle)}")
+
+    def _id(self, class_or_id) -> Any:
+        """Return the id of a class given the class or its id."""
+        class_id = _class_id(class_or_id)
+        if class_id not in self._by_id:
+            raise KeyError(f"Class {class_id} is not in the hierarchy")
+        return class_id
+
+    def by_id(self, class_id) -> Optional[ClassificationSystemClass]:
+        """Return the class with the given id, or None."""
+        return self._by_id.get(class_id)
+
+    def by_name(self, name: str) -> Optional[ClassificationSystemClass]:
+        """Return the class with the given name, or None."""
+        return self._by_name.get(name)
+
+    def by_code(self, code: str) -> Optional[ClassificationSystemClass]:
+        """Return the class with the given code, or None."""
+        return self._by_code.get(code)
+
+    @property
+    def roots(self) -> List[ClassificationSystemClass]:
+        """Return the classes without a parent."""
+        return list(self._roots)
+
+    def parent(self, class_or_id) -> Optional[ClassificationSystemClass]:
+        """Return the parent of a class, or None for a root."""
+        cls = self._by_id[self._id(class_or_id)]
+        return self._by_id.get(cls.class_parent_id) if self._depth[cls.id] > 0 else None
+
+    def children(self, class_or_id) -> List[ClassificationSystemClass]:
+        """Return the direct children of a class."""
+        return list(self._children[self._id(class_or_id)])
+
+    def ancestors(self, class_or_id) -> List[ClassificationSystemClass]:
+        """Return the ancestors of a class, from its parent up to the root."""
+        result = []
+        parent = self.parent(class_or_id)
+        while parent is not None:
+            result.append(parent)
+            parent = self.parent(parent)
+        return result
+
+    def descendants(self, class_or_id) -> List[ClassificationSystemClass]:
+        """Return all classes under a class, in depth-first order."""
+        class_id = self._id(class_or_id)
+        return self._order[self._start[class_id] + 1:self._end[class_id]]
+
+    def is_descendant(self, class_or_id, ancestor_or_id) -> bool:
+        """Return True if a class is under another one, in constant time."""
+        start = self._start[self._id(class_or_id)]
+        ancestor_id = self._id(ancestor_or_id)
+        return self._start[ancestor_id] < start < self._end[ancestor_id]
+
+    def depth(self, class_or_id) -> int:
+        """Return the depth of a class. Roots have depth 0."""
+        return self._depth[self._id(class_or_id)]
+
+    def leaves(self) -> List[ClassificationSystemClass]:
+        """Return the classes without children, in depth-first order."""
+        return [c for c in self._order if not self._children[c.id]]
+
+    def level(self, n: int) -> List[ClassificationSystemClass]:
+        """Return the classes at depth ``n``."""
+        return list(self._levels[n]) if 0 <= n < len(self._levels) else []
+
+    @property
+    def height(self) -> int:
+        """Return the number of levels of the hierarchy."""
+        return len(self._levels)
+
+    def __contains__(self, class_or_id) -> bool:
+        """Return True if the class or class id is in the hierarchy."""
+        return _class_id(class_or_id) in self._by_id
+
+    def __iter__(self) -> Iterator[ClassificationSystemClass]:
+        """Iterate over the classes in depth-first order."""
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        """Return the number of classes."""
+        return len(self._order)
+
+    def __repr__(self) -> str:
+        """Return the string representation of the hierarchy."""
+        return "\n".join(f"{'  ' * self._depth[c.id]}{c.name}" for c in self._order)
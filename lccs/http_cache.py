@@ -0,0 +1,333 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+import httpx
+
+
+class CachedResponse(NamedTuple):
+    """A response stored in a :class:`ResponseCache`."""
+
+    status_code: int
+    headers: List[Tuple[str, str]]
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+
+class ResponseCache:
+    """Persistent cache of HTTP responses in a SQLite database.
+
+    Responses are stored with their ``ETag`` and ``Last-Modified`` validators,
+    so they can be revalidated with a conditional request. The database is
+    opened in write-ahead logging mode and relies on the SQLite file locks, so
+    it can be shared by the threads and processes of a node.
+
+    The cache is pruned each time a response is stored: the responses not revalidated
+    for ``max_age`` seconds are removed, then the least recently revalidated ones
+    beyond ``max_entries``.
+
+    :param path: Path of the database file. The parent directories are created if needed.
+    :param timeout: Time in seconds to wait for a lock held by another process. Default is 30.
+    :param max_entries: (Optional) The maximum number of stored responses. Default is 10000.
+    :param max_age: (Optional) The time in seconds a response is kept after its last revalidation.
+        Default is None, for no limit.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], timeout: float = 30.0, max_entries: Optional[int] = 10000,
+                 max_age: Optional[float] = None) -> None:
+        """Open or create the cache database."""
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"Invalid maximum number of entries {max_entries}")
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the connection of the current process, opening it on first use."""
+        if self._connection is None or self._pid != os.getpid():
+            # A connection is never shared with a forked process.
+            connection = sqlite3.connect(self.path, timeout=self._timeout, check_same_thread=False,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, url TEXT NOT NULL, status_code INTEGER NOT NULL, headers TEXT NOT NULL, '
+                'content BLOB NOT NULL, etag TEXT, last_modified TEXT, stored_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)')
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the response stored with the given key, or None."""
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT status_code, headers, content, etag, last_modified, stored_at FROM responses WHERE key = ?',
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, headers, content, etag, last_modified, stored_at = row
+        return CachedResponse(status_code, [tuple(h) for h in json.loads(headers)], content, etag, last_modified,
+                              stored_at)
+
+    def set(self, key: str, url: str, response: CachedResponse) -> None:
+        """Store a response with the given key, pruning the cache."""
+        with self._lock:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, response.status_code, json.dumps(response.headers), response.content, response.etag,
+                 response.last_modified, response.stored_at)
+            )
+            self._prune()
+
+    def prune(self) -> int:
+        """Remove the responses older than :attr:`max_age` and beyond :attr:`max_entries`.
+
+        :return: The number of removed responses.
+        """
+        with self._lock:
+            return self._prune()
+
+    def _prune(self) -> int:
+        """Prune the cache, holding the lock."""
+        connection = self._connect()
+        removed = 0
+        if self.max_age is not None:
+            removed += connection.execute(
+                'DELETE FROM responses WHERE stored_at < ?', (time.time() - self.max_age,)
+            ).rowcount
+        if self.max_entries is not None:
+            removed += connection.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,)
+            ).rowcount
+        return removed
+
+    def touch(self, key: str) -> None:
+        """Mark the response stored with the given key as revalidated now."""
+        with self._lock:
+            self._connect().execute('UPDATE responses SET stored_at = ? WHERE key = ?', (time.time(), key))
+
+    def delete(self, key: str) -> None:
+        """Remove the response stored with the given key."""
+        with self._lock:
+            self._connect().execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def clear(self) -> None:
+        """Remove all stored responses."""
+        with self._lock:
+            self._connect().execute('DELETE FROM responses')
+
+    def close(self) -> None:
+        """Close the connection of the current process."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        """Return the number of stored responses."""
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def __repr__(self) -> str:
+        """Return the string representation of the cache."""
+        return f'ResponseCache("{self.path}")'
+
+
+def _cache(cache: Union[str, os.PathLike, ResponseCache]) -> ResponseCache:
+    """Return a cache given a cache or the path of its database."""
+    return cache if isinstance(cache, ResponseCache) else ResponseCache(cache)
+
+
+BYPASS_HEADERS = ('if-none-match', 'if-modified-since', 'if-range', 'range')
+"""Request headers of conditional and partial requests, which are sent as is and never cached."""
+
+
+class _Revalidation:
+    """Cache logic shared by the synchronous and asynchronous transports."""
+
+    def __init__(self, cache: ResponseCache) -> None:
+        self.cache = cache
+
+    @staticmethod
+    def key(request: httpx.Request) -> str:
+        """Return the cache key of a request, including a digest of its access token."""
+        token = request.headers.get('x-api-key', '')
+        digest = hashlib.sha256(token.encode()).hexdigest()[:16] if token else ''
+        return f"{request.method} {request.url} {digest}"
+
+    def prepare(self, request: httpx.Request) -> Tuple[Optional[str], Optional[CachedResponse]]:
+        """Return the cache key and stored response of a request, adding the validators to the request.
+
+        Requests that are not GET requests, or that already are conditional or partial, are not cached.
+        """
+        if request.method != 'GET' or any(header in request.headers for header in BYPASS_HEADERS):
+            return None, None
+        key = self.key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if cached.etag:
+                request.headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                request.headers['If-Modified-Since'] = cached.last_modified
+        return key, cached
+
+    def from_cache(self, key: str, cached: CachedResponse, request: httpx.Request) -> httpx.Response:
+        """Return a stored response after the server answered 304 Not Modified."""
+        self.cache.touch(key)
+        return httpx.Response(cached.status_code, headers=cached.headers, stream=httpx.ByteStream(cached.content),
+                              request=request)
+
+    @staticmethod
+    def cacheable(response: httpx.Response) -> bool:
+        """Return True if the response has validators and may be stored.
+
+        File downloads are not stored, so they are streamed without being buffered.
+        """
+        if response.status_code != 200 or 'no-store' in response.headers.get('cache-control', ''):
+            return False
+        if (response.headers.get('content-type', '').startswith('application/octet-stream')
+                or response.headers.get('content-disposition', '').startswith('attachment')):
+            return False
+        return 'etag' in response.headers or 'last-modified' in response.headers
+
+    def store(self, key: str, request: httpx.Request, response: httpx.Response, content: bytes) -> httpx.Response:
+        """Store the raw content of a response and return a response that replays it."""
+        headers = list(response.headers.multi_items())
+        self.cache.set(key, str(request.url), CachedResponse(
+            response.status_code, headers, content, response.headers.get('etag'),
+            response.headers.get('last-modified'), time.time()
+        ))
+        return httpx.Response(response.status_code, headers=headers, stream=httpx.ByteStream(content),
+                              request=request, extensions=response.extensions)
+
+
+class CacheTransport(httpx.BaseTransport):
+    """HTTP transport that keeps the responses of GET requests in a :class:`ResponseCache`.
+
+    Stored responses are revalidated with ``If-None-Match`` and ``If-Modified-Since``
+    and replayed from the cache when the server answers ``304 Not Modified``.
+    Requests with their own conditional or ``Range`` headers (:data:`BYPASS_HEADERS`)
+    and file downloads are passed through, so their ``304`` and ``206`` responses and
+    streamed bodies reach the caller unchanged.
+
+    :param cache: The cache or the path of its database.
+    :param transport: (Optional) The transport that sends the requests. Default is a ``httpx.HTTPTransport``.
+    """
+
+    def __init__(self, cache: Union[str, os.PathLike, ResponseCache],
+                 transport: Optional[httpx.BaseTransport] = None) -> None:
+        """Wrap a transport with a response cache."""
+        self._revalidation = _Revalidation(_cache(cache))
+        self._transport = transport if transport is not None else httpx.HTTPTransport()
+
+    @property
+    def cache(self) -> ResponseCache:
+        """Return the response cache."""
+        return self._revalidation.cache
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request, answering it from the cache when it was not modified."""
+        key, cached = self._revalidation.prepare(request)
+        response = self._transport.handle_request(request)
+        if key is None:
+            return response
+        if response.status_code == 304 and cached is not None:
+            response.close()
+            return self._revalidation.from_cache(key, cached, request)
+        if not self._revalidation.cacheable(response):
+            return response
+        try:
+            content = b''.join(response.stream)
+        finally:
+            response.close()
+        return self._revalidation.store(key, request, response, content)
+
+    def close(self) -> None:
+        """Close the wrapped transport."""
+        self._transport.close()
+
+
+class AsyncCacheTransport(httpx.AsyncBaseTransport):
+    """Asynchronous version of :class:`CacheTransport`.
+
+    The database is read and written in the default executor of the event loop, so
+    the other tasks are not blocked by the SQLite locks.
+
+    :param cache: The cache or the path of its database.
+    :param transport: (Optional) The transport that sends the requests. Default is a ``httpx.AsyncHTTPTransport``.
+    """
+
+    def __init__(self, cache: Union[str, os.PathLike, ResponseCache],
+                 transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Wrap a transport with a response cache."""
+        self._revalidation = _Revalidation(_cache(cache))
+        self._transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+
+    @property
+    def cache(self) -> ResponseCache:
+        """Return the response cache."""
+        return self._revalidation.cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request, answering it from the cache when it was not modified."""
+        key, cached = await self._run(self._revalidation.prepare, request)
+        response = await self._transport.handle_async_request(request)
+        if key is None:
+            return response
+        if response.status_code == 304 and cached is not None:
+            await response.aclose()
+            return await self._run(self._revalidation.from_cache, key, cached, request)
+        if not self._revalidation.cacheable(response):
+            return response
+        try:
+            content = b''.join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        return await self._run(self._revalidation.store, key, request, response, content)
+
+    @staticmethod
+    async def _run(function, *args):
+        """Call a function that uses the database in the default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *args))
+
+    async def aclose(self) -> None:
+        """Close the wrapped transport."""
+        await self._transport.aclose()
@@ -17,18 +17,59 @@
 #
 """Python API client wrapper for LCCS-WS."""
 import enum
+import io
 import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, NamedTuple
 
-from cachetools import LRUCache, cached
+import httpx
 
+from .batch import DEFAULT_BATCH_SIZE, BatchReport, ClassUpload, load_classes
+from .cache import (DEFAULT_CACHE_SIZE, CacheInfo, ResultCache, cached_method,
+                    invalidate_classes, invalidate_mapping, invalidate_style_format,
+                    invalidate_styles, invalidate_system)
+from .classes import ClassificationSystemClass
 from .classification_system import ClassificationSystem
+from .http_cache import ResponseCache
+from .mapping_graph import MappingGraph
 from .mappings import MappingGroup
+from .retry import TransportPolicy
 from .style_formats import StyleFormats
-from .style_utils import SldGenerator
 from .utils import Utils
 
+PREFETCH_INCLUDE = ("classes", "mappings", "styles")
+"""Resources that :meth:`LCCS.prefetch` can retrieve besides the classification systems."""
+
+
+class PrefetchReport(NamedTuple):
+    """Summary of a :meth:`LCCS.prefetch` call."""
+
+    systems: int
+    """Number of classification systems retrieved."""
+    requests: int
+    """Number of HTTP requests sent. Only counted when the service created its HTTP client, otherwise 0."""
+    seconds: float
+    """Elapsed time in seconds."""
+    errors: dict
+    """Exceptions of the failed retrievals, keyed by method name and arguments."""
+
+
+class DownloadReport(NamedTuple):
+    """Summary of a :meth:`LCCS.download_styles` call."""
+
+    files: list
+    """Paths of the downloaded files, or names of the archive members."""
+    skipped: list
+    """Paths of the local files kept unchanged."""
+    errors: dict
+    """Exceptions of the failed downloads, keyed by system and style format name (None when listing the formats)."""
+
 
 class LCCS:
     """This class implements a Python API client wrapper for LCCS-WS.
@@ -36,33 +77,102 @@ class LCCS:
     See https://github.com/brazil-data-cube/lccs-ws for more
     information on LCCS-WS.
 
+    The client keeps a pool of persistent HTTP connections that is shared by
+    every request, including the ones made by the returned model objects.
+    Use :meth:`close` or a ``with`` block to release the connections.
+
+    Creating a client sends no request: the supported languages and the
+    classification systems are retrieved, and the language validated, on first use.
+
     :param url: The LCCS-WS server URL.
     :type url: str
+    :param timeout: Timeout in seconds or a ``httpx.Timeout`` with connect, read, write and pool timeouts.
+    :type timeout: float | httpx.Timeout
+    :param limits: Connection pool limits (max connections, keep-alive connections and keep-alive expiry).
+    :type limits: httpx.Limits
+    :param client: An existing HTTP client to use instead of creating a new one. It is not closed by :meth:`close`.
+    :type client: httpx.Client
+    :param cache: A persistent response cache, or the path of its database, shared by processes and sessions.
+        Responses are revalidated with ``If-None-Match`` and ``If-Modified-Since``. Not used with ``client``.
+    :type cache: str | ResponseCache
+    :param policy: The retry, backoff, rate and adaptive concurrency policy of the requests. Not used with ``client``.
+    :type policy: TransportPolicy
+    :param memory_cache_size: Maximum approximate size in bytes of the results kept in memory by this instance.
+    :type memory_cache_size: int
+    :param memory_cache_ttl: Time in seconds the results are kept in memory. Default is None, they do not expire.
+    :type memory_cache_ttl: float
+    :param max_concurrency: Maximum number of requests sent at once when following the links of a response.
+    :type max_concurrency: int
+    :param compact: Whether classes and mappings are kept in columns, see :mod:`lccs.compact`.
+        Use it to hold many large systems in memory.
+    :type compact: bool
     """
 
     _url: str
     _validate: bool
     _access_token: str | None
-    _support_l: enum.EnumMeta
+    _support_l: enum.EnumMeta | None
     _language: str | None
-    _classification_systems: list[dict[str, str]]
-
-    def __init__(self, url: str, validate=False, access_token=None, language=None):
+    _language_checked: bool
+    _classification_systems: list[dict[str, str]] | None
+    _client: httpx.Client
+    _owns_client: bool
+    _results: ResultCache
+    _max_concurrency: int
+    _compact: bool
+    _executor: ThreadPoolExecutor | None
+
+    def __init__(
+        self,
+        url: str,
+        validate=False,
+        access_token=None,
+        language=None,
+        timeout: float | httpx.Timeout | None = None,
+        limits: httpx.Limits | None = None,
+        client: httpx.Client | None = None,
+        cache: str | os.PathLike | ResponseCache | None = None,
+        policy: TransportPolicy | None = None,
+        memory_cache_size: int = DEFAULT_CACHE_SIZE,
+        memory_cache_ttl: float | None = None,
+        max_concurrency: int = 8,
+        compact: bool = False,
+    ):
         """Create a LCCS-WS client attached to the given host address (an URL)."""
+        self._results = ResultCache(maxsize=memory_cache_size, ttl=memory_cache_ttl)
+        self._max_concurrency = max_concurrency
+        self._compact = compact
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+        self._lazy_lock = threading.RLock()
+        self._request_count = 0
         self._url = url.rstrip("/")
         self._validate = validate
         self._access_token = access_token if access_token else ""
-        self._support_l = self._support_language()
-        self._language = (
-            self._validate_language(language) if language else None
-        )  # Apenas o código, ex: 'en'
-        self._classification_systems = self._get_classification_systems()
+        self._owns_client = client is None
+        # Only the requests of a client created here are counted, a given client may be shared.
+        self._client = (
+            client
+            if client is not None
+            else Utils.create_client(
+                timeout=timeout, limits=limits, access_token=self._access_token, cache=cache, policy=policy,
+                event_hooks={"request": [self._count_request]},
+            )
+        )
+        # The service document and the systems are only retrieved when first needed.
+        self._support_l = None
+        self._language = language if language else None  # Apenas o código, ex: 'en'
+        self._language_checked = self._language is None
+        self._classification_systems = None
 
     def _support_language(self):
         """Get the support language from service."""
         import enum
 
-        data = Utils._get(f"{self._url}/", access_token=self._access_token)
+        data = Utils._get(
+            f"{self._url}/", access_token=self._access_token, client=self._client
+        )
         return enum.Enum(
             "Language",
             {i["language"]: i["language"] for i in data["supported_language"]},
@@ -71,22 +181,31 @@ class LCCS:
 
     def _validate_language(self, language):
         """Validate and return language code."""
-        if language in [e.value for e in self._support_l]:
+        if language in self.allowed_language:
             return language
         else:
             s = ", ".join(self.allowed_language)
             raise KeyError(f"Language not supported! Use: {s}")
 
+    def _language_params(self) -> dict | None:
+        """Return the language query parameter, validating the language on first use."""
+        if not self._language_checked:
+            self._validate_language(self._language)
+            self._language_checked = True
+        return {"language": self._language} if self._language else None
+
     def _get_format_identifier(self, name):
         url = f"{self._url}/style_formats/search/{name}"
-        data = Utils._get(url)
+        data = Utils._get(url, client=self._client)
         return data
 
     def _get_classification_systems(self):
         """Return the Classification Systems available in service."""
         url = f"{self._url}/classification_systems"
-        params = {"language": self._language} if self._language else None
-        data = Utils._get(url, access_token=self._access_token, params=params)
+        params = self._language_params()
+        data = Utils._get(
+            url, access_token=self._access_token, params=params, client=self._client
+        )
         result = []
         for i in data:
             result.append(
@@ -94,14 +213,38 @@ class LCCS:
             )
         return result
 
+    def _count_request(self, request: httpx.Request):
+        """Count the requests sent by the client of the service."""
+        with self._executor_lock:
+            self._request_count += 1
+
+    def _map(self, function: Callable, items: Iterable) -> list:
+        """Apply a function to items in the thread pool of the service, keeping their order.
+
+        Exceptions are raised in the order of the items, as in a sequential loop. Calls
+        made from a thread of the pool run sequentially, so nested calls can not exhaust it.
+        """
+        items = list(items)
+        if len(items) <= 1 or self._max_concurrency <= 1 or getattr(self._local, "worker", False):
+            return [function(item) for item in items]
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_concurrency,
+                    thread_name_prefix="lccs",
+                    initializer=setattr,
+                    initargs=(self._local, "worker", True),
+                )
+        return list(self._executor.map(function, items))
+
     def _id(self, system_name: str):
-        for k, v in self._classification_systems[0].items():
+        for k, v in self.classification_systems[0].items():
             if k == system_name:
                 return v
         return None
 
     def _name(self, system_id: int):
-        for k, v in self._classification_systems[0].items():
+        for k, v in self.classification_systems[0].items():
             if v.id == int(system_id):
                 return k
         return None
@@ -109,6 +252,11 @@ class LCCS:
     @property
     def allowed_language(self):
         """Retrieve a list of languages allowed by the service."""
+        if self._support_l is None:
+            # Threads missing the service document at once wait for a single request.
+            with self._lazy_lock:
+                if self._support_l is None:
+                    self._support_l = self._support_language()
         return [e.value for e in self._support_l]
 
     @property
@@ -118,9 +266,15 @@ class LCCS:
         :returns: list of Classification Systems.
         :rtype: dict
         """
-        return self._classification_systems
-
-    @cached(cache=LRUCache(maxsize=128))
+        systems = self._classification_systems
+        if systems is None:
+            with self._lazy_lock:
+                if self._classification_systems is None:
+                    self._classification_systems = self._get_classification_systems()
+                systems = self._classification_systems
+        return systems
+
+    @cached_method
     def classification_system(self, system: str) -> ClassificationSystem:
         """Return information about the given classification system.
 
@@ -131,18 +285,20 @@ class LCCS:
         :rtype: dict
         """
         url = f"{self._url}/classification_systems/{system}"
-        params = {"language": self._language} if self._language else None
+        params = self._language_params()
         try:
-            data = Utils._get(url, access_token=self._access_token, params=params)
-            return ClassificationSystem(
-                data, self._validate
-            )  # pyright: ignore[reportArgumentType]
+            data = Utils._get(
+                url, access_token=self._access_token, params=params, client=self._client
+            )
         except Exception as exc:
             raise KeyError(
                 f"Could not retrieve information for classification_system: {system}"
             ) from exc
+        return ClassificationSystem(
+            data, self._validate, self._client, compact=self._compact, results=self._results
+        )  # pyright: ignore[reportArgumentType]
 
-    @cached(cache=LRUCache(maxsize=128))
+    @cached_method
     def available_mappings(self, system_source: str) -> list:
         """Return the available mappings of classification system.
 
@@ -153,27 +309,29 @@ class LCCS:
         :rtype: list
         """
         url = f"{self._url}/mappings/{system_source}"
-        params = {"language": self._language} if self._language else None
+        params = self._language_params()
         try:
-            data = Utils._get(url, access_token=self._access_token, params=params)
+            data = Utils._get(
+                url, access_token=self._access_token, params=params, client=self._client
+            )
         except Exception:
             raise KeyError(
                 f"Could not retrieve any available mapping for {system_source}"
             )
 
-        result = []
-        for i in data:
-            if i["rel"] == "child":
-                system_target = self.classification_system(
-                    i["href"].split("/")[-1].split("?")[0]
-                )
-                result.append(system_target)
-        return result
+        targets = [
+            i["href"].split("/")[-1].split("?")[0] for i in data if i["rel"] == "child"
+        ]
+        return self._map(self.classification_system, targets)
 
-    @cached(cache=LRUCache(maxsize=128))
+    @cached_method
     def mappings(self, system_source: str, system_target: str) -> MappingGroup:
         """Return the given classification_system.
 
+        The classes of the source and target classification systems are retrieved
+        once, when a class of a mapping is first read, and shared by all mappings
+        of the group.
+
         :param system_source: The name or identifier of classification system.
         :type system_source: str
         :param system_target: The name or identifier of classification system.
@@ -184,14 +342,51 @@ class LCCS:
         """
         url = f"{self._url}/mappings/{system_source}/{system_target}"
         try:
-            data = Utils._get(url, access_token=self._access_token)
+            data = Utils._get(url, access_token=self._access_token, client=self._client)
         except Exception:
             raise KeyError(
                 f"Could not retrieve mappings for {system_source} and {system_target}"
             )
 
         data_result = {"mappings": data}
-        return MappingGroup(data_result, self._validate)
+        if self._compact:
+            from .compact import CompactMappingGroup
+            group_type = CompactMappingGroup
+        else:
+            group_type = MappingGroup
+        return group_type(
+            data_result,
+            self._validate,
+            self._client,
+            source_classes=lambda: self._classes_index(system_source),
+            target_classes=lambda: self._classes_index(system_target),
+        )
+
+    @cached_method
+    def mapping_graph(self, scale: float = 1.0) -> MappingGraph:
+        """Return the graph of the classification systems linked by mappings.
+
+        The graph finds crosswalks between systems without direct mappings and
+        memoizes them, see :class:`lccs.mapping_graph.MappingGraph`.
+
+        :param scale: The highest degree of similarity used by the service.
+        :type scale: float
+
+        :returns: The mapping graph of the service.
+        :rtype: MappingGraph
+        """
+        return MappingGraph(self, scale=scale)
+
+    def _classes_index(self, system: str) -> dict[int, ClassificationSystemClass] | None:
+        """Return the classes of a classification system indexed by class id.
+
+        Returns None when the classes can not be listed, so each mapping fetches its own classes.
+        """
+        try:
+            group = self.classification_system(system).classes_group()
+            return group.index() if self._compact else {c.id: c for c in group.classes}
+        except (KeyError, ValueError, RuntimeError):
+            return None
 
     def available_style_formats(self) -> list:
         """Fetch the available style formats.
@@ -199,25 +394,25 @@ class LCCS:
         :returns: Available style formats.
         :rtype: list
         """
-        result = []
         try:
             data = Utils._get(
-                f"{self._url}/style_formats", access_token=self._access_token
+                f"{self._url}/style_formats",
+                access_token=self._access_token,
+                client=self._client,
             )
         except Exception:
             raise KeyError("Could not retrieve any style format")
 
-        for i in data:
-            for links in i["links"]:
-                if links["rel"] == "items":
-                    data = Utils._get(
-                        f"{links['href']}", access_token=self._access_token
-                    )
-                    result.append(StyleFormats(data))
+        hrefs = [links["href"] for i in data for links in i["links"] if links["rel"] == "items"]
+        return self._map(self._style_format, hrefs)
 
-        return result
+    def _style_format(self, url: str) -> StyleFormats:
+        """Fetch a style format."""
+        return StyleFormats(
+            Utils._get(url, access_token=self._access_token, client=self._client)
+        )
 
-    @cached(cache=LRUCache(maxsize=128))
+    @cached_method
     def style_formats(self, system) -> list[StyleFormats]:
         """Fetch styles of the a giving classification system.
 
@@ -227,30 +422,26 @@ class LCCS:
         :returns: Available Classification Systems Styles.
         :rtype: list
         """
-        result = []
         try:
             data = Utils._get(
                 f"{self._url}/classification_systems/{system}/style_formats",
                 access_token=self._access_token,
+                client=self._client,
             )
         except Exception:
             raise KeyError(f"Could not retrieve any style format for {system}")
 
-        for i in data:
-            if i["rel"] == "style":
-                style_id = i["href"].split("/")[-1]
-                style_data = Utils._get(
-                    f"{self._url}/style_formats/{style_id}",
-                    access_token=self._access_token,
-                )
-                result.append(StyleFormats(style_data))
-
-        return result
+        hrefs = [
+            f"{self._url}/style_formats/{i['href'].split('/')[-1]}" for i in data if i["rel"] == "style"
+        ]
+        return self._map(self._style_format, hrefs)
 
     # TODO
-    def get_style(self, system, style_format, path=None):
+    def get_style(self, system, style_format, path=None, size=None, checksum=None):
         """Fetch styles of a giving classification system.
 
+        The style is streamed to disk, see :meth:`download_style`.
+
         :param system: The id or identifier of a classification system.
         :type system: str
 
@@ -260,21 +451,233 @@ class LCCS:
         :param path: Directory path to save the file
         :type path: str
 
-        :returns: Style
-        :rtype: File
+        :param size: The expected size of the style file in bytes.
+        :type size: int
+
+        :param checksum: The expected checksum of the style file, as ``algorithm:hexdigest``.
+        :type checksum: str
+
+        :returns: The number of bytes written.
+        :rtype: int
         """
+        file = self.download_style(
+            system, style_format, path if path is not None else ".", size=size, checksum=checksum
+        )
+        return file.stat().st_size
+
+    def _style_url(self, system, style_format) -> str:
+        """Return the URL of the style of a classification system."""
+        return f"{self._url}/classification_systems/{system}/styles/{style_format}"
+
+    def _token_headers(self) -> dict:
+        """Return the headers with the access token of the service."""
+        return {"x-api-key": self._access_token} if self._access_token else {}
+
+    def download_style(
+        self,
+        system,
+        style_format,
+        dest,
+        file_name: str | None = None,
+        size: int | None = None,
+        checksum: str | None = None,
+        resume: bool = True,
+        skip_unchanged: bool = False,
+    ) -> Path:
+        """Download the style of a classification system to a file, in chunks.
+
+        The style is written in a ``.part`` file renamed once complete and verified.
+        A partial download left in ``dest`` is resumed with a ``Range`` request when
+        the file name is known, see :func:`lccs.download.download_file`.
+
+        :param system: The id or identifier of a classification system.
+        :type system: str
+        :param style_format: The id or name of style format.
+        :type style_format: str
+        :param dest: The destination file, or a directory where the file is saved with the name sent by the server.
+        :type dest: str | os.PathLike
+        :param file_name: The file name used in a destination directory.
+        :type file_name: str
+        :param size: The expected size in bytes.
+        :type size: int
+        :param checksum: The expected checksum, as ``algorithm:hexdigest`` or a SHA-256 hexdigest.
+        :type checksum: str
+        :param resume: Whether a partial download is resumed.
+        :type resume: bool
+        :param skip_unchanged: Whether an existing file is kept when the server reports it unchanged.
+        :type skip_unchanged: bool
+
+        :returns: The path of the style file.
+        :rtype: Path
+        """
+        return self._download_style(
+            system, style_format, dest, file_name, size, checksum, resume, skip_unchanged
+        ).path
+
+    def _download_style(self, system, style_format, dest, file_name=None, size=None, checksum=None, resume=True,
+                        skip_unchanged=False):
+        """Download the style of a classification system, returning the finished download.
+
+        See :meth:`download_style`. The ``skipped`` attribute of the download tells whether
+        the existing file was kept unchanged.
+        """
+        from .download import DEFAULT_CHUNK_SIZE, _download_file
+
         try:
-            file_name, data = Utils._get(
-                f"{self._url}/classification_systems/{system}/styles/{style_format}",
-                access_token=self._access_token,
+            return _download_file(
+                self._style_url(system, style_format),
+                dest,
+                self._client,
+                file_name,
+                size,
+                checksum,
+                resume,
+                DEFAULT_CHUNK_SIZE,
+                skip_unchanged,
+                headers=self._token_headers(),
             )
-        except Exception:
-            raise KeyError(f"Could not retrieve any style for {system}")
+        except httpx.HTTPError as exc:
+            raise KeyError(f"Could not retrieve any style for {system}") from exc
+
+    def write_style(self, system, style_format, fileobj) -> str | None:
+        """Write the style of a classification system to a binary file-like object, in chunks.
 
-        if path is not None:
-            full_path = path + file_name
-            return open(full_path, "wb").write(data)
-        return open(file_name, "wb").write(data)
+        :param system: The id or identifier of a classification system.
+        :type system: str
+        :param style_format: The id or name of style format.
+        :type style_format: str
+        :param fileobj: A binary file-like object.
+
+        :returns: The file name of the style sent by the server.
+        :rtype: str
+        """
+        from .download import stream_file
+
+        try:
+            file_name, _ = stream_file(
+                self._style_url(system, style_format),
+                fileobj,
+                client=self._client,
+                headers=self._token_headers(),
+            )
+        except httpx.HTTPError as exc:
+            raise KeyError(f"Could not retrieve any style for {system}") from exc
+        return file_name
+
+    def style_content(self, system, style_format) -> memoryview:
+        """Return the content of the style of a classification system without copying it.
+
+        :param system: The id or identifier of a classification system.
+        :type system: str
+        :param style_format: The id or name of style format.
+        :type style_format: str
+
+        :returns: The content of the style file.
+        :rtype: memoryview
+        """
+        buffer = io.BytesIO()
+        self.write_style(system, style_format, buffer)
+        return buffer.getbuffer()
+
+    def download_styles(
+        self,
+        systems: Iterable[str] | None = None,
+        formats: Iterable[str] | None = None,
+        dest=".",
+        archive: str | None = None,
+    ) -> DownloadReport:
+        """Download the styles of classification systems concurrently.
+
+        The style formats of each system are listed with :meth:`style_formats`. The
+        styles are saved in ``dest/<system>/<style format>/<file name>``, or written
+        into a single zip or tar archive when ``dest`` has an archive suffix or
+        ``archive`` is given. In a directory tree, a style file already saved is
+        downloaded again only when the server reports it was modified.
+
+        :param systems: The identifiers of the classification systems. Default is all systems.
+        :type systems: Iterable[str]
+        :param formats: The names or ids of the style formats. Default is all formats of each system.
+        :type formats: Iterable[str]
+        :param dest: A directory, an archive file or a writable binary stream when ``archive`` is given.
+        :type dest: str | os.PathLike
+        :param archive: The archive format: ``zip``, ``tar`` or ``tar.gz``. Default is the format of the ``dest`` suffix.
+        :type archive: str
+
+        :returns: The downloaded files, the files kept unchanged and the errors.
+        :rtype: DownloadReport
+        """
+        from .download import SPOOL_SIZE, ArchiveWriter, archive_format
+
+        if systems is None:
+            systems = [s["identifier"] for s in self.classification_systems]
+        systems = list(systems)
+        wanted = None if formats is None else {str(f) for f in formats}
+        errors = {}
+
+        def list_formats(system):
+            try:
+                return self.style_formats(system)
+            except KeyError as exc:
+                errors[(system, None)] = exc
+                return []
+
+        styles = [
+            (system, style_format)
+            for system, style_formats in zip(systems, self._map(list_formats, systems))
+            for style_format in style_formats
+            if wanted is None or style_format.name in wanted or str(style_format.id) in wanted
+        ]
+
+        def save(style):
+            system, style_format = style
+            directory = Path(dest) / str(system) / style_format.name
+            directory.mkdir(parents=True, exist_ok=True)
+            existing = [f for f in directory.iterdir() if f.is_file() and f.suffix != ".part"]
+            previous = existing[0] if len(existing) == 1 else None
+            download = self._download_style(
+                system, style_format.id, directory,
+                file_name=previous.name if previous else None, skip_unchanged=True
+            )
+            return download.path, download.skipped
+
+        def fetch(style):
+            system, style_format = style
+            buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+            try:
+                file_name = self.write_style(system, style_format.id, buffer)
+            except Exception:
+                buffer.close()
+                raise
+            return f"{system}/{style_format.name}/{file_name or style_format.name}", buffer
+
+        def call(function, style):
+            try:
+                return style, function(style), None
+            except Exception as exc:
+                return style, None, exc
+
+        files, skipped = [], []
+        archive = archive or archive_format(dest)
+        if archive is None:
+            for (system, style_format), result, exc in self._map(partial(call, save), styles):
+                if exc is not None:
+                    errors[(system, style_format.name)] = exc
+                elif result[1]:
+                    skipped.append(result[0])
+                else:
+                    files.append(result[0])
+            return DownloadReport(files, skipped, errors)
+
+        with ArchiveWriter(dest, archive) as writer:
+            for (system, style_format), result, exc in self._map(partial(call, fetch), styles):
+                if exc is not None:
+                    errors[(system, style_format.name)] = exc
+                    continue
+                name, buffer = result
+                with buffer:
+                    writer.add(name, buffer, buffer.tell())
+                files.append(name)
+        return DownloadReport(files, skipped, errors)
 
     def add_classification_system(self, system_path: str | dict) -> list[dict]:
         """Add new classification system."""
@@ -283,12 +686,19 @@ class LCCS:
         if type(system_path) == str:
             with open(system_path, encoding="utf-8") as file:
                 system_path = json.load(file)
+        if self._validate:
+            Utils.validate(system_path, "new_classification_system")
         try:
-            retval = Utils._post(url, access_token=self._access_token, json=system_path)
+            retval = Utils._post(
+                url, access_token=self._access_token, json=system_path, client=self._client
+            )
 
-        except RuntimeError:
+        except httpx.HTTPError:
             raise ValueError("Could not insert classes!")
 
+        self._classification_systems = None
+        self._results.invalidate(lambda key, _: key[0] == "mapping_graph")
+
         return retval
 
     def update_class(self, system: str, class_id: int, class_info: dict) -> list[dict]:
@@ -296,45 +706,79 @@ class LCCS:
         url = f"{self._url}/classification_systems/{system}/classes/{class_id}"
 
         try:
-            retval = Utils._put(url, access_token=self._access_token, json=class_info)
-        except RuntimeError:
+            retval = Utils._put(
+                url, access_token=self._access_token, json=class_info, client=self._client
+            )
+        except httpx.HTTPError:
             raise ValueError("Could not update class!")
 
+        invalidate_classes(self._results, system)
+
         return retval
 
     def add_classes(
-        self, system: str, classes: str | list[dict[str, Any]]
-    ) -> dict[str, Any]:
-        """Add new classes to an classification system."""
+        self,
+        system: str,
+        classes: str | list[dict[str, Any]],
+        chunk_size: int = DEFAULT_BATCH_SIZE,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> BatchReport:
+        """Add new classes to an classification system, in chunks sent concurrently.
+
+        Parent classes given by name in ``class_parent_id`` are resolved with an index of
+        the classes of the system, built once, and of the classes created by this call.
+        Classes are sent level by level, so parents are created before their children.
+        A failed chunk is reported and its descendants are not sent.
+
+        :param system: The id or identifier of a classification system.
+        :type system: str
+        :param classes: A JSON file or a list of classes.
+        :type classes: str | list[dict]
+        :param chunk_size: The maximum number of classes per request.
+        :type chunk_size: int
+        :param progress: Called with the number of classes processed and the total after each chunk.
+        :type progress: Callable[[int, int], None]
+
+        :returns: The created classes, the number of chunks and the errors. Before version 1.1.0,
+            the response of the service was returned; its classes are in ``BatchReport.classes``.
+        :rtype: BatchReport
+        """
         url = f"{self._url}/classification_systems/{system}/classes"
 
-        if isinstance(classes, str):
-            classes_path = Path(classes)
-            if not classes_path.exists():
-                raise ValueError(f"File not found: {classes_path}")
+        classes = load_classes(classes)
 
-            try:
-                with classes_path.open("r", encoding="utf-8") as f:
-                    classes = json.load(f)
-            except json.JSONDecodeError as exc:
-                raise ValueError(f"Invalid JSON file: {classes_path}") from exc
-
-        for i in classes:  # type: dict[str, Any]
-            if "class_parent_id" not in i:
-                break
-            if not isinstance(i["class_parent_id"], str):
-                break
-            i["class_parent_id"] = Utils.get_id_by_name(
-                name=i["class_parent_id"], classes=_system_id.classes
-            )
+        if self._validate:
+            # The whole upload is checked before the first chunk is sent.
+            Utils.validate(classes, "class", many=True)
 
-        try:
-            retval = Utils._post(url=url, access_token=self._access_token, json=classes)
+        def system_ids() -> dict:
+            invalidate_classes(self._results, system)
+            return {c.name: c.id for c in self.classification_system(system).classes()}
 
-        except RuntimeError:
-            raise ValueError("Could not insert classes!")
+        upload = ClassUpload(classes, chunk_size, progress)
+        upload.plan(system_ids() if upload.needs_ids else {})
 
-        return retval
+        def post(chunk):
+            try:
+                return Utils._post(
+                    url=url, access_token=self._access_token, json=upload.payload(chunk), client=self._client
+                ), None
+            except (ValueError, httpx.HTTPError) as exc:
+                return None, exc
+            finally:
+                upload.step(chunk)
+
+        for depth in range(len(upload.levels)):
+            if upload.missing_parents(depth):
+                # The service did not return the ids of the created parents.
+                upload.ids.update(system_ids())
+            level_chunks = upload.level_chunks(depth)
+            for chunk, (retval, exc) in zip(level_chunks, self._map(post, level_chunks)):
+                upload.record(chunk, retval, exc)
+
+        invalidate_classes(self._results, system)
+
+        return upload.report()
 
     def add_style(
         self,
@@ -350,8 +794,8 @@ class LCCS:
 
         if style_path:
             try:
-                style = {"style": open(style_path, "rb")}
-            except RuntimeError:
+                style = {"style": (Path(style_path).name, Path(style_path).read_bytes())}
+            except OSError:
                 raise ValueError(f"Could not open style file {style_path}.")
         elif style_tex:
             style = {"style": (f"{style_name}.{style_extension}", f"{style_tex}")}
@@ -362,11 +806,17 @@ class LCCS:
 
         try:
             retval = Utils._post(
-                url, access_token=self._access_token, data=data, files=style
+                url,
+                access_token=self._access_token,
+                data=data,
+                files=style,
+                client=self._client,
             )
-        except RuntimeError:
+        except httpx.HTTPError:
             raise ValueError("Could not insert style!")
 
+        invalidate_styles(self._results, system)
+
         return retval
 
     def add_mapping(self, system_source: str, system_target: str, mappings) -> list:
@@ -376,11 +826,17 @@ class LCCS:
         if type(mappings) == str:
             with open(mappings, encoding="utf-8") as file:
                 mappings = json.load(file)
+        if self._validate:
+            Utils.validate(mappings, "mapping", many=isinstance(mappings, list))
         try:
-            retval = Utils._post(url, access_token=self._access_token, json=mappings)
-        except RuntimeError:
+            retval = Utils._post(
+                url, access_token=self._access_token, json=mappings, client=self._client
+            )
+        except httpx.HTTPError:
             raise ValueError("Could not insert mappings!")
 
+        invalidate_mapping(self._results, system_source, system_target)
+
         return retval
 
     def add_style_format(self, name: str) -> dict:
@@ -390,8 +846,10 @@ class LCCS:
         data = {"name": name}
 
         try:
-            retval = Utils._post(url, access_token=self._access_token, json=data)
-        except RuntimeError:
+            retval = Utils._post(
+                url, access_token=self._access_token, json=data, client=self._client
+            )
+        except httpx.HTTPError:
             raise ValueError(f"Could not insert style format {name}!")
 
         return retval
@@ -402,10 +860,14 @@ class LCCS:
             retval = Utils._delete(
                 f"{self._url}/classification_systems/{system}",
                 access_token=self._access_token,
+                client=self._client,
             )
-        except RuntimeError:
+        except httpx.HTTPError:
             raise ValueError(f"Could not remove classification system {system}!")
 
+        invalidate_system(self._results, system)
+        self._classification_systems = None
+
         return retval.status_code
 
     def delete_class(self, system: str, class_name_or_id: str) -> int:
@@ -414,12 +876,15 @@ class LCCS:
             retval = Utils._delete(
                 f"{self._url}/classification_systems/{system}/classes/{class_name_or_id}",
                 access_token=self._access_token,
+                client=self._client,
             )
-        except RuntimeError:
+        except httpx.HTTPError:
             raise ValueError(
                 f"Could not remove class {class_name_or_id} of classification system {system}!"
             )
 
+        invalidate_classes(self._results, system)
+
         return retval.status_code
 
     def delete_style_format(self, style_format: str) -> int:
@@ -428,10 +893,13 @@ class LCCS:
             retval = Utils._delete(
                 f"{self._url}/style_formats/{style_format}",
                 access_token=self._access_token,
+                client=self._client,
             )
-        except RuntimeError:
+        except httpx.HTTPError:
             raise ValueError(f"Could not remove style format {style_format} !")
 
+        invalidate_style_format(self._results, style_format)
+
         return retval.status_code
 
     def delete_style(self, system: str, style_format: str) -> int:
@@ -440,12 +908,15 @@ class LCCS:
             retval = Utils._delete(
                 f"{self._url}/classification_systems/{system}/styles/{style_format}",
                 access_token=self._access_token,
+                client=self._client,
             )
-        except RuntimeError:
+        except httpx.HTTPError:
             raise ValueError(
                 f"Could not remove style {style_format} of classification system {system}!"
             )
 
+        invalidate_styles(self._results, system)
+
         return retval.status_code
 
     def delete_mapping(self, system_source: str, system_target: str) -> int:
@@ -454,16 +925,21 @@ class LCCS:
             retval = Utils._delete(
                 f"{self._url}/mappings/{system_source}/{system_target}",
                 access_token=self._access_token,
+                client=self._client,
             )
-        except RuntimeError:
+        except httpx.HTTPError:
             raise ValueError(
                 f"Could not remove mapping of {system_source} and {system_target}!"
             )
 
+        invalidate_mapping(self._results, system_source, system_target)
+
         return retval.status_code
 
     def create_style(self, system: str, style_format: str, options: dict, rules: list):
         """Create style sld."""
+        from .style_utils import SldGenerator
+
         sld = SldGenerator.create_sld(options=options, rules=rules, layer_name=system)
 
         self.add_style(
@@ -476,11 +952,121 @@ class LCCS:
 
         return
 
+    def prefetch(
+        self, systems: Iterable[str] | None = None, include: Iterable[str] = PREFETCH_INCLUDE
+    ) -> PrefetchReport:
+        """Retrieve the catalog of classification systems into the caches of the service.
+
+        The classification systems are retrieved first, then their classes, available
+        mappings and style formats, then the mapping groups between them. Each step
+        runs concurrently in the thread pool of the service. Results are cached under
+        the identifiers of the systems, and failures are reported instead of raised.
+
+        :param systems: The names or identifiers of the classification systems. Default is all systems.
+        :type systems: Iterable[str]
+        :param include: The resources retrieved with the systems: ``classes``, ``mappings`` and/or ``styles``.
+        :type include: Iterable[str]
+
+        :returns: The number of systems, requests, the elapsed time and the errors.
+        :rtype: PrefetchReport
+        """
+        include = set(include)
+        if include - set(PREFETCH_INCLUDE):
+            raise ValueError(
+                f"Unknown resources {', '.join(sorted(include - set(PREFETCH_INCLUDE)))}. "
+                f"Use: {', '.join(PREFETCH_INCLUDE)}"
+            )
+
+        start, requests = time.perf_counter(), self._request_count
+        errors = {}
+
+        def call(task):
+            key, function = task
+            try:
+                return key, function(), None
+            except Exception as exc:
+                return key, None, exc
+
+        def run(tasks: dict) -> dict:
+            results = {}
+            for key, value, exc in self._map(call, tasks.items()):
+                if exc is None:
+                    results[key] = value
+                else:
+                    errors[key] = exc
+            return results
+
+        if systems is None:
+            systems = [s["identifier"] for s in self.classification_systems]
+        loaded = run({
+            ("classification_system", name): partial(self.classification_system, name) for name in systems
+        })
+        names = {key[1]: system for key, system in loaded.items()}
+
+        tasks = {}
+        for name, system in names.items():
+            if "classes" in include:
+                tasks[("classes", name)] = system.classes_group
+            if "mappings" in include:
+                tasks[("available_mappings", name)] = partial(self.available_mappings, name)
+            if "styles" in include:
+                tasks[("style_formats", name)] = partial(self.style_formats, name)
+        retrieved = run(tasks)
+
+        tasks = {}
+        for key, value in retrieved.items():
+            if key[0] == "available_mappings":
+                for target in value:
+                    pair = ("mappings", key[1], target.identifier)
+                    tasks[pair] = partial(self.mappings, *pair[1:])
+        groups = run(tasks)
+
+        if "classes" in include:
+            run({
+                ("prefetch_related",) + key[1:]: value.prefetch_related
+                for key, value in {**retrieved, **groups}.items()
+                if key[0] in ("classes", "mappings")
+            })
+
+        return PrefetchReport(
+            len(names), self._request_count - requests, time.perf_counter() - start, errors
+        )
+
+    def cache_info(self) -> CacheInfo:
+        """Return the statistics of the results kept in memory by this instance."""
+        return self._results.cache_info()
+
+    def cache_clear(self):
+        """Remove the results kept in memory by this instance."""
+        self._results.cache_clear()
+
     @property
     def url(self):
         """Return the LCSS server instance URL."""
         return self._url
 
+    @property
+    def client(self) -> httpx.Client:
+        """Return the HTTP client shared by the requests of this service."""
+        return self._client
+
+    def close(self):
+        """Close the HTTP connections and the threads held by the service."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+        if self._owns_client:
+            self._client.close()
+
+    def __enter__(self):
+        """Enter the runtime context of the service."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the service when leaving the runtime context."""
+        self.close()
+
     def __repr__(self):
         """Return the string representation of a lccs object."""
         text = f'lccs("{self.url}")'
@@ -0,0 +1,231 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import heapq
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .mappings import RELATIONS, Mapping, MappingGroup
+
+if TYPE_CHECKING:
+    from .lccs import LCCS
+
+
+class MappingGraph:
+    """Graph of the classification systems of a service, linked by their mappings.
+
+    The systems and the pairs of systems with mappings are listed once, on first
+    use. The mappings of a pair are only retrieved when the pair is part of a
+    searched path, and the paths and composed mapping groups are memoized, so a
+    crosswalk between indirectly mapped systems is only built once.
+
+    The best path between two systems is the one with the highest product of
+    the similarity of its pairs, where the similarity of a pair is the mean
+    degree of similarity of its mappings. Ties are broken by the number of pairs.
+
+    :param service: The LCCS service.
+    :param scale: The highest degree of similarity used by the service. Default is 1.0.
+    """
+
+    def __init__(self, service: "LCCS", scale: float = 1.0) -> None:
+        """Create the graph of the given service."""
+        self._service = service
+        self._scale = scale
+        self._edges: Optional[Dict[str, List[str]]] = None
+        self._nodes: Dict[str, str] = {}
+        self._similarities: Dict[Tuple[str, str], float] = {}
+        self._paths: Dict[Tuple[str, str], Optional[List[str]]] = {}
+        self._groups: Dict[Tuple[str, str], MappingGroup] = {}
+
+    @property
+    def edges(self) -> Dict[str, List[str]]:
+        """Return the systems mapped from each classification system, by system id."""
+        if self._edges is None:
+            edges = {}
+            for system in self._service.classification_systems:
+                node = self._node(system['identifier'])
+                try:
+                    targets = self._service.available_mappings(node)
+                except KeyError:
+                    targets = []
+                edges[node] = [str(target.id) for target in targets]
+            self._edges = edges
+        return self._edges
+
+    @property
+    def systems(self) -> List[str]:
+        """Return the ids of the classification systems of the graph."""
+        return list(self.edges)
+
+    def _node(self, system) -> str:
+        """Return the id of a classification system given its id, name or identifier."""
+        system = str(system)
+        if self._edges is not None and system in self._edges:
+            return system
+        if system not in self._nodes:
+            self._nodes[system] = str(self._service.classification_system(system).id)
+        return self._nodes[system]
+
+    def similarity(self, system_source: str, system_target: str) -> float:
+        """
+        Return the mean degree of similarity of the mappings between two systems, in [0, 1].
+
+        :param system_source: The id of the source classification system.
+        :param system_target: The id of the target classification system.
+        """
+        key = (system_source, system_target)
+        if key not in self._similarities:
+            degrees = [
+                self._degree(mapping) or 0.0 for mapping in self._service.mappings(*key).mappings
+            ]
+            self._similarities[key] = sum(degrees) / len(degrees) if degrees else 0.0
+        return self._similarities[key]
+
+    def _degree(self, mapping: Mapping) -> Optional[float]:
+        """Return the degree of similarity of a mapping in [0, 1], or None."""
+        if mapping.degree_of_similarity is None:
+            return None
+        return min(max(mapping.degree_of_similarity / self._scale, 0.0), 1.0)
+
+    def path(self, system_source: str, system_target: str) -> List[str]:
+        """
+        Return the best path of systems from a system to another one.
+
+        :param system_source: The id, name or identifier of the source classification system.
+        :param system_target: The id, name or identifier of the target classification system.
+        :return: The ids of the systems of the path, from the source to the target.
+        """
+        key = (self._node(system_source), self._node(system_target))
+        if key not in self._paths:
+            self._paths[key] = self._best_path(*key)
+        if self._paths[key] is None:
+            raise KeyError(f"There are no mappings from {system_source} to {system_target}")
+        return list(self._paths[key])
+
+    def _best_path(self, source: str, target: str) -> Optional[List[str]]:
+        """Search the path with the highest similarity, or None if the target is not reachable."""
+        # The similarity of a path never increases when it grows, so the first
+        # time a system is taken from the queue its best path is known.
+        best = {source: (1.0, 0)}
+        previous = {}
+        queue = [(-1.0, 0, source)]
+        visited = set()
+
+        while queue:
+            _, hops, node = heapq.heappop(queue)
+            if node in visited:
+                continue
+            if node == target:
+                path = [node]
+                while path[-1] != source:
+                    path.append(previous[path[-1]])
+                return path[::-1]
+            visited.add(node)
+
+            for neighbor in self.edges.get(node, []):
+                if neighbor in visited:
+                    continue
+                candidate = (best[node][0] * self.similarity(node, neighbor), hops + 1)
+                current = best.get(neighbor)
+                if current is None or candidate[0] > current[0] or (candidate[0] == current[0] and
+                                                                    candidate[1] < current[1]):
+                    best[neighbor] = candidate
+                    previous[neighbor] = node
+                    heapq.heappush(queue, (-candidate[0], candidate[1], neighbor))
+
+        return None
+
+    def mappings(self, system_source: str, system_target: str) -> MappingGroup:
+        """
+        Return the mappings from a system to another one, composed along their best path.
+
+        Each composed mapping links a source class to a target class through the
+        classes of the intermediate systems. Its degree of similarity is the product
+        of the degrees of the mappings it is made of.
+
+        :param system_source: The id, name or identifier of the source classification system.
+        :param system_target: The id, name or identifier of the target classification system.
+        :return: The mappings between both systems.
+        """
+        path = self.path(system_source, system_target)
+        if len(path) < 2:
+            raise ValueError(f"The source and target classification systems are the same: {path[0]}")
+
+        key = (path[0], path[-1])
+        if key not in self._groups:
+            groups = [self._service.mappings(source, target) for source, target in zip(path, path[1:])]
+            self._groups[key] = groups[0] if len(groups) == 1 else self._compose(groups)
+        return self._groups[key]
+
+    def to_lut(self, system_source: str, system_target: str, **kwargs):
+        """
+        Return the lookup table from a system to another one, composed along their best path.
+
+        :param system_source: The id, name or identifier of the source classification system.
+        :param system_target: The id, name or identifier of the target classification system.
+        :param kwargs: Options of :meth:`lccs.mappings.MappingGroup.to_lut`.
+        :return: A 1-D ``numpy.ndarray`` of int64.
+        """
+        return self.mappings(system_source, system_target).to_lut(**kwargs)
+
+    def _compose(self, groups: List[MappingGroup]) -> MappingGroup:
+        """Compose the mapping groups of consecutive pairs of systems."""
+        first, last = groups[0], groups[-1]
+
+        chains = [
+            (m.source_class_id, m.target_class_id, self._degree(m), m._related_href('source_class'),
+             m._related_href('target_class'))
+            for m in first.mappings
+        ]
+        for group in groups[1:]:
+            by_source = defaultdict(list)
+            for m in group.mappings:
+                by_source[m.source_class_id].append(m)
+            chains = [
+                (source, m.target_class_id,
+                 None if degree is None or self._degree(m) is None else degree * self._degree(m),
+                 source_href, m._related_href('target_class'))
+                for source, target, degree, source_href, _ in chains
+                for m in by_source.get(target, [])
+            ]
+
+        mappings = []
+        for source, target, degree, source_href, target_href in chains:
+            links = [
+                dict(href=href, rel='item', title=RELATIONS[relation][0], type='application/json')
+                for relation, href in (('source_class', source_href), ('target_class', target_href))
+                if href is not None
+            ]
+            mappings.append(dict(
+                source_class_id=source,
+                target_class_id=target,
+                degree_of_similarity=None if degree is None else degree * self._scale,
+                links=links,
+            ))
+
+        return type(first)(
+            dict(mappings=mappings),
+            first._validate,
+            first._client,
+            source_classes=lambda: first._index('source_class'),
+            target_classes=lambda: last._index('target_class'),
+        )
+
+    def __repr__(self) -> str:
+        """Return the string representation of the graph."""
+        return "\n".join(f"{source} -> {', '.join(targets)}" for source, targets in self.edges.items())
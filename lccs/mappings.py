@@ -16,28 +16,271 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
 #
 """Python Client Library for the LCCS Web Service."""
-from typing import List, Optional
+import sys
+from typing import Callable, Dict, List, Optional, Union
+
+import httpx
+
+from .cache import GrowingResult, approximate_size
 from .utils import Utils
 from .classes import ClassificationSystemClass
 
+ClassesIndex = Dict[int, ClassificationSystemClass]
+"""Classes of a classification system indexed by class id."""
+
+RELATIONS = {
+    'source_class': ('Link to source class', 'source_class_id'),
+    'target_class': ('Link to target class', 'target_class_id'),
+}
+"""Related classes of a mapping, with the title of their link and the key of their id."""
 
-class MappingGroup(dict):
+
+class MappingGroup(dict, GrowingResult):
     """Group of class mappings."""
 
-    def __init__(self, data: dict, validate: bool = False) -> None:
+    def __init__(
+        self,
+        data: dict,
+        validate: bool = False,
+        client: Optional[httpx.Client] = None,
+        source_classes: Union[ClassesIndex, Callable[[], Optional[ClassesIndex]], None] = None,
+        target_classes: Union[ClassesIndex, Callable[[], Optional[ClassesIndex]], None] = None,
+    ) -> None:
         """
         Initialize a MappingGroup with mapping data.
 
         :param data: Dictionary containing mapping group metadata.
         :param validate: Whether to validate the data using jsonschema. Default is False.
+        :param client: (Optional) The HTTP client shared with the LCCS service.
+        :param source_classes: (Optional) Source classes indexed by class id, or a function returning them
+            that is called on first use. Used instead of fetching each source class.
+        :param target_classes: (Optional) Target classes indexed by class id, or a function returning them
+            that is called on first use. Used instead of fetching each target class.
         """
         super().__init__(data or {})
+        if validate:
+            Utils.validate(self.get('mappings', []), 'mapping', many=True)
         self._validate = validate
+        self._client = client
+        self._indexes = {'source_class': source_classes, 'target_class': target_classes}
+        self._mappings: Optional[List[Mapping]] = None
+        self._luts = {}
 
     @property
     def mappings(self) -> List["Mapping"]:
-        """Return a list of mappings."""
-        return [Mapping(mapping, self._validate) for mapping in self.get('mappings', [])]
+        """Return a list of mappings.
+
+        The list is created on first access and reused afterwards. The classes of
+        each mapping are only loaded when they are read.
+        """
+        if self._mappings is None:
+            self._mappings = [
+                Mapping(mapping, self._validate, self._client, group=self) for mapping in self.get('mappings', [])
+            ]
+            self._grown()
+        return self._mappings
+
+    def compact(self) -> "CompactMappingGroup":
+        """Return a copy of the group stored in columns. See :class:`lccs.compact.CompactMappingGroup`."""
+        from .compact import CompactMappingGroup
+        return CompactMappingGroup(
+            self,
+            self._validate,
+            self._client,
+            source_classes=self._indexes['source_class'],
+            target_classes=self._indexes['target_class'],
+        )
+
+    def _export_columns(self) -> Dict[str, list]:
+        """Return the exported columns of the mappings, read from the data of the group."""
+        from .export import MAPPING_COLUMNS, item_columns
+        return item_columns(self.get('mappings', []), MAPPING_COLUMNS)
+
+    def to_numpy(self):
+        """
+        Return the mappings as a NumPy structured array, one field per column. See :func:`lccs.export.to_numpy`.
+
+        Requires numpy.
+        """
+        from .export import to_numpy
+        return to_numpy(self._export_columns())
+
+    def to_pandas(self):
+        """
+        Return the mappings as a pandas DataFrame. See :func:`lccs.export.to_pandas`.
+
+        Requires pandas.
+        """
+        from .export import to_pandas
+        return to_pandas(self._export_columns())
+
+    def to_arrow(self):
+        """
+        Return the mappings as an Arrow table. See :func:`lccs.export.to_arrow`.
+
+        Requires pyarrow.
+        """
+        from .export import to_arrow
+        return to_arrow(self._export_columns())
+
+    def prefetch_related(self, *relations: str) -> "MappingGroup":
+        """
+        Load the related classes of all mappings at once.
+
+        Classes are taken from the group indexes; the ones not found there are
+        fetched once per distinct class.
+
+        :param relations: Names of the relations to load, ``source_class`` and/or ``target_class``.
+            Default is both.
+        :return: The mapping group itself.
+        """
+        for relation in relations or tuple(RELATIONS):
+            if relation not in RELATIONS:
+                raise ValueError(f"Unknown relation {relation}. Use: {', '.join(RELATIONS)}")
+
+            fetched = {}
+            for mapping in self.mappings:
+                if relation in mapping:
+                    continue
+                related = self._index_lookup(relation, mapping.get(RELATIONS[relation][1]))
+                if related is None:
+                    href = mapping._related_href(relation)
+                    if href not in fetched:
+                        fetched[href] = mapping._fetch_related(relation)
+                    related = fetched[href]
+                mapping[relation] = related
+
+        self._grown()
+        return self
+
+    def _class_value(self, mapping: "Mapping", relation: str, attribute: str) -> int:
+        """Return the integer id or code of a class of a mapping."""
+        if attribute == 'id':
+            return int(mapping.get(RELATIONS[relation][1]))
+        if attribute != 'code':
+            raise ValueError(f"Invalid class attribute {attribute}. Use: id, code")
+        cls = mapping._get_related(relation)
+        try:
+            return int(cls.code)
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError(f"The {relation} of mapping {mapping.source_class_id} -> "
+                             f"{mapping.target_class_id} has no integer code")
+
+    def to_lut(self, key: str = 'code', value: str = 'code', unmapped: int = 0):
+        """
+        Compile the mapping group into a dense lookup table.
+
+        The item ``i`` of the table is the target class of the source class ``i``.
+        When a source class is mapped to several target classes, the mapping with
+        the highest degree of similarity is used. The table is compiled once per
+        set of arguments.
+
+        Requires numpy.
+
+        :param key: Source class attribute used as table index, ``code`` or ``id``. Default is ``code``.
+        :param value: Target class attribute stored in the table, ``code`` or ``id``. Default is ``code``.
+        :param unmapped: Value of the source classes without mapping. Default is 0.
+        :return: A 1-D ``numpy.ndarray`` of int64.
+        """
+        np = Utils._import_optional('numpy', 'raster')
+
+        cache_key = (key, value, unmapped)
+        if cache_key not in self._luts:
+            best = {}
+            for mapping in self.mappings:
+                source = self._class_value(mapping, 'source_class', key)
+                if source < 0:
+                    raise ValueError(f"Negative source class {key} {source} can not index a lookup table")
+                similarity = mapping.degree_of_similarity or 0
+                if source not in best or similarity > best[source][0]:
+                    best[source] = (similarity, self._class_value(mapping, 'target_class', value))
+
+            lut = np.full(max(best, default=-1) + 1, unmapped, dtype=np.int64)
+            for source, (_, target) in best.items():
+                lut[source] = target
+            lut.flags.writeable = False
+            self._luts[cache_key] = lut
+            self._grown()
+
+        return self._luts[cache_key]
+
+    def reclassify(self, array, nodata: Optional[int] = None, unmapped: int = 0,
+                   key: str = 'code', value: str = 'code', dtype=None, out=None):
+        """
+        Translate an array of source classes into target classes.
+
+        The lookup table of :meth:`to_lut` is applied in a single vectorized
+        indexing pass. Arrays of uint8 or uint16 are indexed directly into a table
+        covering all their values; other integer arrays are checked for values
+        outside the table first.
+
+        Requires numpy.
+
+        :param array: An integer array (or array-like) of source classes.
+        :param nodata: (Optional) Value kept as is in the output. Default is None.
+        :param unmapped: Value of the source classes without mapping. Default is 0.
+        :param key: Source class attribute used in ``array``, ``code`` or ``id``. Default is ``code``.
+        :param value: Target class attribute written in the output, ``code`` or ``id``. Default is ``code``.
+        :param dtype: (Optional) Output data type. Default is the smallest integer type that fits the output.
+        :param out: (Optional) Array where the output is written, with the same shape as ``array``.
+        :return: The reclassified array.
+        """
+        from .raster import Reclassifier
+
+        if dtype is None and out is not None:
+            dtype = out.dtype
+        lut = self.to_lut(key=key, value=value, unmapped=unmapped)
+        return Reclassifier(lut, nodata=nodata, unmapped=unmapped, dtype=dtype)(array, out=out)
+
+    def reclassify_file(self, source, target, nodata: Optional[int] = None, unmapped: int = 0,
+                        key: str = 'code', value: str = 'code', dtype=None, **kwargs):
+        """
+        Translate a memory-mapped array of source classes into target classes, block by block.
+
+        The input is never fully loaded in memory. See :func:`lccs.raster.reclassify_blocks`
+        for the block, worker and raw file options.
+
+        Requires numpy.
+
+        :param source: The input array, ``.npy`` file or raw binary file of source classes.
+        :param target: The output ``.npy`` file, raw binary file or writable array.
+        :param nodata: (Optional) Value kept as is in the output. Blocks with only nodata are skipped.
+        :param unmapped: Value of the source classes without mapping. Default is 0.
+        :param key: Source class attribute used in ``source``, ``code`` or ``id``. Default is ``code``.
+        :param value: Target class attribute written in the output, ``code`` or ``id``. Default is ``code``.
+        :param dtype: (Optional) Output data type. Default is the smallest integer type that fits the output.
+        :param kwargs: Options of :func:`lccs.raster.reclassify_blocks`.
+        :return: The output array, memory-mapped when ``target`` is a file.
+        """
+        from .raster import Reclassifier, reclassify_blocks
+
+        lut = self.to_lut(key=key, value=value, unmapped=unmapped)
+        reclassifier = Reclassifier(lut, nodata=nodata, unmapped=unmapped, dtype=dtype)
+        return reclassify_blocks(reclassifier, source, target, **kwargs)
+
+    def _index(self, relation: str) -> Optional[ClassesIndex]:
+        """Return the class index of ``relation``, loading it on first use."""
+        index = self._indexes[relation]
+        if callable(index):
+            index = self._indexes[relation] = index()
+            self._grown()
+        return index
+
+    def _index_lookup(self, relation: str, class_id: Optional[int]) -> Optional[ClassificationSystemClass]:
+        """Return a class of the index of ``relation``, loading the index on first use."""
+        index = self._index(relation)
+        if index is None:
+            return None
+        return index.get(class_id)
+
+    def __sizeof__(self) -> int:
+        """Return the approximate size in bytes of the group, including its mappings and lookup tables.
+
+        The class indexes are counted without their classes, which belong to the class groups.
+        """
+        indexes = [index for index in self._indexes.values() if index is not None and not callable(index)]
+        return (super().__sizeof__() + approximate_size((self._mappings, self._luts))
+                + sum(sys.getsizeof(index) for index in indexes))
 
     def _repr_html_(self) -> str:
         """Render an HTML representation of the mapping group."""
@@ -53,18 +296,41 @@ class MappingGroup(dict):
 
 
 class Mapping(dict):
-    """Representation of a single mapping."""
+    """Representation of a single mapping.
 
-    def __init__(self, data: dict, validate: bool = False) -> None:
+    The source and target classes are loaded the first time they are read and
+    kept in the mapping afterwards.
+    """
+
+    def __init__(
+        self,
+        data: dict,
+        validate: bool = False,
+        client: Optional[httpx.Client] = None,
+        source_class: Optional[ClassificationSystemClass] = None,
+        target_class: Optional[ClassificationSystemClass] = None,
+        group: Optional[MappingGroup] = None,
+    ) -> None:
         """
         Initialize a Mapping with metadata.
 
         :param data: Dictionary containing mapping metadata.
         :param validate: Whether to validate the data using jsonschema. Default is False.
+        :param client: (Optional) The HTTP client shared with the LCCS service.
+        :param source_class: (Optional) The already resolved source class.
+        :param target_class: (Optional) The already resolved target class.
+        :param group: (Optional) The mapping group whose class indexes are used to resolve the classes.
         """
         super().__init__(data or {})
+        if validate and group is None:
+            Utils.validate(self, 'mapping')
         self._validate = validate
-        self._initialize_classes()
+        self._client = client
+        self._group = group
+        if source_class is not None:
+            self['source_class'] = source_class
+        if target_class is not None:
+            self['target_class'] = target_class
 
     @property
     def degree_of_similarity(self) -> Optional[float]:
@@ -81,24 +347,41 @@ class Mapping(dict):
         """Return the links associated with the mapping."""
         return self.get('links', [])
 
-    def _initialize_classes(self) -> None:
-        """Initialize source and target classes from the mapping links."""
-        for link in self.link:
-            if link.get('rel') == 'item':
-                if link.get('title') == 'Link to source class':
-                    self['source_class'] = ClassificationSystemClass(Utils._get(link['href']))
-                elif link.get('title') == 'Link to target class':
-                    self['target_class'] = ClassificationSystemClass(Utils._get(link['href']))
+    def _get_related(self, relation: str) -> Optional[ClassificationSystemClass]:
+        """Return a related class, loading it on first access."""
+        if relation not in self:
+            related = None
+            if self._group is not None:
+                related = self._group._index_lookup(relation, self.get(RELATIONS[relation][1]))
+            if related is None:
+                related = self._fetch_related(relation)
+            self[relation] = related
+        return self[relation]
+
+    def _related_href(self, relation: str) -> Optional[str]:
+        """Return the link of a related class."""
+        title = RELATIONS[relation][0]
+        return next(
+            (link['href'] for link in self.link if link.get('rel') == 'item' and link.get('title') == title),
+            None
+        )
+
+    def _fetch_related(self, relation: str) -> Optional[ClassificationSystemClass]:
+        """Fetch a related class from its link."""
+        href = self._related_href(relation)
+        if href is None:
+            return None
+        return ClassificationSystemClass(Utils._get(href, client=self._client), self._validate, self._client)
 
     @property
     def source_class(self) -> Optional[ClassificationSystemClass]:
         """Return the source class."""
-        return self.get('source_class')
+        return self._get_related('source_class')
 
     @property
     def target_class(self) -> Optional[ClassificationSystemClass]:
         """Return the target class."""
-        return self.get('target_class')
+        return self._get_related('target_class')
 
     @property
     def source_class_id(self) -> Optional[int]:
@@ -121,7 +404,3 @@ class Mapping(dict):
     def __str__(self) -> str:
         """Return a human-readable string representation of the mapping."""
         return self.__repr__()
-
-
-
-
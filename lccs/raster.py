@@ -0,0 +1,262 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from .utils import Utils
+
+DEFAULT_BLOCK_SIZE = 1 << 22
+"""Default number of array items reclassified per block."""
+
+
+class Reclassifier:
+    """Apply a lookup table to integer arrays.
+
+    The tables applied to each input data type are built once and reused, so
+    the same reclassifier can be applied to many blocks of an array.
+
+    :param lut: A 1-D lookup table, where the item ``i`` is the output value of the input value ``i``.
+    :param nodata: (Optional) Value kept as is in the output. Default is None.
+    :param unmapped: Output value of the input values outside the table. Default is 0.
+    :param dtype: (Optional) Output data type. Default is the smallest integer type that fits the output.
+    """
+
+    def __init__(self, lut, nodata: Optional[int] = None, unmapped: int = 0, dtype=None) -> None:
+        """Create a reclassifier for the given lookup table."""
+        np = Utils._import_optional('numpy', 'raster')
+
+        self.lut = np.asarray(lut)
+        self.nodata = nodata
+        self.unmapped = unmapped
+        self.dtype = np.dtype(dtype) if dtype is not None else self._output_dtype()
+        self._tables = {}
+
+    def _output_dtype(self):
+        """Return the smallest integer data type that fits the output values."""
+        np = Utils._import_optional('numpy', 'raster')
+
+        values = [self.unmapped] + ([self.nodata] if self.nodata is not None else [])
+        if len(self.lut):
+            values.extend([int(self.lut.min()), int(self.lut.max())])
+        low, high = min(values), max(values)
+        types = (np.int8, np.int16, np.int32, np.int64) if low < 0 else (np.uint8, np.uint16, np.uint32, np.uint64)
+        return next(np.dtype(t) for t in types if np.iinfo(t).min <= low and high <= np.iinfo(t).max)
+
+    def _table(self, input_dtype) -> Tuple[object, bool, bool]:
+        """Return the table applied to arrays of ``input_dtype``.
+
+        :return: The table, whether the input values index it directly, and whether
+            the nodata values must be restored after indexing.
+        """
+        if input_dtype not in self._tables:
+            np = Utils._import_optional('numpy', 'raster')
+
+            lut, nodata = self.lut, self.nodata
+            if input_dtype.kind == 'u' and input_dtype.itemsize <= 2:
+                # Every possible value of the array is an index of the table.
+                table = np.full(1 << (8 * input_dtype.itemsize), self.unmapped, dtype=self.dtype)
+                size = min(len(lut), len(table))
+                table[:size] = lut[:size]
+                direct, mask_nodata = True, False
+            else:
+                # Values outside the lookup table point to its last item, the unmapped value.
+                table = np.full(len(lut) + 1, self.unmapped, dtype=self.dtype)
+                table[:len(lut)] = lut
+                direct, mask_nodata = False, nodata is not None and not 0 <= nodata < len(lut)
+
+            if nodata is not None and 0 <= nodata < len(table) and not mask_nodata:
+                table[nodata] = nodata
+
+            self._tables[input_dtype] = (table, direct, mask_nodata)
+
+        return self._tables[input_dtype]
+
+    def __call__(self, array, out=None):
+        """
+        Reclassify an array in a single vectorized indexing pass.
+
+        :param array: An integer array (or array-like).
+        :param out: (Optional) Array where the output is written, with the same shape as ``array``.
+        :return: The reclassified array.
+        """
+        np = Utils._import_optional('numpy', 'raster')
+
+        array = np.asarray(array)
+        if not np.issubdtype(array.dtype, np.integer):
+            raise TypeError(f"Can not reclassify an array of {array.dtype}, an integer array is required")
+
+        table, direct, mask_nodata = self._table(array.dtype)
+
+        indices = array
+        if not direct:
+            outside = (array < 0) | (array >= len(self.lut))
+            if outside.any():
+                indices = np.where(outside, len(self.lut), array)
+
+        result = np.take(table, indices, out=out, mode='clip')
+        if mask_nodata:
+            result[array == self.nodata] = self.nodata
+
+        return result
+
+
+def open_array(source, shape=None, dtype=None, offset: int = 0):
+    """
+    Open an array for reading without loading it into memory.
+
+    :param source: An array, a ``.npy`` file or a raw binary file.
+    :param shape: Shape of a raw file. Default is a 1-D array of the whole file.
+    :param dtype: Data type of a raw file. Required for raw files.
+    :param offset: Offset in bytes of the array data in a raw file. Default is 0.
+    :return: A ``numpy.memmap`` or the given array.
+    """
+    np = Utils._import_optional('numpy', 'raster')
+
+    if not isinstance(source, (str, os.PathLike)):
+        return np.asarray(source) if not isinstance(source, np.ndarray) else source
+    if str(source).endswith('.npy'):
+        return np.load(source, mmap_mode='r')
+    if dtype is None:
+        raise ValueError(f"The dtype of the raw file {source} is required")
+    return np.memmap(source, mode='r', dtype=dtype, shape=shape, offset=offset)
+
+
+def create_array(target, shape, dtype):
+    """
+    Create a zero-filled array on disk, without loading it into memory.
+
+    :param target: A ``.npy`` file or a raw binary file.
+    :param shape: Shape of the array.
+    :param dtype: Data type of the array.
+    :return: A writable ``numpy.memmap``.
+    """
+    np = Utils._import_optional('numpy', 'raster')
+
+    if str(target).endswith('.npy'):
+        return np.lib.format.open_memmap(target, mode='w+', dtype=dtype, shape=shape)
+    return np.memmap(target, mode='w+', dtype=dtype, shape=shape)
+
+
+def _reclassify_block(reclassifier: Reclassifier, source, target, start: int, stop: int, zeroed: bool) -> bool:
+    """Reclassify the items ``start:stop`` of the flat arrays. Return True if the block was skipped."""
+    block = source[start:stop]
+    nodata = reclassifier.nodata
+    if nodata is not None and block.min() == nodata == block.max():
+        if not (zeroed and nodata == 0):
+            target[start:stop] = nodata
+        return True
+    reclassifier(block, out=target[start:stop])
+    return False
+
+
+_worker = {}
+"""Reclassifier and arrays of a worker process, set once by :func:`_init_worker`."""
+
+
+def _init_worker(reclassifier: Reclassifier, source: dict, target: dict, zeroed: bool):
+    """Open the arrays of a worker process and keep the reclassifier shared by its tasks."""
+    np = Utils._import_optional('numpy', 'raster')
+
+    _worker['reclassifier'] = reclassifier
+    _worker['source'] = open_array(**source).reshape(-1)
+    if str(target['target']).endswith('.npy'):
+        _worker['target'] = np.load(target['target'], mmap_mode='r+').reshape(-1)
+    else:
+        _worker['target'] = np.memmap(target['target'], mode='r+', dtype=target['dtype']).reshape(-1)
+    _worker['zeroed'] = zeroed
+
+
+def _reclassify_worker_block(start: int, stop: int) -> bool:
+    """Reclassify a block in a worker process."""
+    return _reclassify_block(
+        _worker['reclassifier'], _worker['source'], _worker['target'], start, stop, _worker['zeroed']
+    )
+
+
+def reclassify_blocks(
+    reclassifier: Reclassifier,
+    source,
+    target,
+    shape=None,
+    dtype=None,
+    offset: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    workers: Optional[int] = None,
+    processes: bool = False,
+):
+    """
+    Reclassify an array that may not fit in memory, block by block, in parallel.
+
+    The arrays are memory-mapped and split in blocks of ``block_size`` items.
+    Blocks are reclassified by a pool of threads (numpy releases the GIL while
+    indexing) or, with ``processes=True``, of processes. In a process pool each
+    worker receives the reclassifier once and opens the files itself, so the
+    tasks only carry the block bounds. Blocks with only nodata values are not
+    reclassified.
+
+    :param reclassifier: The reclassifier applied to each block.
+    :param source: The input array, ``.npy`` file or raw binary file. See :func:`open_array`.
+    :param target: The output ``.npy`` file, raw binary file or writable array with the shape of the input.
+    :param shape: Shape of a raw input file.
+    :param dtype: Data type of a raw input file.
+    :param offset: Offset in bytes of the data in a raw input file. Default is 0.
+    :param block_size: Number of items per block. Default is :data:`DEFAULT_BLOCK_SIZE`.
+    :param workers: Number of workers. Default is the number of CPUs.
+    :param processes: Use a process pool instead of a thread pool. Requires file paths
+        for ``source`` and ``target``. Default is False.
+    :return: The output array, memory-mapped when ``target`` is a file.
+    """
+    is_file = isinstance(target, (str, os.PathLike))
+    if processes and not (is_file and isinstance(source, (str, os.PathLike))):
+        raise ValueError("A process pool requires file paths for the source and the target")
+
+    array = open_array(source, shape=shape, dtype=dtype, offset=offset)
+    output = create_array(target, array.shape, reclassifier.dtype) if is_file else target
+    if output.shape != array.shape:
+        raise ValueError(f"The target shape {output.shape} differs from the source shape {array.shape}")
+    if not (array.flags.c_contiguous and output.flags.c_contiguous):
+        raise ValueError("The source and the target must be C-contiguous")
+
+    source_flat, target_flat = array.reshape(-1), output.reshape(-1)
+    bounds = [(start, min(start + block_size, array.size)) for start in range(0, array.size, block_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if processes:
+        if hasattr(output, 'flush'):
+            output.flush()
+        initargs = (
+            reclassifier,
+            dict(source=source, shape=shape, dtype=dtype, offset=offset),
+            dict(target=target, dtype=reclassifier.dtype),
+            True,
+        )
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+            list(executor.map(_reclassify_worker_block, *zip(*bounds)))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(
+                lambda bound: _reclassify_block(reclassifier, source_flat, target_flat, *bound, zeroed=is_file),
+                bounds
+            ))
+
+    if hasattr(output, 'flush'):
+        output.flush()
+
+    return output
@@ -0,0 +1,338 @@
+#
+# This file is part of Python Client Library for the LCCS-WS.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+"""Python Client Library for the LCCS Web Service."""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Collection, Optional
+
+import httpx
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+"""Status codes of the responses retried by default."""
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+"""Methods retried by default."""
+
+
+class TokenBucket:
+    """Rate limiter that lets ``rate`` requests per second through, with bursts of up to ``capacity`` requests.
+
+    :param rate: The number of tokens added per second.
+    :param capacity: (Optional) The maximum number of tokens kept. Default is ``rate``, at least one.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        """Create a full bucket."""
+        if rate <= 0:
+            raise ValueError(f"Invalid rate {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return the time to wait until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        """Wait for a token."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self) -> None:
+        """Wait for a token without blocking the event loop."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveLimit:
+    """Concurrency limit adjusted with additive increase and multiplicative decrease (AIMD).
+
+    Each successful response raises the limit by ``1 / limit``, about one more request per
+    round of requests. A failed request, or a response slower than ``latency``, multiplies
+    the limit by ``decrease``. The limit is shared by threads and event loops.
+
+    :param initial: The initial number of requests in flight.
+    :param minimum: The lowest limit. Default is 1.
+    :param maximum: The highest limit. Default is 64.
+    :param latency: (Optional) The response time in seconds above which the limit is decreased.
+    :param decrease: The factor applied to the limit on failure. Default is 0.5.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64, latency: Optional[float] = None,
+                 decrease: float = 0.5) -> None:
+        """Create the limit."""
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(f"Invalid limits: {minimum} <= {initial} <= {maximum} is required")
+        self.minimum, self.maximum = minimum, maximum
+        self.latency, self.decrease = latency, decrease
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        """Return the current number of requests allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of requests in flight."""
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """Wait until a request can be sent."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    async def aacquire(self) -> None:
+        """Wait until a request can be sent, without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, elapsed: float, failed: bool) -> None:
+        """Release a request and adjust the limit given its response time and outcome."""
+        with self._condition:
+            self._in_flight -= 1
+            if failed or (self.latency is not None and elapsed > self.latency):
+                self._limit = max(self.minimum, self._limit * self.decrease)
+            else:
+                self._limit = min(self.maximum, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+            waiters, self._waiters = self._waiters, deque()
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    """Resume a coroutine waiting for an :class:`AdaptiveLimit`."""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class TransportPolicy:
+    """Retry, rate and concurrency policy of the requests sent by a client.
+
+    Requests with an idempotent method are retried after a timeout, a network error or a
+    response with a status in ``statuses``, waiting an exponential backoff with full jitter.
+    A ``Retry-After`` header sets the wait instead; a wait longer than ``max_backoff`` is not
+    taken and the response is returned. A policy may be shared by several clients so they
+    share its rate and concurrency limits.
+
+    :param retries: The number of retries after the first attempt. Default is 3.
+    :param backoff: The base wait in seconds, doubled on each retry. Default is 0.5.
+    :param max_backoff: The maximum wait in seconds. Default is 30.
+    :param jitter: Whether each wait is drawn at random between zero and the backoff. Default is True.
+    :param statuses: The response status codes retried. Default is :data:`RETRY_STATUSES`.
+    :param methods: The request methods retried. Default is :data:`IDEMPOTENT_METHODS`.
+    :param rate: (Optional) The maximum number of requests per second, see :class:`TokenBucket`.
+    :param burst: (Optional) The number of requests sent at once before the rate applies.
+    :param concurrency: (Optional) The initial number of requests in flight, see :class:`AdaptiveLimit`.
+    :param max_concurrency: The highest adaptive concurrency. Default is 64.
+    :param latency: (Optional) The response time in seconds above which the concurrency is decreased.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: bool = True,
+        statuses: Collection[int] = RETRY_STATUSES,
+        methods: Collection[str] = IDEMPOTENT_METHODS,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_concurrency: int = 64,
+        latency: Optional[float] = None,
+    ) -> None:
+        """Create a transport policy."""
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.limit = (
+            AdaptiveLimit(concurrency, maximum=max(concurrency, max_concurrency), latency=latency)
+            if concurrency else None
+        )
+
+    def retryable(self, request: httpx.Request, attempt: int) -> bool:
+        """Return True if the request can be sent again after ``attempt`` retries."""
+        return attempt < self.retries and request.method in self.methods
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """Return the wait in seconds before a retry, or None when the server asks to wait too long."""
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_backoff else None
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def __repr__(self) -> str:
+        """Return the string representation of the policy."""
+        return (f"TransportPolicy(retries={self.retries}, backoff={self.backoff}, "
+                f"rate={self.bucket.rate if self.bucket else None}, "
+                f"concurrency={self.limit.limit if self.limit else None})")
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Return the wait in seconds of the ``Retry-After`` header, given in seconds or as a date."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryTransport(httpx.BaseTransport):
+    """HTTP transport that sends requests under a :class:`TransportPolicy`.
+
+    :param policy: The retry, rate and concurrency policy.
+    :param transport: (Optional) The transport that sends the requests. Default is a ``httpx.HTTPTransport``.
+    """
+
+    def __init__(self, policy: TransportPolicy, transport: Optional[httpx.BaseTransport] = None) -> None:
+        """Wrap a transport with a policy."""
+        self.policy = policy
+        self._transport = transport if transport is not None else httpx.HTTPTransport()
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        """Send a request once, within the rate and concurrency limits."""
+        policy = self.policy
+        if policy.bucket is not None:
+            policy.bucket.acquire()
+        if policy.limit is None:
+            return self._transport.handle_request(request)
+
+        policy.limit.acquire()
+        start, failed = time.monotonic(), True
+        try:
+            response = self._transport.handle_request(request)
+            failed = response.status_code in policy.statuses
+            return response
+        finally:
+            policy.limit.release(time.monotonic() - start, failed)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request, retrying it under the policy."""
+        attempt = 0
+        while True:
+            try:
+                response = self._send(request)
+            except httpx.TransportError:
+                if not self.policy.retryable(request, attempt):
+                    raise
+                delay = self.policy.delay(attempt)
+            else:
+                if response.status_code not in self.policy.statuses or not self.policy.retryable(request, attempt):
+                    return response
+                delay = self.policy.delay(attempt, response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        """Close the wrapped transport."""
+        self._transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Asynchronous version of :class:`RetryTransport`.
+
+    :param policy: The retry, rate and concurrency policy.
+    :param transport: (Optional) The transport that sends the requests. Default is a ``httpx.AsyncHTTPTransport``.
+    """
+
+    def __init__(self, policy: TransportPolicy, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Wrap a transport with a policy."""
+        self.policy = policy
+        self._transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        """Send a request once, within the rate and concurrency limits."""
+        policy = self.policy
+        if policy.bucket is not None:
+            await policy.bucket.aacquire()
+        if policy.limit is None:
+            return await self._transport.handle_async_request(request)
+
+        await policy.limit.aacquire()
+        start, failed = time.monotonic(), True
+        try:
+            response = await self._transport.handle_async_request(request)
+            failed = response.status_code in policy.statuses
+            return response
+        finally:
+            policy.limit.release(time.monotonic() - start, failed)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request, retrying it under the policy."""
+        attempt = 0
+        while True:
+            try:
+                response = await self._send(request)
+            except httpx.TransportError:
+                if not self.policy.retryable(request, attempt):
+                    raise
+                delay = self.policy.delay(attempt)
+            else:
+                if response.status_code not in self.policy.statuses or not self.policy.retryable(request, attempt):
+                    return response
+                delay = self.policy.delay(attempt, response)
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        """Close the wrapped transport."""
+        await self._transport.aclose()
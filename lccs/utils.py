@@ -16,30 +16,192 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
 #
 """Python Client Library for the LCCS Web Service."""
+import contextlib
+import functools
+import importlib
+import json
+import os
 import re
 from importlib.resources import as_file, files
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple, Union
 
 import httpx
-import jinja2
-from jsonschema import Draft7Validator, validate
 
-with as_file(files(__package__) / "jsonschemas") as base_schemas_path:
-    base_schemas_path_str = str(base_schemas_path) + "/"
+from .http_cache import AsyncCacheTransport, CacheTransport, ResponseCache
+from .retry import AsyncRetryTransport, RetryTransport, TransportPolicy
 
-with as_file(files(__package__) / "templates") as templates_path:
-    templateLoader = jinja2.FileSystemLoader(searchpath=str(templates_path))
-    templateEnv = jinja2.Environment(loader=templateLoader)
+JSON_DECODERS = ("orjson", "msgspec", "json")
+"""Names of the decoders of JSON response bodies, in order of preference.
+
+``orjson`` is installed by the ``json`` extra and ``msgspec`` by the ``msgspec`` extra.
+"""
+
+
+def _json_loads(name: str) -> Callable[[bytes], Any]:
+    """Return the function decoding JSON bytes with the given decoder."""
+    if name == "json":
+        return json.loads
+    if name == "orjson":
+        return Utils._import_optional("orjson", "json").loads
+    if name == "msgspec":
+        msgspec = Utils._import_optional("msgspec", "msgspec")
+        decode = msgspec.json.Decoder().decode
+
+        def loads(content: bytes) -> Any:
+            try:
+                return decode(content)
+            except msgspec.DecodeError as exc:
+                raise ValueError(f"Invalid JSON document: {exc}") from exc
+
+        return loads
+    raise ValueError(f"Unknown JSON decoder {name}, expected one of: {', '.join(JSON_DECODERS)}")
+
+
+@functools.lru_cache(maxsize=None)
+def _template_env():
+    """Return the Jinja2 environment of the HTML templates, created on first use."""
+    import jinja2
+
+    with as_file(files(__package__) / "templates") as templates_path:
+        template_loader = jinja2.FileSystemLoader(searchpath=str(templates_path))
+        return jinja2.Environment(loader=template_loader)
+
+
+@functools.lru_cache(maxsize=None)
+def _schema(name: str) -> dict:
+    """Return a JSON schema of the package, loaded once."""
+    with (files(__package__) / "jsonschemas" / f"{name}.json").open(encoding="utf-8") as schema_file:
+        return json.load(schema_file)
+
+
+@functools.lru_cache(maxsize=None)
+def _validator(name: str, many: bool = False):
+    """Return the validator of a JSON schema of the package, or of a list of its items, compiled once."""
+    from jsonschema import Draft7Validator
+
+    schema = _schema(name)
+    if many:
+        # The items keep the definitions at the root, where their references point.
+        item = {key: value for key, value in schema.items() if key not in ("$schema", "$id", "definitions")}
+        schema = {"definitions": schema.get("definitions", {}), "type": "array", "items": item}
+    Draft7Validator.check_schema(schema)
+    return Draft7Validator(schema)
+
+
+DEFAULT_TIMEOUT = httpx.Timeout(100.0)
+"""Default timeout used by the HTTP clients of LCCS."""
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+"""Default connection pool limits used by the HTTP clients of LCCS."""
 
 
 class Utils:
     """Utilities class for interacting with LCCS-WS."""
 
+    _json_decoder: Optional[Tuple[str, Callable[[bytes], Any]]] = None
+
+    @staticmethod
+    def set_json_decoder(name: Optional[str] = None) -> str:
+        """
+        Set the decoder of the JSON response bodies.
+
+        The bodies are decoded from bytes, without decoding them to text first.
+        By default, the first installed decoder of :data:`JSON_DECODERS` is used,
+        so ``orjson`` (extra ``json``) or ``msgspec`` (extra ``msgspec``) replace the standard library when installed.
+
+        :param name: (Optional) One of :data:`JSON_DECODERS`. Default is the fastest installed decoder.
+        :return: The name of the decoder set.
+        :raises ImportError: If the given decoder is not installed.
+        """
+        if name is None:
+            for candidate in JSON_DECODERS:
+                with contextlib.suppress(ImportError):
+                    Utils._json_decoder = candidate, _json_loads(candidate)
+                    break
+        else:
+            Utils._json_decoder = name, _json_loads(name)
+        return Utils._json_decoder[0]
+
+    @staticmethod
+    def _loads(content: bytes) -> Any:
+        """
+        Decode a JSON document with the decoder set by :meth:`set_json_decoder`.
+
+        :param content: The JSON document.
+        :return: The decoded document.
+        :raises ValueError: If the document is not valid JSON.
+        """
+        if Utils._json_decoder is None:
+            Utils.set_json_decoder()
+        return Utils._json_decoder[1](content)
+
+    @staticmethod
+    def create_client(
+        timeout: Union[float, httpx.Timeout, None] = None,
+        limits: Optional[httpx.Limits] = None,
+        access_token: Optional[str] = None,
+        cache: Union[str, os.PathLike, ResponseCache, None] = None,
+        policy: Optional[TransportPolicy] = None,
+        **kwargs
+    ) -> httpx.Client:
+        """
+        Create a long-lived HTTP client with a keep-alive connection pool.
+
+        :param timeout: (Optional) Timeout in seconds or a ``httpx.Timeout`` with connect, read, write and pool timeouts.
+        :param limits: (Optional) Connection pool limits as ``httpx.Limits``.
+        :param access_token: (Optional) Access token sent in every request of the client.
+        :param cache: (Optional) A persistent response cache, or the path of its database, used to
+            revalidate the GET requests of the client. See :class:`lccs.http_cache.ResponseCache`.
+        :param policy: (Optional) The retry, rate and concurrency policy of the requests sent to the server.
+            See :class:`lccs.retry.TransportPolicy`.
+        :param kwargs: (Optional) Extra arguments for ``httpx.Client``.
+        :return: A HTTP client.
+        """
+        headers = {"x-api-key": access_token} if access_token else {}
+        limits = limits if limits is not None else DEFAULT_LIMITS
+        if policy is not None:
+            kwargs["transport"] = RetryTransport(policy, kwargs.get("transport") or httpx.HTTPTransport(limits=limits))
+        if cache is not None:
+            kwargs["transport"] = CacheTransport(cache, kwargs.get("transport") or httpx.HTTPTransport(limits=limits))
+        return httpx.Client(
+            timeout=timeout if timeout is not None else DEFAULT_TIMEOUT,
+            limits=limits,
+            headers=headers,
+            **kwargs
+        )
+
+    @staticmethod
+    def _request(
+        method: str,
+        url: str,
+        client: Optional[httpx.Client] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Perform an HTTP request and raise for error status codes.
+
+        :param method: The HTTP method.
+        :param url: The URL to query.
+        :param client: (Optional) The HTTP client used in the request. When omitted, a short-lived client is used.
+        :param kwargs: (Optional) Extra arguments for ``httpx.Client.request``.
+        :return: The HTTP response.
+        """
+        if client is None:
+            with httpx.Client(timeout=DEFAULT_TIMEOUT) as transient_client:
+                response = transient_client.request(method, url, **kwargs)
+        else:
+            response = client.request(method, url, **kwargs)
+
+        response.raise_for_status()
+
+        return response
+
     @staticmethod
     def _get(
         url: str,
         access_token: Optional[str] = None,
         params: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.Client] = None,
     ) -> Union[Dict[str, Any], Tuple[str, bytes]]:
         """
         Perform an HTTP GET request and return the result as a JSON document or file content.
@@ -47,6 +209,7 @@ class Utils:
         :param url: The URL to query; must be a valid LCCS-WS endpoint.
         :param access_token: (Optional) Access token for authentication.
         :param params: (Optional) Query parameters as a dictionary.
+        :param client: (Optional) The HTTP client used in the request.
         :return: JSON response as a dictionary or a tuple with file name and binary content.
         :raises ValueError: If the response body does not contain valid JSON or is not of an expected content type.
         """
@@ -57,26 +220,69 @@ class Utils:
 
         headers = {"x-api-key": access_token} if access_token else {}
 
-        with httpx.Client(timeout=100.0) as client:
-            response = client.get(url, params=params, headers=headers)
-            response.raise_for_status()
+        response = Utils._request("GET", url, client=client, params=params, headers=headers)
+
+        return Utils._parse_response(response)
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Union[Dict[str, Any], Tuple[str, bytes]]:
+        """
+        Return the body of a GET response as a JSON document or file content.
 
+        :param response: The HTTP response.
+        :return: JSON response as a dictionary or a tuple with file name and binary content.
+        :raises ValueError: If the response body does not contain valid JSON or is not of an expected content type.
+        """
         content_type = response.headers.get("content-type", "")
 
         if content_type == "application/octet-stream":
-            content_disposition = response.headers.get("content-disposition", "")
-            try:
-                file_name = re.findall(r'filename="?(.*?)"?$', content_disposition)[0]
-            except IndexError:
-                raise ValueError(
-                    "Error extracting file name from Content-Disposition header."
-                )
-            return file_name, response.content
+            return Utils._file_name(response), response.content
 
         if content_type not in ("application/json", "application/geo+json"):
             raise ValueError(f"HTTP response is not JSON: Content-Type: {content_type}")
 
-        return response.json()
+        return Utils._loads(response.content)
+
+    @staticmethod
+    def _file_name(response: httpx.Response) -> str:
+        """
+        Return the file name of a file response.
+
+        :param response: The HTTP response.
+        :return: The file name given in the Content-Disposition header.
+        :raises ValueError: If the response has no file name.
+        """
+        content_disposition = response.headers.get("content-disposition", "")
+        try:
+            return re.findall(r'filename="?(.*?)"?$', content_disposition)[0]
+        except IndexError:
+            raise ValueError(
+                "Error extracting file name from Content-Disposition header."
+            )
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _stream(
+        method: str,
+        url: str,
+        client: Optional[httpx.Client] = None,
+        **kwargs
+    ) -> Iterator[httpx.Response]:
+        """
+        Perform an HTTP request whose body is read as a stream, and raise for error status codes.
+
+        :param method: The HTTP method.
+        :param url: The URL to query.
+        :param client: (Optional) The HTTP client used in the request. When omitted, a short-lived client is used.
+        :param kwargs: (Optional) Extra arguments for ``httpx.Client.stream``.
+        :return: A context manager of the HTTP response, with the body not read yet.
+        """
+        with contextlib.ExitStack() as stack:
+            if client is None:
+                client = stack.enter_context(httpx.Client(timeout=DEFAULT_TIMEOUT))
+            response = stack.enter_context(client.stream(method, url, **kwargs))
+            response.raise_for_status()
+            yield response
 
     @staticmethod
     def _post(
@@ -85,6 +291,7 @@ class Utils:
         data: Optional[Dict[str, Any]] = None,
         json: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.Client] = None,
     ) -> Dict[str, Any]:
         """
         Perform an HTTP POST request.
@@ -94,17 +301,16 @@ class Utils:
         :param data: (Optional) Data to send in the body of the request.
         :param json: (Optional) JSON to send in the body of the request.
         :param files: (Optional) Files to send in the body of the request.
+        :param client: (Optional) The HTTP client used in the request.
         :return: JSON response as a dictionary.
         """
         headers = {"X-Api-Key": access_token} if access_token else {}
 
-        with httpx.Client(timeout=100.0) as client:
-            response = client.post(
-                url, headers=headers, data=data, json=json, files=files
-            )
-            response.raise_for_status()
+        response = Utils._request(
+            "POST", url, client=client, headers=headers, data=data, json=json, files=files
+        )
 
-        return response.json()
+        return Utils._loads(response.content)
 
     @staticmethod
     def _put(
@@ -113,6 +319,7 @@ class Utils:
         data: Optional[Dict[str, Any]] = None,
         json: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.Client] = None,
     ) -> Dict[str, Any]:
         """
         Perform an HTTP PUT request.
@@ -122,23 +329,23 @@ class Utils:
         :param data: (Optional) Data to send in the body of the request.
         :param json: (Optional) JSON to send in the body of the request.
         :param files: (Optional) Files to send in the body of the request.
+        :param client: (Optional) The HTTP client used in the request.
         :return: JSON response as a dictionary.
         """
         headers = {"X-Api-Key": access_token} if access_token else {}
 
-        with httpx.Client(timeout=100.0) as client:
-            response = client.put(
-                url, headers=headers, data=data, json=json, files=files
-            )
-            response.raise_for_status()
+        response = Utils._request(
+            "PUT", url, client=client, headers=headers, data=data, json=json, files=files
+        )
 
-        return response.json()
+        return Utils._loads(response.content)
 
     @staticmethod
     def _delete(
         url: str,
         access_token: Optional[str] = None,
         params: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.Client] = None,
     ) -> httpx.Response:
         """
         Perform an HTTP DELETE request.
@@ -146,28 +353,250 @@ class Utils:
         :param url: The URL to query.
         :param access_token: (Optional) Access token for authentication.
         :param params: (Optional) Query parameters as a dictionary.
+        :param client: (Optional) The HTTP client used in the request.
         :return: JSON response as a dictionary.
         """
         headers = {"X-Api-Key": access_token} if access_token else {}
 
-        with httpx.Client(timeout=100.0) as client:
-            response = client.delete(url, params=params, headers=headers)
-            response.raise_for_status()
+        response = Utils._request("DELETE", url, client=client, params=params, headers=headers)
 
         return response
 
     @staticmethod
-    def validate(lccs_object):
-        """Validade function lccs object."""
-        validator = Draft7Validator(schema=lccs_object._schema)
-        validator.validate(lccs_object)
+    def create_async_client(
+        timeout: Union[float, httpx.Timeout, None] = None,
+        limits: Optional[httpx.Limits] = None,
+        access_token: Optional[str] = None,
+        cache: Union[str, os.PathLike, ResponseCache, None] = None,
+        policy: Optional[TransportPolicy] = None,
+        **kwargs
+    ) -> httpx.AsyncClient:
+        """
+        Create a long-lived asynchronous HTTP client with a keep-alive connection pool.
+
+        :param timeout: (Optional) Timeout in seconds or a ``httpx.Timeout`` with connect, read, write and pool timeouts.
+        :param limits: (Optional) Connection pool limits as ``httpx.Limits``.
+        :param access_token: (Optional) Access token sent in every request of the client.
+        :param cache: (Optional) A persistent response cache, or the path of its database, used to
+            revalidate the GET requests of the client. See :class:`lccs.http_cache.ResponseCache`.
+        :param policy: (Optional) The retry, rate and concurrency policy of the requests sent to the server.
+            See :class:`lccs.retry.TransportPolicy`.
+        :param kwargs: (Optional) Extra arguments for ``httpx.AsyncClient``.
+        :return: An asynchronous HTTP client.
+        """
+        headers = {"x-api-key": access_token} if access_token else {}
+        limits = limits if limits is not None else DEFAULT_LIMITS
+        if policy is not None:
+            kwargs["transport"] = AsyncRetryTransport(
+                policy, kwargs.get("transport") or httpx.AsyncHTTPTransport(limits=limits)
+            )
+        if cache is not None:
+            kwargs["transport"] = AsyncCacheTransport(cache, kwargs.get("transport") or httpx.AsyncHTTPTransport(limits=limits))
+        return httpx.AsyncClient(
+            timeout=timeout if timeout is not None else DEFAULT_TIMEOUT,
+            limits=limits,
+            headers=headers,
+            **kwargs
+        )
+
+    @staticmethod
+    async def _arequest(
+        method: str,
+        url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Perform an asynchronous HTTP request and raise for error status codes.
+
+        :param method: The HTTP method.
+        :param url: The URL to query.
+        :param client: (Optional) The HTTP client used in the request. When omitted, a short-lived client is used.
+        :param kwargs: (Optional) Extra arguments for ``httpx.AsyncClient.request``.
+        :return: The HTTP response.
+        """
+        if client is None:
+            async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as transient_client:
+                response = await transient_client.request(method, url, **kwargs)
+        else:
+            response = await client.request(method, url, **kwargs)
+
+        response.raise_for_status()
+
+        return response
+
+    @staticmethod
+    @contextlib.asynccontextmanager
+    async def _astream(
+        method: str,
+        url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        **kwargs
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Perform an asynchronous HTTP request whose body is read as a stream, and raise for error status codes.
+
+        :param method: The HTTP method.
+        :param url: The URL to query.
+        :param client: (Optional) The HTTP client used in the request. When omitted, a short-lived client is used.
+        :param kwargs: (Optional) Extra arguments for ``httpx.AsyncClient.stream``.
+        :return: An asynchronous context manager of the HTTP response, with the body not read yet.
+        """
+        async with contextlib.AsyncExitStack() as stack:
+            if client is None:
+                client = await stack.enter_async_context(httpx.AsyncClient(timeout=DEFAULT_TIMEOUT))
+            response = await stack.enter_async_context(client.stream(method, url, **kwargs))
+            response.raise_for_status()
+            yield response
+
+    @staticmethod
+    async def _aget(
+        url: str,
+        access_token: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> Union[Dict[str, Any], Tuple[str, bytes]]:
+        """
+        Perform an asynchronous HTTP GET request. See :meth:`_get`.
+
+        :param url: The URL to query; must be a valid LCCS-WS endpoint.
+        :param access_token: (Optional) Access token for authentication.
+        :param params: (Optional) Query parameters as a dictionary.
+        :param client: (Optional) The HTTP client used in the request.
+        :return: JSON response as a dictionary or a tuple with file name and binary content.
+        """
+        if params is None:
+            params = {}
+
+        params.setdefault("language", "pt-br")
+
+        headers = {"x-api-key": access_token} if access_token else {}
+
+        response = await Utils._arequest("GET", url, client=client, params=params, headers=headers)
+
+        return Utils._parse_response(response)
+
+    @staticmethod
+    async def _apost(
+        url: str,
+        access_token: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> Dict[str, Any]:
+        """
+        Perform an asynchronous HTTP POST request. See :meth:`_post`.
+
+        :param url: The URL to query.
+        :param access_token: (Optional) Access token for authentication.
+        :param data: (Optional) Data to send in the body of the request.
+        :param json: (Optional) JSON to send in the body of the request.
+        :param files: (Optional) Files to send in the body of the request.
+        :param client: (Optional) The HTTP client used in the request.
+        :return: JSON response as a dictionary.
+        """
+        headers = {"X-Api-Key": access_token} if access_token else {}
+
+        response = await Utils._arequest(
+            "POST", url, client=client, headers=headers, data=data, json=json, files=files
+        )
+
+        return Utils._loads(response.content)
+
+    @staticmethod
+    async def _aput(
+        url: str,
+        access_token: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> Dict[str, Any]:
+        """
+        Perform an asynchronous HTTP PUT request. See :meth:`_put`.
+
+        :param url: The URL to query.
+        :param access_token: (Optional) Access token for authentication.
+        :param data: (Optional) Data to send in the body of the request.
+        :param json: (Optional) JSON to send in the body of the request.
+        :param files: (Optional) Files to send in the body of the request.
+        :param client: (Optional) The HTTP client used in the request.
+        :return: JSON response as a dictionary.
+        """
+        headers = {"X-Api-Key": access_token} if access_token else {}
+
+        response = await Utils._arequest(
+            "PUT", url, client=client, headers=headers, data=data, json=json, files=files
+        )
+
+        return Utils._loads(response.content)
+
+    @staticmethod
+    async def _adelete(
+        url: str,
+        access_token: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> httpx.Response:
+        """
+        Perform an asynchronous HTTP DELETE request. See :meth:`_delete`.
+
+        :param url: The URL to query.
+        :param access_token: (Optional) Access token for authentication.
+        :param params: (Optional) Query parameters as a dictionary.
+        :param client: (Optional) The HTTP client used in the request.
+        :return: The HTTP response.
+        """
+        headers = {"X-Api-Key": access_token} if access_token else {}
+
+        return await Utils._arequest("DELETE", url, client=client, params=params, headers=headers)
+
+    @staticmethod
+    def validate(lccs_object, schema: str = "classification_systems", many: bool = False) -> None:
+        """
+        Validate a document against a JSON schema of the package.
+
+        The schemas are loaded and compiled once. A list is validated in a single pass.
+
+        :param lccs_object: The document, or a list of documents when ``many`` is True.
+        :param schema: The name of the schema: ``classification_systems`` (a classification system),
+            ``new_classification_system``, ``class`` or ``mapping``. Default is ``classification_systems``.
+        :param many: Whether ``lccs_object`` is a list of documents. Default is False.
+        :raises ValueError: If the document is not valid.
+        """
+        from jsonschema.exceptions import best_match
+
+        error = best_match(_validator(schema, many).iter_errors(lccs_object))
+        if error is not None:
+            location = "/".join(str(part) for part in error.absolute_path)
+            raise ValueError(
+                f"Invalid {schema.replace('_', ' ')}{f' at {location}' if location else ''}: {error.message}"
+            ) from error
 
     @staticmethod
     def render_html(template_name, **kwargs):
         """Render Jinja2 HTML template."""
-        template = templateEnv.get_template(template_name)
+        template = _template_env().get_template(template_name)
         return template.render(**kwargs)
 
+    @staticmethod
+    def _import_optional(module: str, extra: str):
+        """
+        Import an optional dependency.
+
+        :param module: The name of the module.
+        :param extra: The extra of the lccs package that installs the module.
+        :return: The module.
+        :raises ImportError: If the module is not installed.
+        """
+        try:
+            return importlib.import_module(module)
+        except ImportError as exc:
+            raise ImportError(
+                f"{module} is required for this operation. Install it with: pip install lccs[{extra}]"
+            ) from exc
+
     @staticmethod
     def get_id_by_name(name, classes):
         """Get id of class."""
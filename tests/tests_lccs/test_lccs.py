@@ -8,6 +8,7 @@
 
 """Unit-test for Python Client Library for the LCCS Web Service operations."""
 
+import asyncio
 import json
 import os
 import re
@@ -52,26 +53,32 @@ class TestLCCS:
         json_system=None,
         json_mappings=None,
     ):
-        """Config mocks endpoints."""
-        if root is not None:
-            respx.get(match_url).mock(return_value=Response(200, json=root))
-        if json_systems is not None:
-            respx.get(match_url_systems).mock(
-                return_value=Response(200, json=json_systems)
+        """Config mocks endpoints.
+
+        Routes match by URL prefix, so the most specific ones are registered first.
+        """
+        if json_mappings is not None:
+            respx.get(match_url_mappings).mock(
+                return_value=Response(200, json=json_mappings)
             )
+        if json_class is not None:
+            respx.get(match_url_class).mock(return_value=Response(200, json=json_class))
         if json_system is not None:
             respx.get(match_url_system).mock(
                 return_value=Response(200, json=json_system)
             )
-        if json_class is not None:
-            respx.get(match_url_class).mock(return_value=Response(200, json=json_class))
-        if json_mappings is not None:
-            respx.get(match_url_mappings).mock(
-                return_value=Response(200, json=json_mappings)
+        if json_systems is not None:
+            respx.get(match_url_systems).mock(
+                return_value=Response(200, json=json_systems)
             )
+        if root is not None:
+            respx.get(match_url).mock(return_value=Response(200, json=root))
 
     @respx.mock
     def test_lccs(self, lccs_object):
+        for k in lccs_object:
+            self._setup_lccs(json_systems=lccs_object[k].get("classification_systems.json"))
+
         respx.get(match_url).mock(
             return_value=Response(
                 200,
@@ -86,11 +93,1107 @@ class TestLCCS:
             )
         )
 
-        for k in lccs_object:
-            self._setup_lccs(root=lccs_object[k].get("root.json"))
-
         service = lccs.LCCS(url)
 
         assert service.url == url
         assert repr(service) == f'lccs("{url}")'
         assert str(service) == f"<LCCS [{url}]>"
+
+    @respx.mock
+    def test_lazy_construction(self, lccs_object):
+        jsons = lccs_object["jsons"]
+        systems = respx.get(match_url_systems).mock(
+            return_value=Response(200, json=jsons["classification_systems.json"])
+        )
+        root = respx.get(match_url).mock(return_value=Response(200, json=jsons["root.json"]))
+
+        service = lccs.LCCS(url, language="xx")
+        assert respx.calls.call_count == 0
+
+        with pytest.raises(KeyError):
+            service.classification_systems
+        assert root.call_count == 1 and systems.call_count == 0
+
+        service = lccs.LCCS(url)
+        assert len(service.classification_systems) == len(jsons["classification_systems.json"])
+        assert len(service.classification_systems) == len(jsons["classification_systems.json"])
+        assert root.call_count == 1 and systems.call_count == 1
+
+    @respx.mock
+    def test_shared_client(self, lccs_object):
+        for k in lccs_object:
+            self._setup_lccs(
+                root=lccs_object[k].get("root.json"),
+                json_systems=lccs_object[k].get("classification_systems.json"),
+                json_class=lccs_object[k].get("classes.json"),
+                json_system=lccs_object[k].get("classification_system.json"),
+            )
+
+        with lccs.LCCS(url, access_token="token") as service:
+            client = service.client
+            system = service.classification_system("1")
+            classes = system.classes()
+
+            assert system._client is client
+            assert all(c._client is client for c in classes)
+            assert client.headers["x-api-key"] == "token"
+
+        assert client.is_closed
+
+        external = lccs.Utils.create_client()
+        with lccs.LCCS(url, client=external) as service, lccs.LCCS(url, client=external) as other:
+            assert service.client is external
+            service.classification_system("1")
+            assert service._request_count == other._request_count == 0
+
+        assert not external.is_closed and external.event_hooks["request"] == []
+        external.close()
+
+    @respx.mock
+    def test_async_lccs(self, lccs_object):
+        for k in lccs_object:
+            self._setup_lccs(
+                root=lccs_object[k].get("root.json"),
+                json_class=lccs_object[k].get("classes.json"),
+                json_system=lccs_object[k].get("classification_system.json"),
+                json_systems=lccs_object[k].get("classification_systems.json"),
+            )
+
+        async def run():
+            async with lccs.AsyncLCCS(url, language="en", max_concurrency=4) as service:
+                assert await service.allowed_language() == ["en", "pt-br"]
+                systems = await service.classification_systems()
+                system = await service.classification_system("1")
+                classes = await system.classes()
+                assert await service.classification_system("1") is system
+                group = await system.classes_group()
+                assert await system.classes_group() is group and group.classes == classes
+                return service.client, systems, system, classes
+
+        client, systems, system, classes = asyncio.run(run())
+
+        assert client.is_closed
+        assert systems[0]["identifier"] == "prodes-1.0"
+        assert isinstance(system, lccs.classification_system.AsyncClassificationSystem)
+        assert system.identifier == "prodes-1.0"
+        assert len(classes) == 10
+
+    @respx.mock
+    def test_async_mappings(self, lccs_object):
+        jsons = lccs_object["jsons"]
+        respx.get(re.compile(url + "/mappings/1/3")).mock(
+            return_value=Response(200, json=jsons["mapping.json"])
+        )
+        class_route = respx.get(re.compile(url + "/classification_systems/[13]/classes/")).mock(
+            side_effect=lambda request: Response(
+                200, json=dict(jsons["class.json"], id=int(request.url.path.split("/")[-1]))
+            )
+        )
+
+        async def run():
+            async with lccs.AsyncLCCS(url) as service:
+                return await service.mappings("1", "3")
+
+        mapping = asyncio.run(run())
+
+        assert class_route.call_count == 10
+        assert len(mapping.mappings) == 6
+        for mp in mapping.mappings:
+            assert mp.source_class.id == mp.source_class_id
+            assert mp.target_class.id == mp.target_class_id
+        assert class_route.call_count == 10
+
+    def _setup_mapping(self, jsons):
+        """Config mocks for the mapping between the systems 1 and 3 and their classes."""
+        routes = dict(
+            mapping=respx.get(re.compile(url + "/mappings/1/3")).mock(
+                return_value=Response(200, json=jsons["mapping.json"])
+            ),
+            classes=respx.get(re.compile(url + r"/classification_systems/\d+/classes(\?|$)")).mock(
+                side_effect=lambda request: Response(
+                    200,
+                    json=[
+                        dict(jsons["class.json"], id=i, class_parent_id=i - 1 if i % 2 == 0 else None)
+                        for i in ([1, 2, 3, 4] if "/1/" in request.url.path else range(31, 37))
+                    ],
+                )
+            ),
+            class_=respx.get(re.compile(url + r"/classification_systems/\d+/classes/")).mock(
+                return_value=Response(200, json=jsons["class.json"])
+            ),
+        )
+        respx.get(re.compile(url + r"/classification_systems/\d+")).mock(
+            side_effect=lambda request: Response(
+                200,
+                json=dict(
+                    jsons["classification_system.json"],
+                    links=[dict(rel="classes", href=f"{url}{request.url.path}/classes")],
+                ),
+            )
+        )
+        self._setup_lccs(
+            root=jsons["root.json"], json_systems=jsons["classification_systems.json"]
+        )
+        return routes
+
+    @respx.mock
+    def test_mappings_resolve_classes_in_batch(self, lccs_object):
+        routes = self._setup_mapping(lccs_object["jsons"])
+
+        service = lccs.LCCS(url)
+        mapping = service.mappings("1", "3")
+
+        assert mapping.mappings is mapping.mappings
+        assert len(mapping.mappings) == 6
+        for mp in mapping.mappings:
+            assert mp.source_class.id == mp.source_class_id
+            assert mp.target_class.id == mp.target_class_id
+        str(mapping)
+
+        assert routes["mapping"].call_count == 1
+        assert routes["classes"].call_count == 2
+        assert routes["class_"].call_count == 0
+
+    @respx.mock
+    def test_lazy_relations(self, lccs_object):
+        routes = self._setup_mapping(lccs_object["jsons"])
+
+        service = lccs.LCCS(url)
+        mapping = service.mappings("1", "3")
+
+        assert [mp.degree_of_similarity for mp in mapping.mappings] == [0] * 6
+        assert [mp.source_class_id for mp in mapping.mappings] == [3, 4, 1, 2, 3, 3]
+        assert routes["classes"].call_count == 0
+
+        mapping.prefetch_related("source_class")
+        assert routes["classes"].call_count == 1
+        assert all("source_class" in mp and "target_class" not in mp for mp in mapping.mappings)
+
+        with pytest.raises(ValueError):
+            mapping.prefetch_related("parent")
+
+        group = service.classification_system("1").classes_group().prefetch_related()
+        assert [c.class_parent_name for c in group.classes] == [None, "floresta", None, "floresta"]
+        assert group.classes[1].class_parent is group.classes[0]
+        assert routes["class_"].call_count == 0
+
+    @respx.mock
+    def test_class_parent_from_siblings(self, lccs_object):
+        routes = self._setup_mapping(lccs_object["jsons"])
+
+        service = lccs.LCCS(url)
+        classes = service.classification_system("1").classes()
+
+        assert [c.class_parent_name for c in classes] == [None, "floresta", None, "floresta"]
+        assert classes[3].class_parent is classes[2]
+        assert routes["classes"].call_count == 1
+        assert routes["class_"].call_count == 0
+
+        orphan = lccs.ClassificationSystemClass(dict(classes[1], class_parent_id=10))
+        assert orphan.class_parent_name == "floresta"
+        assert routes["class_"].call_count == 1
+
+        routes["class_"].side_effect = [Response(500), Response(200, json=lccs_object["jsons"]["class.json"])]
+        group = lccs.ClassesGroup({"classes": [dict(classes[1], class_parent_id=10)]}).prefetch_related()
+        assert routes["class_"].call_count == 2
+        assert group.classes[0].class_parent_name == "floresta"
+        assert routes["class_"].call_count == 3
+
+    def test_class_hierarchy(self):
+        rows = [(1, None), (2, 1), (3, 1), (4, 2), (5, 4), (6, None), (7, 6)]
+        group = lccs.ClassesGroup(
+            dict(
+                classes=[
+                    dict(id=i, name=f"c{i}", code=f"C{i}", class_parent_id=p)
+                    for i, p in rows
+                ]
+            )
+        )
+        tree = group.hierarchy()
+
+        assert tree is group.hierarchy()
+        assert len(tree) == 7
+        assert [c.id for c in tree] == [1, 2, 4, 5, 3, 6, 7]
+        assert tree.by_name("c4").id == 4 and tree.by_code("C7").id == 7
+        assert [c.id for c in tree.roots] == [1, 6]
+        assert [c.id for c in tree.ancestors(5)] == [4, 2, 1]
+        assert [c.id for c in tree.descendants(2)] == [4, 5]
+        assert tree.depth(5) == 3 and tree.height == 4
+        assert [c.id for c in tree.leaves()] == [5, 3, 7]
+        assert [c.id for c in tree.level(1)] == [2, 3, 7]
+        assert tree.level(9) == []
+        assert tree.is_descendant(5, 1) and not tree.is_descendant(5, 3)
+        assert not tree.is_descendant(1, 1) and not tree.is_descendant(7, 1)
+
+        with pytest.raises(KeyError):
+            tree.depth(99)
+
+        with pytest.raises(ValueError):
+            lccs.ClassHierarchy(
+                [lccs.ClassificationSystemClass(dict(id=i, class_parent_id=p)) for i, p in [(1, 2), (2, 1)]]
+            )
+
+    def test_reclassify(self, lccs_object):
+        np = pytest.importorskip("numpy")
+
+        rows = [(1, 10, 0.5), (2, 20, 1.0), (2, 30, 0.2), (4, 40, 1.0)]
+        group = lccs.MappingGroup(
+            dict(
+                mappings=[
+                    dict(source_class_id=s, target_class_id=t, degree_of_similarity=d)
+                    for s, t, d in rows
+                ]
+            ),
+            source_classes={s: lccs.ClassificationSystemClass(dict(id=s, code=str(s * 100))) for s, _, _ in rows},
+            target_classes={t: lccs.ClassificationSystemClass(dict(id=t, code=str(t + 1))) for _, t, _ in rows},
+        )
+
+        lut = group.to_lut(key="id", value="id")
+        assert lut.tolist() == [0, 10, 20, 0, 40]
+        assert group.to_lut(key="id", value="id") is lut
+        assert group.to_lut()[400] == 41
+
+        raster = np.array([[1, 2, 3], [4, 255, 7]], dtype=np.uint8)
+        result = group.reclassify(raster, nodata=255, key="id", value="id")
+        assert result.dtype == np.uint8
+        assert result.tolist() == [[10, 20, 0], [40, 255, 0]]
+
+        raster = np.array([-1, 1, 2, 5, 4000], dtype=np.int32)
+        result = group.reclassify(raster, nodata=-1, unmapped=-9, key="id", value="id")
+        assert result.dtype == np.int8
+        assert result.tolist() == [-1, 10, 20, -9, -9]
+
+        out = np.empty(3, dtype=np.int64)
+        assert group.reclassify([100, 200, 400], out=out) is out
+        assert out.tolist() == [11, 21, 41]
+
+        with pytest.raises(TypeError):
+            group.reclassify(np.zeros(2, dtype=np.float32))
+
+    def test_reclassify_blocks(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        from lccs.raster import Reclassifier, reclassify_blocks
+
+        reclassifier = Reclassifier([0, 10, 20, 0, 40], nodata=255)
+        raster = np.full((4, 6), 255, dtype=np.uint16)
+        raster[2:] = [[1, 2, 3, 4, 5, 255]] * 2
+        expected = reclassifier(raster)
+
+        np.save(tmp_path / "source.npy", raster)
+        result = reclassify_blocks(reclassifier, tmp_path / "source.npy", tmp_path / "target.npy", block_size=5, workers=2)
+        assert result.tolist() == expected.tolist()
+        assert np.load(tmp_path / "target.npy").tolist() == expected.tolist()
+
+        raster.tofile(tmp_path / "source.raw")
+        reclassify_blocks(
+            reclassifier, str(tmp_path / "source.raw"), str(tmp_path / "target.raw"),
+            shape=raster.shape, dtype=raster.dtype, block_size=7, workers=2, processes=True,
+        )
+        result = np.fromfile(tmp_path / "target.raw", dtype=reclassifier.dtype).reshape(raster.shape)
+        assert result.tolist() == expected.tolist()
+
+        out = np.zeros_like(expected)
+        assert reclassify_blocks(reclassifier, raster, out, block_size=4) is out
+        assert out.tolist() == expected.tolist()
+
+        with pytest.raises(ValueError):
+            reclassify_blocks(reclassifier, raster, np.zeros(3, dtype=np.uint8))
+        with pytest.raises(ValueError):
+            reclassify_blocks(reclassifier, raster, out, processes=True)
+
+    def _setup_graph(self, jsons):
+        """Config mocks for the mappings 1 -> 2 -> 3 and 1 -> 3, with the classes of system n multiple of 10 ** n."""
+        pairs = {(1, 2): 0.9, (2, 3): 0.9, (1, 3): 0.5}
+
+        def mapping(request, source, target):
+            return Response(200, json=[
+                dict(source_class_id=i * 10 ** (int(source) - 1), target_class_id=i * 10 ** (int(target) - 1),
+                     degree_of_similarity=pairs[(int(source), int(target))], links=[])
+                for i in (1, 2)
+            ])
+
+        routes = dict(
+            mapping=respx.get(re.compile(url + r"/mappings/s?(?P<source>\d+)/s?(?P<target>\d+)")).mock(
+                side_effect=mapping
+            ),
+            available=respx.get(re.compile(url + r"/mappings/s?(?P<source>\d+)")).mock(
+                side_effect=lambda request, source: Response(200, json=[
+                    dict(rel="child", href=f"{url}/mappings/{source}/{t}") for s, t in pairs if s == int(source)
+                ]) if int(source) < 3 else Response(404)
+            ),
+        )
+        respx.get(re.compile(url + r"/classification_systems/(?P<system>\w+)")).mock(
+            side_effect=lambda request, system: Response(
+                200, json=dict(id=int(system.strip("s")), identifier=f"s{system.strip('s')}", links=[
+                    dict(rel="classes", href=f"{url}/classification_systems/{system}/classes")
+                ])
+            )
+        )
+        self._setup_lccs(
+            root=jsons["root.json"],
+            json_systems=[dict(identifier=f"s{i}", title=f"S{i}", version="1") for i in (1, 2, 3)],
+        )
+        return routes
+
+    @respx.mock
+    def test_mapping_graph(self, lccs_object):
+        pytest.importorskip("numpy")
+        routes = self._setup_graph(lccs_object["jsons"])
+
+        service = lccs.LCCS(url)
+        graph = service.mapping_graph()
+
+        assert graph is service.mapping_graph()
+        assert graph.edges == {"1": ["2", "3"], "2": ["3"], "3": []}
+        assert graph.path("s1", "3") == ["1", "2", "3"]
+        assert graph.path("2", "3") == ["2", "3"]
+
+        group = graph.mappings("1", "3")
+        assert [(m.source_class_id, m.target_class_id) for m in group.mappings] == [(1, 100), (2, 200)]
+        assert [m.degree_of_similarity for m in group.mappings] == pytest.approx([0.81, 0.81])
+        assert graph.to_lut("1", "3", key="id", value="id").tolist() == [0, 100, 200]
+
+        calls = routes["mapping"].call_count
+        assert graph.mappings("s1", "s3") is group
+        assert graph.to_lut("1", "3", key="id", value="id") is group.to_lut(key="id", value="id")
+        assert routes["mapping"].call_count == calls == 3
+
+        with pytest.raises(KeyError):
+            graph.path("3", "1")
+        with pytest.raises(ValueError):
+            graph.mappings("1", "1")
+
+    @respx.mock
+    def test_response_cache(self, lccs_object, tmp_path):
+        import time
+
+        from lccs.http_cache import CachedResponse, ResponseCache
+
+        jsons = lccs_object["jsons"]
+
+        def system(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return Response(304, headers={"ETag": '"v1"'})
+            return Response(200, json=jsons["classification_system.json"], headers={"ETag": '"v1"'})
+
+        route = respx.get(re.compile(url + r"/classification_systems/1(\?|$)")).mock(side_effect=system)
+        self._setup_lccs(root=jsons["root.json"], json_systems=jsons["classification_systems.json"])
+
+        for _ in range(2):
+            with lccs.LCCS(url, cache=tmp_path / "cache.sqlite") as service:
+                assert service.classification_system("1").identifier == jsons["classification_system.json"]["identifier"]
+
+        assert route.call_count == 2
+        assert [call.response.status_code for call in route.calls] == [200, 304]
+        assert len(ResponseCache(tmp_path / "cache.sqlite")) == 1
+
+        async def run():
+            async with lccs.AsyncLCCS(url, cache=tmp_path / "cache.sqlite") as service:
+                return (await service.classification_system("1")).identifier
+
+        assert asyncio.run(run()) == jsons["classification_system.json"]["identifier"]
+        assert route.calls.last.response.status_code == 304
+
+        cache = ResponseCache(tmp_path / "pruned.sqlite", max_entries=2, max_age=60)
+        for i, stored_at in enumerate([time.time() - 120, time.time() - 2, time.time() - 1, time.time()]):
+            cache.set(str(i), url, CachedResponse(200, [], b"", None, None, stored_at))
+        assert len(cache) == 2 and cache.get("1") is None and cache.get("3") is not None
+        cache.max_age = 0.5
+        assert cache.prune() == 1 and len(cache) == 1
+
+    @respx.mock
+    def test_result_cache(self, lccs_object):
+        import gc
+        import time
+        import weakref
+
+        from lccs.cache import ResultCache
+
+        jsons = lccs_object["jsons"]
+        self._setup_lccs(
+            root=jsons["root.json"],
+            json_systems=jsons["classification_systems.json"],
+            json_system=jsons["classification_system.json"],
+        )
+
+        service, other = lccs.LCCS(url), lccs.LCCS(url)
+        system = service.classification_system("1")
+        assert service.classification_system("1") is system
+        assert other.classification_system("1") is not system
+
+        info = service.cache_info()
+        assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+        assert 0 < info.currsize <= info.maxsize
+
+        service.cache_clear()
+        assert service.cache_info().entries == 0
+        assert service.classification_system("1") is not system
+
+        ref = weakref.ref(service)
+        del service, system
+        gc.collect()
+        assert ref() is None
+
+        cache = ResultCache(maxsize=1000, ttl=0.01)
+        assert cache.get_or_set("small", lambda: "x") == "x"
+        assert cache.get_or_set("large", lambda: "x" * 2000) == "x" * 2000
+        assert "small" in cache and "large" not in cache
+        time.sleep(0.02)
+        assert "small" not in cache
+
+    @respx.mock
+    def test_cached_classes(self, lccs_object):
+        jsons = lccs_object["jsons"]
+        classes = respx.get(match_url_class).mock(return_value=Response(200, json=jsons["classes.json"]))
+        self._setup_lccs(json_system=jsons["classification_system.json"])
+        respx.delete(re.compile(url + r"/classification_systems/1/classes/")).mock(return_value=Response(204))
+
+        service = lccs.LCCS(url)
+        system = service.classification_system("1")
+        group = system.classes_group()
+        assert system.classes_group() is group and classes.call_count == 1
+        assert [key[0] for key, _ in service._results.items()] == ["classification_system", "classes"]
+
+        service.cache_clear()
+        assert service.cache_info().entries == 0
+        assert system.classes_group() is not group and classes.call_count == 2
+
+        service.delete_class("1", 1)
+        assert service.cache_info().entries == 0
+        assert service.classification_system("1").classes_group() is not group and classes.call_count == 3
+
+    @respx.mock
+    def test_cache_size_growth(self, lccs_object):
+        from lccs.cache import ResultCache, approximate_size
+        from lccs.classes import ClassesGroup
+
+        self._setup_mapping(lccs_object["jsons"])
+        service = lccs.LCCS(url)
+
+        sizes = [service.cache_info().currsize]
+        group = service.mappings("1", "3")
+        sizes.append(service.cache_info().currsize)
+        group.prefetch_related()
+        sizes.append(service.cache_info().currsize)
+        service.classification_system("1").classes_group().hierarchy()
+        sizes.append(service.cache_info().currsize)
+        assert sizes == sorted(set(sizes))
+        assert service.cache_info().currsize == sum(approximate_size(value) for _, value in service._results.items())
+
+        data = {"classes": [dict(id=i, name=f"c{i}", class_parent_id=None) for i in range(50)]}
+        grown = ClassesGroup(data)
+        grown.hierarchy()
+        assert approximate_size(grown) > approximate_size(ClassesGroup(data)) + 200
+
+        cache = ResultCache(maxsize=approximate_size(grown) + 100)
+        classes = cache.get_or_set("classes", lambda: ClassesGroup(data))
+        cache.get_or_set("other", lambda: "x" * 100)
+        classes.hierarchy()
+        assert "classes" in cache and "other" not in cache
+        assert cache.cache_info().currsize == approximate_size(classes)
+
+        cache = ResultCache(maxsize=approximate_size(ClassesGroup(data)) + 100)
+        cache.get_or_set("classes", lambda: ClassesGroup(data)).hierarchy()
+        assert "classes" not in cache and cache.cache_info().currsize == 0
+
+    @respx.mock
+    def test_cache_invalidation(self, lccs_object):
+        self._setup_graph(lccs_object["jsons"])
+        respx.post(re.compile(url + r"/mappings/")).mock(return_value=Response(201, json={}))
+        respx.delete(re.compile(url + r"/classification_systems/")).mock(return_value=Response(204))
+
+        service = lccs.LCCS(url)
+        service.classification_system("s1")
+        service.available_mappings("1")
+        service.mappings("1", "2")
+        service.mappings("2", "3")
+
+        def cached():
+            return sorted(key for key, _ in service._results.items())
+
+        service.add_mapping("s1", "2", [])
+        assert cached() == [
+            ("classification_system", "2"), ("classification_system", "3"), ("classification_system", "s1"),
+            ("mappings", "2", "3"),
+        ]
+
+        service.delete_class("3", 300)
+        assert ("mappings", "2", "3") not in cached()
+        assert ("classification_system", "3") not in cached()
+        assert ("classification_system", "2") in cached()
+
+        service.delete_classification_system("s1")
+        assert ("classification_system", "s1") not in cached()
+        assert ("classification_system", "2") in cached()
+
+        group = service.mappings(system_source="2", system_target="3")
+        assert service.mappings("2", system_target="3") is group and ("mappings", "2", "3") in cached()
+        service.add_mapping("2", "3", [])
+        assert ("mappings", "2", "3") not in cached()
+        assert service.mapping_graph() is service.mapping_graph(scale=1.0)
+
+    @respx.mock
+    def test_concurrent_fan_out(self, lccs_object):
+        import threading
+
+        jsons = lccs_object["jsons"]
+        barrier = threading.Barrier(4, timeout=5)
+
+        def style_format(request, id):
+            barrier.wait()
+            return Response(200, json=dict(id=int(id), name=f"format-{id}", links=[]))
+
+        respx.get(re.compile(url + r"/style_formats/(?P<id>\d+)")).mock(side_effect=style_format)
+        respx.get(re.compile(url + r"/style_formats(\?|$)")).mock(
+            return_value=Response(200, json=[
+                dict(links=[dict(rel="items", href=f"{url}/style_formats/{i}")]) for i in (4, 3, 2, 1)
+            ])
+        )
+        self._setup_lccs(root=jsons["root.json"], json_systems=jsons["classification_systems.json"])
+
+        with lccs.LCCS(url, max_concurrency=4) as service:
+            assert [f.id for f in service.available_style_formats()] == [4, 3, 2, 1]
+
+    @respx.mock
+    def test_prefetch(self, lccs_object):
+        classes = respx.get(re.compile(url + r"/classification_systems/\w+/classes")).mock(
+            side_effect=lambda request: Response(200, json=[
+                dict(id=i * 10 ** (int(request.url.path.split("/")[-2].strip("s")) - 1), name=f"c{i}",
+                     class_parent_id=None, links=[])
+                for i in (1, 2)
+            ])
+        )
+        respx.get(re.compile(url + r"/classification_systems/\w+/style_formats")).mock(
+            return_value=Response(200, json=[])
+        )
+        routes = self._setup_graph(lccs_object["jsons"])
+
+        service = lccs.LCCS(url)
+        report = service.prefetch()
+
+        assert report.systems == 3
+        # System list, systems, classes, available mappings, style formats, mapping groups and mapped systems by id.
+        assert report.requests == 1 + 3 + 3 + 3 + 3 + 3 + 2
+        assert report.seconds >= 0
+        assert list(report.errors) == [("available_mappings", "s3")]
+        assert routes["mapping"].call_count == 3
+
+        requests = service._request_count
+        group = service.mappings("s1", "s3")
+        assert group.mappings[0].target_class.id == 100
+        assert service.classification_system("s2").classes()[1].id == 20
+        assert service.style_formats("s3") == []
+        assert service._request_count == requests
+        assert classes.call_count == 3
+
+        with pytest.raises(ValueError):
+            service.prefetch(include=("styles", "colors"))
+
+    def test_import_time(self):
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, time; start = time.perf_counter(); import lccs; lccs.LCCS; lccs.MappingGroup; "
+            "print(time.perf_counter() - start); print(' '.join(sys.modules))"
+        )
+        seconds, modules = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+
+        assert not {"jinja2", "jsonschema", "lxml", "sld", "lccs.cli", "lccs.style_utils"} & set(modules.split())
+        assert float(seconds) < float(os.environ.get("LCCS_IMPORT_BUDGET", "1.0"))
+
+    @pytest.mark.parametrize("cached", [False, True])
+    @respx.mock
+    def test_style_download(self, tmp_path, cached):
+        import hashlib
+
+        from lccs.http_cache import ResponseCache
+
+        content = b"<StyledLayerDescriptor>" + b"x" * 1000 + b"</StyledLayerDescriptor>"
+        headers = {"content-type": "application/octet-stream", "content-disposition": 'attachment; filename="style.sld"',
+                   "etag": '"v1"', "last-modified": "Wed, 01 Jun 2022 00:00:00 GMT"}
+
+        def style(request):
+            start = int(request.headers.get("Range", "bytes=0-")[6:-1])
+            if start:
+                return Response(206, content=content[start:], headers=dict(
+                    headers, **{"content-range": f"bytes {start}-{len(content) - 1}/{len(content)}"}
+                ))
+            return Response(200, content=content, headers=headers)
+
+        route = respx.get(f"{url}/classification_systems/1/styles/2").mock(side_effect=style)
+        service = lccs.LCCS(url, cache=tmp_path / "cache" / "cache.sqlite" if cached else None)
+
+        assert service.download_style("1", "2", tmp_path) == tmp_path / "style.sld"
+        assert (tmp_path / "style.sld").read_bytes() == content
+        assert service.get_style("1", "2", path=str(tmp_path)) == len(content)
+        assert bytes(service.style_content("1", "2")) == content
+
+        with pytest.raises(ValueError):
+            service.download_style("1", "2", tmp_path / "bad.sld", checksum="sha256:00")
+        assert not list(tmp_path.glob("bad.sld*"))
+
+        (tmp_path / "resumed.sld.part").write_bytes(content[:100])
+        checksum = "sha256:" + hashlib.sha256(content).hexdigest()
+        assert service.download_style("1", "2", tmp_path / "resumed.sld", checksum=checksum).read_bytes() == content
+        assert route.calls.last.request.headers["Range"] == "bytes=100-"
+        assert route.calls.last.response.status_code == 206
+        assert not (tmp_path / "resumed.sld.part").exists()
+        if cached:
+            assert len(ResponseCache(tmp_path / "cache" / "cache.sqlite")) == 0
+
+    @pytest.mark.parametrize("cached", [False, True])
+    @respx.mock
+    def test_download_styles(self, tmp_path, cached):
+        import tarfile
+        import zipfile
+
+        modified = "Wed, 01 Jun 2022 00:00:00 GMT"
+
+        def style(request, system, style_format):
+            if request.headers.get("If-Modified-Since") == modified:
+                return Response(304)
+            return Response(200, content=f"{system}-{style_format}".encode(), headers={
+                "content-disposition": f'attachment; filename="{system}.sld"', "last-modified": modified
+            })
+
+        styles = respx.get(url__regex=url + r"/classification_systems/(?P<system>\w+)/styles/(?P<style_format>\d+)").mock(
+            side_effect=style
+        )
+        respx.get(url__regex=url + r"/classification_systems/\w+/style_formats").mock(return_value=Response(200, json=[
+            {"href": f"{url}/style_formats/1", "rel": "style"}, {"href": f"{url}/style_formats/2", "rel": "style"}
+        ]))
+        respx.get(url__regex=url + r"/style_formats/(?P<id>\d+)").mock(
+            side_effect=lambda request, id: Response(200, json={"id": int(id), "name": f"F{id}", "links": []})
+        )
+        service = lccs.LCCS(url, cache=tmp_path / "cache.sqlite" if cached else None)
+
+        report = service.download_styles(["s1", "s2"], dest=tmp_path / "styles")
+        assert sorted(report.files) == sorted(
+            tmp_path / "styles" / s / f / f"{s}.sld" for s in ("s1", "s2") for f in ("F1", "F2")
+        )
+        assert (tmp_path / "styles" / "s2" / "F1" / "s2.sld").read_bytes() == b"s2-1"
+        assert not report.skipped and not report.errors
+
+        report = service.download_styles(["s1", "s2"], formats=["F2"], dest=tmp_path / "styles")
+        assert not report.files and len(report.skipped) == 2
+        assert styles.calls.last.request.headers["If-Modified-Since"] == modified
+        assert styles.calls.last.response.status_code == 304
+
+        saved = tmp_path / "styles" / "s1" / "F2" / "s1.sld"
+        os.utime(saved, (0, 0))
+        report = service.download_styles(["s1"], formats=["F2"], dest=tmp_path / "styles")
+        assert report.files == [saved] and not report.skipped
+
+        report = service.download_styles(["s1"], formats=["2"], dest=tmp_path / "styles.zip")
+        with zipfile.ZipFile(tmp_path / "styles.zip") as archive:
+            assert archive.read("s1/F2/s1.sld") == b"s1-2"
+
+        service.download_styles(["s1", "s2"], dest=tmp_path / "styles.tar.gz")
+        with tarfile.open(tmp_path / "styles.tar.gz") as archive:
+            assert len(archive.getnames()) == 4
+
+    @respx.mock
+    def test_write_errors(self, tmp_path):
+        styles = respx.post(f"{url}/classification_systems/1/styles").mock(return_value=Response(500))
+        respx.delete(f"{url}/style_formats/2").mock(return_value=Response(500))
+        service = lccs.LCCS(url)
+        (tmp_path / "style.sld").write_bytes(b"<sld/>")
+
+        with pytest.raises(ValueError, match="Could not insert style"):
+            service.add_style("1", "2", style_path=str(tmp_path / "style.sld"))
+        assert b"<sld/>" in styles.calls.last.request.read()
+        with pytest.raises(ValueError, match="Could not open style file"):
+            service.add_style("1", "2", style_path=str(tmp_path / "missing.sld"))
+        with pytest.raises(ValueError, match="Could not remove style format"):
+            service.delete_style_format("2")
+
+    @respx.mock
+    def test_add_classes_batches(self, lccs_object, tmp_path):
+        jsons = lccs_object["jsons"]
+        existing = [{"id": 10, "name": "Vegetation", "code": "V", "class_parent_id": None, "links": []}]
+        self._setup_lccs(json_system=jsons["classification_system.json"], json_class=existing)
+        posted = []
+
+        def create(request):
+            chunk = json.loads(request.content)
+            posted.append(chunk)
+            if any(c["name"] == "Broken" for c in chunk):
+                return Response(500)
+            return Response(201, json=[dict(c, id=100 + len(posted) * 10 + i) for i, c in enumerate(chunk)])
+
+        respx.post(f"{url}/classification_systems/1/classes").mock(side_effect=create)
+        classes = [
+            {"name": "Tree", "class_parent_id": "Forest"},
+            {"name": "Forest", "class_parent_id": "Vegetation"},
+            {"name": "Water", "class_parent_id": None},
+            {"name": "Grass", "class_parent_id": "Vegetation"},
+            {"name": "Broken", "class_parent_id": 10},
+            {"name": "Unknown", "class_parent_id": "Missing"},
+        ]
+        progress = []
+        service = lccs.LCCS(url)
+
+        report = service.add_classes("1", classes, chunk_size=2, progress=lambda done, total: progress.append(done))
+
+        assert report.chunks == 3 and len(report.classes) == 3 and report.created == 3
+        assert set(report.errors) == {("Unknown",), ("Grass", "Broken")}
+        assert progress[-1] == len(classes)
+        tree = next(c for chunk in posted for c in chunk if c["name"] == "Tree")
+        forest = next(c for c in report.classes if c["name"] == "Forest")
+        assert tree["class_parent_id"] == forest["id"]
+        assert classes[0]["class_parent_id"] == "Forest"
+
+        # Children of a failed and of a created parent in the same chunk.
+        posted.clear()
+        classes = [
+            {"name": "Crop", "class_parent_id": None},
+            {"name": "Soil", "class_parent_id": None},
+            {"name": "Broken", "class_parent_id": None},
+            {"name": "Corn", "class_parent_id": "Crop"},
+            {"name": "Debris", "class_parent_id": "Broken"},
+        ]
+        report = service.add_classes("1", classes, chunk_size=2)
+
+        assert set(report.errors) == {("Broken",), ("Debris",)}
+        assert isinstance(report.errors[("Debris",)], KeyError)
+        assert [c["name"] for c in posted[-1]] == ["Corn"]
+        assert {c["name"] for c in report.classes} == {"Crop", "Soil", "Corn"}
+        assert report.created == 3
+
+        from click.testing import CliRunner
+
+        from lccs.cli import cli
+
+        classes_path = tmp_path / "classes.json"
+        classes_path.write_text(json.dumps(classes))
+        respx.get(match_url).mock(return_value=Response(200, json=jsons["root.json"]))
+        result = CliRunner().invoke(cli, ["--url", url, "add-classes", "--system", "1", "--classes_path",
+                                          str(classes_path), "--chunk_size", "2"])
+        assert result.exit_code != 0
+        assert "Added 3 classes" in result.output and "2 classes were not added" in result.output
+
+        with pytest.raises(ValueError):
+            service.add_classes("1", [{"name": "A", "class_parent_id": "B"}, {"name": "B", "class_parent_id": "A"}])
+
+    @respx.mock
+    def test_transport_policy(self, lccs_object):
+        import time
+
+        import httpx
+
+        from lccs.retry import AdaptiveLimit, TokenBucket, TransportPolicy
+
+        jsons = lccs_object["jsons"]
+        responses = iter([
+            Response(503, headers={"Retry-After": "0"}),
+            httpx.ConnectTimeout("timeout"),
+            Response(200, json=jsons["classification_system.json"]),
+        ])
+
+        def flaky(request):
+            value = next(responses)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        route = respx.get(f"{url}/classification_systems/1").mock(side_effect=flaky)
+        created = respx.post(f"{url}/classification_systems").mock(return_value=Response(502))
+        policy = TransportPolicy(retries=3, backoff=0.001, concurrency=4)
+        service = lccs.LCCS(url, policy=policy)
+
+        assert service.classification_system("1")["identifier"] == "prodes-1.0"
+        assert route.call_count == 3
+        assert policy.limit.limit < 4 and policy.limit.in_flight == 0
+
+        with pytest.raises(ValueError):
+            service.add_classification_system({"name": "x"})
+        assert created.call_count == 1
+
+        assert TransportPolicy(max_backoff=1).delay(0, Response(429, headers={"Retry-After": "60"})) is None
+        assert TransportPolicy(backoff=1, jitter=False).delay(2) == 4
+
+        limit = AdaptiveLimit(2, maximum=3, latency=1.0)
+        limit.acquire()
+        limit.release(0.1, failed=False)
+        assert limit.limit == 2 and limit._limit == 2.5
+        limit.acquire()
+        limit.release(5.0, failed=False)
+        assert limit.limit == 1
+
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.perf_counter()
+        for _ in range(6):
+            bucket.acquire()
+        assert time.perf_counter() - start >= 0.04
+
+        async def limited():
+            shared = AdaptiveLimit(1)
+            await shared.aacquire()
+            waiting = asyncio.ensure_future(shared.aacquire())
+            await asyncio.sleep(0)
+            assert not waiting.done()
+            shared.release(0.0, failed=False)
+            await asyncio.wait_for(waiting, 1)
+            return shared.in_flight
+
+        assert asyncio.run(limited()) == 1
+
+    @respx.mock
+    def test_single_flight(self, lccs_object):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        from lccs.cache import ResultCache
+
+        jsons = lccs_object["jsons"]
+
+        def slow(request):
+            time.sleep(0.05)
+            return Response(200, json=jsons["classification_system.json"])
+
+        route = respx.get(f"{url}/classification_systems/1").mock(side_effect=slow)
+        classes = respx.get(f"{url}/classification_systems/1/classes").mock(return_value=Response(200, json=[]))
+        service = lccs.LCCS(url)
+        barrier = threading.Barrier(20)
+
+        def call(_):
+            barrier.wait()
+            system = service.classification_system("1")
+            system.classes()
+            return system
+
+        with ThreadPoolExecutor(20) as executor:
+            systems = list(executor.map(call, range(20)))
+
+        assert route.call_count == 1 and classes.call_count == 1
+        assert all(system is systems[0] for system in systems)
+        assert service.cache_info().coalesced == 19
+
+        cache, calls = ResultCache(), []
+
+        def failing():
+            calls.append(1)
+            time.sleep(0.05)
+            raise KeyError("missing")
+
+        def get(_):
+            try:
+                cache.get_or_set("key", failing)
+            except KeyError as exc:
+                return exc
+
+        with ThreadPoolExecutor(5) as executor:
+            errors = list(executor.map(get, range(5)))
+        assert len(calls) == 1 and all(isinstance(e, KeyError) for e in errors) and "key" not in cache
+
+        async def coalesced():
+            async def factory():
+                calls.append(2)
+                await asyncio.sleep(0.01)
+                return "value"
+
+            return await asyncio.gather(*(cache.aget_or_set("async", factory) for _ in range(10)))
+
+        assert asyncio.run(coalesced()) == ["value"] * 10 and calls.count(2) == 1
+
+    @respx.mock
+    def test_single_flight_small_pool(self, lccs_object):
+        import threading
+        import time
+
+        leading = threading.Event()
+
+        def formats(request):
+            if not leading.is_set():
+                leading.set()
+                time.sleep(0.1)
+            return Response(200, json=[dict(rel="style", href=f"{url}/style_formats/{i}") for i in (1, 2, 3)])
+
+        respx.get(re.compile(url + r"/style_formats/(?P<id>\d+)")).mock(
+            side_effect=lambda request, id: Response(200, json=dict(id=int(id), name=f"format-{id}", links=[]))
+        )
+        respx.get(re.compile(url + r"/classification_systems/\w+/style_formats")).mock(side_effect=formats)
+        self._setup_graph(lccs_object["jsons"])
+
+        def run(*functions):
+            threads = [threading.Thread(target=function, daemon=True) for function in functions]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+            return not any(thread.is_alive() for thread in threads)
+
+        # A thread leads the flight while the pool workers call the same method.
+        service = lccs.LCCS(url, max_concurrency=2)
+        outer = lambda: leading.wait() and service._map(lambda _: service.style_formats("s1"), range(2))
+        assert run(lambda: service.style_formats("s1"), outer)
+        assert [f.id for f in service.style_formats("s1")] == [1, 2, 3]
+        service.close()
+
+        leading.clear()
+        service = lccs.LCCS(url, max_concurrency=2)
+        reports = []
+        assert run(*[lambda: reports.append(service.prefetch(include=("styles",)))] * 3)
+        assert len(reports) == 3 and all(s == 3 for s, *_ in reports)
+        service.close()
+
+    @respx.mock
+    def test_compact_models(self, lccs_object):
+        import tracemalloc
+
+        from lccs.classes import ClassesGroup
+        from lccs.compact import CompactClassesGroup, CompactLink
+
+        def payload(n=2000):
+            return json.dumps({"classes": [
+                {
+                    "id": i, "name": f"Class {i % 50}", "title": f"Class {i % 50}", "description": None,
+                    "code": str(i), "color": "#00FF00", "class_parent_id": i // 10 if i >= 10 else None,
+                    "links": [
+                        {"href": f"{url}/classification_systems/1", "rel": "parent", "type": "application/json",
+                         "title": "Link to classification system"},
+                        {"href": f"{url}/classification_systems/1/classes/{i}", "rel": "self",
+                         "type": "application/json", "title": "Link to this document"},
+                    ],
+                } for i in range(n)
+            ]})
+
+        def allocated(factory):
+            text = payload()
+            tracemalloc.start()
+            # The regular group keeps the decoded payload, the compact one only its columns.
+            group = factory(json.loads(text))
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return group, size
+
+        regular, regular_size = allocated(ClassesGroup)
+        group, compact_size = allocated(CompactClassesGroup)
+        assert compact_size < regular_size / 2
+
+        assert len(group) == len(regular.classes) == 2000
+        for cls, expected in zip(group.classes[::97], regular.classes[::97]):
+            assert cls.to_dict() == dict(expected)
+            assert (cls.id, cls.name, cls.code, cls.class_parent_id) == (
+                expected.id, expected.name, expected.code, expected.class_parent_id
+            )
+            assert cls["color"] == expected["color"] and cls.links[0].get("rel") == "parent"
+        assert group[25].class_parent == group[2] and group[25].class_parent_name == "Class 2"
+        assert group[25].links[0] is group[26].links[0]
+        assert isinstance(group[0].links[0], CompactLink)
+        assert group.hierarchy().is_descendant(group[250], group[2])
+        assert group.to_dict() == regular.compact().to_dict() == json.loads(payload())
+
+        respx.get(re.compile(url + r"/classification_systems/s?(?P<system>\d+)/classes")).mock(
+            side_effect=lambda request, system: Response(200, json=[
+                dict(id=i * 10 ** (int(system) - 1), name=f"C{i}", code=str(i), links=[]) for i in (1, 2)
+            ])
+        )
+        self._setup_graph(lccs_object["jsons"])
+        service = lccs.LCCS(url, compact=True)
+        assert isinstance(service.classification_system("1").classes_group(), CompactClassesGroup)
+        mappings = service.mappings("1", "2")
+        assert type(mappings).__name__ == "CompactMappingGroup"
+        assert [m.to_dict() for m in mappings.mappings] == [
+            dict(m) for m in lccs.LCCS(url).mappings("1", "2").mappings
+        ]
+        assert mappings.mappings[0].source_class.id == mappings.mappings[0].source_class_id
+
+    def test_columnar_export(self):
+        np = pytest.importorskip("numpy")
+
+        from lccs.classes import ClassesGroup
+        from lccs.mappings import MappingGroup
+
+        classes = ClassesGroup({"classes": [
+            {"id": 1, "name": "Forest", "code": "1", "title": "Forest", "color": "#00FF00", "class_parent_id": None},
+            {"id": 2, "name": "Água", "code": "20", "title": "Water", "color": None, "class_parent_id": 1},
+        ]})
+        mappings = MappingGroup({"mappings": [
+            {"source_class_id": 1, "target_class_id": 10, "degree_of_similarity": 0.5},
+            {"source_class_id": 2, "target_class_id": 20, "degree_of_similarity": None},
+        ]})
+
+        for group in (classes, classes.compact()):
+            array = group.to_numpy()
+            assert array.dtype.names == ("id", "name", "code", "title", "color", "class_parent_id")
+            assert array["id"].dtype == np.int64 and array["class_parent_id"].tolist() == [-1, 1]
+            assert array["name"].tolist() == ["Forest", "Água"] and array["color"].tolist() == ["#00FF00", ""]
+
+        for group in (mappings, mappings.compact()):
+            array = group.to_numpy()
+            assert array["target_class_id"].tolist() == [10, 20]
+            assert array["degree_of_similarity"][0] == 0.5 and np.isnan(array["degree_of_similarity"][1])
+
+        assert ClassesGroup({"classes": []}).to_numpy().shape == (0,)
+
+        try:
+            frame = classes.to_pandas()
+        except ImportError as exc:
+            assert "pip install lccs[pandas]" in str(exc)
+        else:
+            assert str(frame["class_parent_id"].dtype) == "Int64" and frame["class_parent_id"].isna().tolist() == [True, False]
+
+        try:
+            table = mappings.compact().to_arrow()
+        except ImportError as exc:
+            assert "pip install lccs[arrow]" in str(exc)
+        else:
+            assert table.column("degree_of_similarity").null_count == 1
+
+    @respx.mock
+    def test_schema_validation(self, lccs_object):
+        from lccs.classes import ClassificationSystemClass
+        from lccs.utils import Utils, _validator
+
+        jsons = lccs_object["jsons"]
+        self._setup_lccs(json_system=jsons["classification_system.json"])
+        posted = respx.post(f"{url}/classification_systems/1/classes").mock(return_value=Response(201, json=[]))
+        service = lccs.LCCS(url, validate=True)
+
+        assert service.classification_system("1").name == jsons["classification_system.json"]["name"]
+
+        classes = [{"name": "Forest", "class_parent_id": None}, {"name": 10}]
+        with pytest.raises(ValueError, match="1/name"):
+            service.add_classes("1", classes)
+        with pytest.raises(ValueError):
+            service.add_mapping("1", "2", [{"source_class_id": 1}])
+        with pytest.raises(ValueError):
+            service.add_classification_system({"name": "Missing version"})
+        assert not posted.called
+
+        Utils.validate(classes[:1], "class", many=True)
+        assert _validator("class", many=True) is _validator("class", many=True)
+        with pytest.raises(ValueError):
+            ClassificationSystemClass({"links": []}, validate=True)
+
+    @respx.mock
+    def test_json_decoders(self, lccs_object):
+        from lccs.utils import JSON_DECODERS, Utils
+
+        jsons = lccs_object["jsons"]
+        self._setup_lccs(json_system=jsons["classification_system.json"])
+        installed = []
+        try:
+            for name in JSON_DECODERS:
+                try:
+                    Utils.set_json_decoder(name)
+                except ImportError as exc:
+                    assert f"pip install lccs[{dict(orjson='json').get(name, name)}]" in str(exc)
+                    continue
+                installed.append(name)
+                assert Utils._loads('{"name": "Água", "ids": [1, 2.5, null]}'.encode()) == {"name": "Água", "ids": [1, 2.5, None]}
+                with pytest.raises(ValueError):
+                    Utils._loads(b'{"name":')
+                system = lccs.LCCS(url).classification_system("1")
+                assert dict(system) == jsons["classification_system.json"]
+
+            assert Utils.set_json_decoder() == installed[0]
+            with pytest.raises(ValueError):
+                Utils.set_json_decoder("simplejson")
+        finally:
+            Utils.set_json_decoder()